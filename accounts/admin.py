@@ -78,7 +78,6 @@ class ProfileAdmin(admin.ModelAdmin):
     list_per_page = 10
 
     def delete_model(self, request, obj):
-        obj.image.delete()
         obj.delete()
 
 
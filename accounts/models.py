@@ -11,6 +11,8 @@ from django.dispatch import receiver
 from phonenumber_field.modelfields import PhoneNumberField
 
 from backend.settings import ALLOWED_IMAGES_EXTENSIONS, MAX_UPLOAD_IMAGE_SIZE
+from media_store.storage import track_blob_references
+from utils.images import register_image_derivatives
 
 
 def upload_user_media_to(instance, filename):
@@ -48,8 +50,7 @@ class Profile(models.Model):
             raise ValidationError("Image size exceeds max image upload size.")
 
     def delete(self, using=None, keep_parents=False):
-        if self.image:
-            self.image.delete()
+        self.image.delete(save=False)
         super().delete(using, keep_parents)
 
     class Meta:
@@ -68,6 +69,10 @@ def save_user_profile(sender, instance, **kwargs):
     instance.profile.save()
 
 
+register_image_derivatives(Profile, "image")
+track_blob_references(Profile, "image")
+
+
 class ResetPasswordCode(models.Model):
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
     code = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
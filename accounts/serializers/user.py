@@ -5,6 +5,7 @@ from phonenumber_field.serializerfields import PhoneNumberField
 from rest_framework import serializers
 
 from accounts.models import Profile, RegistrationMonthlyCount
+from utils.images import ImageSrcsetField
 
 
 class RegisterUserSerializer(serializers.ModelSerializer):
@@ -158,6 +159,7 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
 class ProfileSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(use_url=True)
+    image_srcset = ImageSrcsetField(source="image")
 
     class Meta:
         model = Profile
@@ -169,6 +171,7 @@ class ProfileSerializer(serializers.ModelSerializer):
             "address",
             "last_updated",
             "image",
+            "image_srcset",
         ]
 
 
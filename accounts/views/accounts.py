@@ -15,7 +15,7 @@ from accounts.serializers.user import (AddUserSerializer,
                                        UserCreateSerializer,
                                        UserUpdateSerializer,
                                        UserWithProfileSerializer)
-from log.models import Log
+from log.writer import write_log
 
 
 class RegisterFollower(APIView):
@@ -35,7 +35,7 @@ class RegisterUser(APIView):
 
         if serializer.is_valid():
             user = serializer.save()
-            Log.objects.create(mode="create", actor=user, detail="User registration")
+            write_log(mode="create", actor=user, detail="User registration")
             return Response(
                 UserWithProfileSerializer(user).data, status=status.HTTP_201_CREATED
             )
@@ -54,9 +54,7 @@ class AddUser(APIView):
         serializer = AddUserSerializer(data=request.data, context={"request": request})
         if serializer.is_valid():
             user = serializer.save()
-            Log.objects.create(
-                mode="create", actor=request.user, detail="Added a new user."
-            )
+            write_log(mode="create", actor=request.user, detail="Added a new user.")
             return Response(
                 UserCreateSerializer(user).data, status=status.HTTP_201_CREATED
             )
@@ -186,7 +184,7 @@ class UserDetail(APIView):
     def delete(self, request, pk):
         user = self.get_object(pk)
         user.delete()
-        Log.objects.create(
+        write_log(
             mode="delete",
             actor=request.user,
             detail="Removed user {}".format(user.username),
@@ -213,7 +211,7 @@ class ToggleSuperUserStatus(APIView):
         user = self.get_object(pk)
         user.is_superuser = not user.is_superuser
         user.save()
-        Log.objects.create(
+        write_log(
             mode="update", actor=request.user, detail="User superuser status toggled."
         )
         return Response(
@@ -238,7 +236,7 @@ class ToggleStaffUserStatus(APIView):
     def post(self, request, pk):
         user = self.get_object(pk)
         user.is_staff = not user.is_staff
-        Log.objects.create(
+        write_log(
             mode="update", actor=request.user, detail="User superuser status toggled."
         )
         user.save()
@@ -11,6 +11,7 @@ from accounts.serializers.auth import LoginSerializer, LogoutSerializer
 from accounts.serializers.user import UserWithProfileSerializer
 from cart.models import Order
 from cart.serializers.order import OrderSerializer
+from utils.metrics import increment
 
 
 class LoginView(APIView):
@@ -27,12 +28,14 @@ class LoginView(APIView):
             try:
                 get_user_model().objects.get(username=username)
             except get_user_model().DoesNotExist:
+                increment("login_attempts_total", result="unknown_user")
                 return Response(
                     {"detail": "User '" + username + "' Not Found!"},
                     status=status.HTTP_404_NOT_FOUND,
                 )
             user = authenticate(username=username, password=password)
             if user:
+                increment("login_attempts_total", result="success")
                 user.last_login = timezone.now()
                 if not user.is_active:
                     user.is_active = True
@@ -61,6 +64,7 @@ class LoginView(APIView):
                         {"token": token.key, "user": user_serializer.data},
                         status=status.HTTP_202_ACCEPTED,
                     )
+            increment("login_attempts_total", result="failure")
             return Response(
                 {"detail": "Login Failed! Provide Valid Authentication Credentials."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -1,10 +1,6 @@
-import os
-
 from django.contrib.auth import (authenticate, get_user_model,
                                  update_session_auth_hash)
 from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from rest_framework import status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.authtoken.models import Token
@@ -16,6 +12,7 @@ from accounts.models import ResetPasswordCode
 from accounts.serializers.auth import (ResetNewPasswordSerializer,
                                        ResetPasswordEmailSerializer,
                                        UpdatePasswordSerializer)
+from notification.outbox import queue_email
 
 
 class UpdatePassword(APIView):
@@ -85,21 +82,17 @@ class ResetPasswordRequestCode(APIView):
                     code_object.delete()
                     code_object = ResetPasswordCode.objects.create(user=user)
                 code = code_object.code
-                mail_subject = "Reset user password"
-                message = render_to_string(
+                # sent by the send_emails worker, off the request
+                queue_email(
+                    "reset_password",
+                    "Reset user password",
                     "reset_email.html",
                     {
                         "user": user.username,
                         "domain": current_site.domain,
                         "code": code,
                     },
-                )
-                send_mail(
-                    mail_subject,
-                    message="ResetPassword",
-                    from_email=os.getenv("HOST_EMAIL"),
-                    recipient_list=[email],
-                    html_message=message,
+                    email,
                 )
                 return Response(
                     {"detail": "Reset-password link sent to provided mail address."},
@@ -1,5 +1,14 @@
 from django.contrib.admin.apps import AdminConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
 
 
 class MyAdminConfig(AdminConfig):
     default_site = "backend.admin.MyAdminSite"
+
+    def ready(self):
+        super().ready()
+        from backend.db import check_connections_health, set_sqlite_pragmas
+
+        connection_created.connect(set_sqlite_pragmas)
+        request_started.connect(check_connections_health)
@@ -0,0 +1,29 @@
+from django.db import connections
+
+from backend.settings import DATABASE_HEALTH_CHECKS, SQLITE_PRAGMAS
+
+
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created receiver: tunes new sqlite connections"""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute("PRAGMA {} = {}".format(pragma, value))
+
+
+def check_connections_health(**kwargs):
+    """
+    request_started receiver: closes persistent connections that
+    are no longer usable, so the request opens a fresh one instead
+    of failing on a connection the database server already dropped
+    """
+    if not DATABASE_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict["CONN_MAX_AGE"] != 0
+            and not connection.is_usable()
+        ):
+            connection.close()
@@ -0,0 +1,166 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified, StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from backend.settings import (MEDIA_ACCEL_REDIRECT_PREFIX,
+                              MEDIA_DEFAULT_MAX_AGE, MEDIA_IMMUTABLE_MAX_AGE,
+                              MEDIA_ROOT, MEDIA_SERVE_MODE)
+
+CHUNK_SIZE = 64 * 1024
+
+# blobs are named by their sha256, legacy upload names are random per upload
+# and never reused, derivatives are derived from either, so their bytes
+# never change under the same name
+IMMUTABLE_NAME = re.compile(r"^([0-9]+|[0-9a-f]{64})(-[0-9]+w)?\.\w+$")
+CONTENT_HASH_NAME = re.compile(r"^([0-9a-f]{64}(-[0-9]+w)?)\.\w+$")
+
+BYTES_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def get_etag(path, file_stat):
+    """
+    Strong validator, the content hash of blobs and otherwise
+    modification time and size, as nginx builds it
+    """
+    match = CONTENT_HASH_NAME.match(os.path.basename(path))
+    if match:
+        return '"{}"'.format(match.group(1))
+    return '"{:x}-{:x}"'.format(int(file_stat.st_mtime), file_stat.st_size)
+
+
+def get_cache_control(path):
+    if IMMUTABLE_NAME.match(os.path.basename(path)):
+        return "public, max-age={}, immutable".format(MEDIA_IMMUTABLE_MAX_AGE)
+    return "public, max-age={}".format(MEDIA_DEFAULT_MAX_AGE)
+
+
+def etag_matches(header, etag):
+    etags = parse_etags(header)
+    # If-None-Match uses weak comparison
+    return "*" in etags or etag in [
+        tag[2:] if tag.startswith("W/") else tag for tag in etags
+    ]
+
+
+def parse_range(header, size):
+    """
+    Only single byte ranges are served partially, others get the whole file
+    :returns (first, last) byte positions, None for the whole file
+    :raises ValueError when the range cannot be satisfied
+    """
+    match = BYTES_RANGE.match(header.replace(" ", ""))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range, the last n bytes
+        if int(last) == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise ValueError("Range not satisfiable")
+    return first, last
+
+
+def read_range(full_path, first, last):
+    with open(full_path, "rb") as media_file:
+        media_file.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = media_file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def offload_response(path, full_path, content_type):
+    """Leaves the byte transfer, including ranges, to the front proxy"""
+    response = HttpResponse(content_type=content_type)
+    if MEDIA_SERVE_MODE == "nginx":
+        response["X-Accel-Redirect"] = MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+    else:
+        response["X-Sendfile"] = full_path
+    return response
+
+
+def file_response(request, full_path, file_stat, content_type, etag):
+    size = file_stat.st_size
+    if_range = request.META.get("HTTP_IF_RANGE")
+    range_header = request.META.get("HTTP_RANGE")
+    # a stale If-Range asks for the whole, changed file
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = "bytes */{}".format(size)
+            return response
+        if byte_range is not None:
+            first, last = byte_range
+            response = StreamingHttpResponse(
+                read_range(full_path, first, last),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Range"] = "bytes {}-{}/{}".format(first, last, size)
+            response["Content-Length"] = last - first + 1
+            return response
+    response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    response["Content-Length"] = size
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serves MEDIA_ROOT with validators, cache headers and byte ranges
+    With MEDIA_SERVE_MODE nginx or sendfile the proxy sends the bytes
+    """
+    try:
+        full_path = safe_join(MEDIA_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("Media not found.")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404("Media not found.")
+
+    etag = get_etag(path, file_stat)
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if (if_none_match and etag_matches(if_none_match, etag)) or (
+        if_none_match is None
+        and not was_modified_since(
+            request.META.get("HTTP_IF_MODIFIED_SINCE"),
+            file_stat.st_mtime,
+            file_stat.st_size,
+        )
+    ):
+        response = HttpResponseNotModified()
+    else:
+        content_type, encoding = mimetypes.guess_type(full_path)
+        content_type = content_type or "application/octet-stream"
+        if MEDIA_SERVE_MODE in ("nginx", "sendfile"):
+            response = offload_response(path, full_path, content_type)
+        else:
+            response = file_response(request, full_path, file_stat, content_type, etag)
+            response["Accept-Ranges"] = "bytes"
+        if encoding:
+            response["Content-Encoding"] = encoding
+        response["Last-Modified"] = http_date(file_stat.st_mtime)
+    response["ETag"] = etag
+    response["Cache-Control"] = get_cache_control(path)
+    return response
@@ -0,0 +1,81 @@
+import logging
+import time
+
+from django.db import connection
+
+from backend.settings import (REQUEST_QUERIES_THRESHOLD,
+                              REQUEST_SLOW_QUERIES_LOGGED,
+                              REQUEST_SLOW_THRESHOLD)
+from utils.metrics import observe_request
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """Execute wrapper collecting duration and sql of every query"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(((time.perf_counter() - start) * 1000, sql))
+
+    @property
+    def duration(self):
+        return sum(duration for duration, _ in self.queries)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures wall time, query count and sql time of every request
+    Reports them in the Server-Timing header, logs slow or query heavy
+    requests with their slowest queries and records per view histograms
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(query_timer):
+            response = self.get_response(request)
+        duration = (time.perf_counter() - start) * 1000
+
+        queries_count = len(query_timer.queries)
+        sql_duration = query_timer.duration
+        response[
+            "Server-Timing"
+        ] = 'app;dur={:.1f}, db;dur={:.1f};desc="{} queries"'.format(
+            duration, sql_duration, queries_count
+        )
+
+        view_name = (
+            request.resolver_match.view_name if request.resolver_match else "unresolved"
+        )
+        if (
+            duration > REQUEST_SLOW_THRESHOLD
+            or queries_count > REQUEST_QUERIES_THRESHOLD
+        ):
+            slowest_queries = sorted(query_timer.queries, reverse=True)[
+                :REQUEST_SLOW_QUERIES_LOGGED
+            ]
+            logger.warning(
+                "%s %s (%s) took %.1fms with %d queries in %.1fms, slowest:\n%s",
+                request.method,
+                request.path,
+                view_name,
+                duration,
+                queries_count,
+                sql_duration,
+                "\n".join(
+                    "{:.1f}ms {}".format(query_duration, sql)
+                    for query_duration, sql in slowest_queries
+                ),
+            )
+        observe_request(view_name, duration, queries_count, sql_duration)
+        return response
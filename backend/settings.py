@@ -44,6 +44,8 @@ CORS_ALLOWED_ORIGINS = [
 
 # Application definition
 
+TEST_RUNNER = "backend.test_runner.TestRunner"
+
 INSTALLED_APPS = [
     "backend.apps.MyAdminConfig",
     # 'django.contrib.admin',
@@ -67,6 +69,8 @@ INSTALLED_APPS = [
     "reviews",
     "homepage_content",
     "log",
+    "notification",
+    "media_store",
 ]
 
 # Rest framework settings
@@ -93,7 +97,28 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cursor pagination for order, kot, log and transaction history
+CURSOR_PAGINATION_PAGE_SIZE = int(os.getenv("CURSOR_PAGINATION_PAGE_SIZE", 50))
+CURSOR_PAGINATION_MAX_PAGE_SIZE = int(os.getenv("CURSOR_PAGINATION_MAX_PAGE_SIZE", 500))
+
+# Audit logs are queued and bulk inserted by a background thread,
+# backend.test_runner turns it off so tests read rows they just wrote
+LOG_WRITER_ASYNC = os.getenv("LOG_WRITER_ASYNC", "true") == "true"
+LOG_WRITER_BATCH_SIZE = 100
+LOG_WRITER_FLUSH_INTERVAL = 2
+
+# Logs older than the retention are moved to monthly gzip json lines archives
+LOG_RETENTION_MONTHS = int(os.getenv("LOG_RETENTION_MONTHS", 3))
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", os.path.join(BASE_DIR, "logs/archive"))
+
+# Request instrumentation: requests slower than the threshold (ms) or
+# issuing more queries are logged with their slowest queries
+REQUEST_SLOW_THRESHOLD = int(os.getenv("REQUEST_SLOW_THRESHOLD", 500))
+REQUEST_QUERIES_THRESHOLD = int(os.getenv("REQUEST_QUERIES_THRESHOLD", 50))
+REQUEST_SLOW_QUERIES_LOGGED = 5
+
 MIDDLEWARE = [
+    "backend.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -128,11 +153,40 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+if os.getenv("DATABASE_ENGINE") == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("DATABASE_NAME", "foodswipe"),
+            "USER": os.getenv("DATABASE_USER", "foodswipe"),
+            "PASSWORD": os.getenv("DATABASE_PASSWORD", ""),
+            "HOST": os.getenv("DATABASE_HOST", "localhost"),
+            "PORT": os.getenv("DATABASE_PORT", "5432"),
+            # keep connections open across requests of a worker thread
+            "CONN_MAX_AGE": int(os.getenv("DATABASE_CONN_MAX_AGE", 60)),
+            "OPTIONS": {"connect_timeout": 5},
+        }
     }
+else:
+    DATABASES = {
+        "default": {
+            # sqlite3 backend starting transactions with BEGIN IMMEDIATE
+            "ENGINE": "backend.sqlite3",
+            "NAME": os.getenv("DATABASE_NAME", os.path.join(BASE_DIR, "db.sqlite3")),
+            # seconds a writer waits for the lock before "database is locked"
+            "OPTIONS": {"timeout": 20},
+        }
+    }
+
+# ping persistent connections at request start and drop broken ones
+DATABASE_HEALTH_CHECKS = os.getenv("DATABASE_HEALTH_CHECKS", "true") == "true"
+
+# applied to every new sqlite connection, WAL lets readers run alongside a writer
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 20000,
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
 }
 
 # Password validation
@@ -185,6 +239,16 @@ MEDIA_DIR = (
     else os.path.join(BASE_DIR, "media/")
 )
 MEDIA_ROOT = MEDIA_DIR
+# uploads are stored once under their content hash
+DEFAULT_FILE_STORAGE = "media_store.storage.ContentAddressedStorage"
+# "django" streams media from the worker, "nginx" answers with
+# X-Accel-Redirect to an internal location serving MEDIA_ROOT, i.e.
+#   location /protected-media/ { internal; alias <MEDIA_ROOT>; }
+# and "sendfile" with X-Sendfile for Apache or lighttpd
+MEDIA_SERVE_MODE = os.getenv("MEDIA_SERVE_MODE", "django")
+MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_DEFAULT_MAX_AGE = 60 * 60
 
 # DJANGO PHONE NUMBER FIELD
 PHONENUMBER_DB_FORMAT = "NATIONAL"
@@ -198,6 +262,8 @@ CACHES = {
         "LOCATION": "redis://127.0.0.1:6379/1",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # serve from database when redis is unreachable
+            "IGNORE_EXCEPTIONS": True,
         },
     },
     "select2": {
@@ -209,22 +275,70 @@ CACHES = {
     },
 }
 
+# Kitchen display stream: seconds between keepalive comments
+# and before a connection is recycled
+KOT_STREAM_HEARTBEAT = 15
+KOT_STREAM_MAX_DURATION = 60 * 5
+# Each stream holds a gunicorn thread, at most this many per worker process
+# so that the remaining threads keep serving the API
+KOT_STREAM_MAX_CONNECTIONS = int(os.getenv("KOT_STREAM_MAX_CONNECTIONS", 4))
+# EventSource can not send headers, displays fetch a signed stream token
+# valid this long and fetch a new one once reconnecting fails
+KOT_STREAM_TOKEN_MAX_AGE = 60 * 60
+
 # Tell select2 which cache configuration to use:
 SELECT2_CACHE_BACKEND = "select2"
 
+# Public menu snapshots are invalidated by catalog version,
+# timeout only evicts snapshots of outdated versions
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Sales reports are invalidated by every cart change, the timeout evicts
+# reports of outdated versions
+SALES_REPORT_CACHE_TIMEOUT = 60 * 60
+
+# Upper bounds in Rupees of the menu price band facet, the last band is open
+MENU_PRICE_BANDS = [200, 500, 1000]
+
+# Menu delta sync, changes are resent for the overlap to cover transactions
+# that committed after a poll, older tokens get a full catalog
+MENU_SYNC_OVERLAP = 5
+MENU_SYNC_TOMBSTONE_RETENTION = 60 * 60 * 24 * 30
+
 # EMAIL_CONFIGURATION
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_USE_TLS = True
 EMAIL_PORT = 587
 EMAIL_HOST_USER = os.getenv("HOST_EMAIL")
 EMAIL_HOST_PASSWORD = os.getenv("HOST_PASSWORD")
+EMAIL_TIMEOUT = 30
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", os.path.join(BASE_DIR, "logs/emails"))
+DEFAULT_FROM_EMAIL = os.getenv("HOST_EMAIL")
+
+# Outbox worker (manage.py send_emails): failed mails are retried after
+# EMAIL_OUTBOX_RETRY_DELAY seconds, doubled on every attempt
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 60 * 10
+EMAIL_OUTBOX_POLL_INTERVAL = 5
 
 # File extension rule
 ALLOWED_IMAGES_EXTENSIONS = ["png", "jpg", "jpeg", "gif", "bmp", "tiff", "JPG", "webp"]
 MAX_UPLOAD_IMAGE_SIZE = 2000
 HOMEPAGE_CONTENT_IMAGE_MAX_SIZE = 2000
 
+# Scaled down copies of uploaded images, written next to the original
+# by a background thread and listed by serializers as srcset maps
+IMAGE_DERIVATIVE_WIDTHS = [160, 320, 640, 1024]
+IMAGE_DERIVATIVE_FORMATS = ["webp", "jpeg"]
+IMAGE_DERIVATIVE_QUALITY = 80
+# off in backend.test_runner, so tests find derivatives right after a save
+IMAGE_DERIVATIVES_ASYNC = os.getenv("IMAGE_DERIVATIVES_ASYNC", "true") == "true"
+
 LOYALTY_DISCOUNT = 10
 DELIVERY_START_PM = 17
 DELIVERY_START_AM = 4
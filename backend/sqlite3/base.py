@@ -0,0 +1,13 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend taking the write lock when an atomic block starts
+    A deferred transaction that reads before writing fails right away with
+    "database is locked" once another worker committed in between, since
+    busy_timeout does not apply to that upgrade. BEGIN IMMEDIATE waits instead
+    """
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
@@ -0,0 +1,17 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Writes audit logs and image derivatives synchronously for assertions"""
+
+    def setup_test_environment(self, **kwargs):
+        super(TestRunner, self).setup_test_environment(**kwargs)
+        self.settings_override = override_settings(
+            LOG_WRITER_ASYNC=False, IMAGE_DERIVATIVES_ASYNC=False
+        )
+        self.settings_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.settings_override.disable()
+        super(TestRunner, self).teardown_test_environment(**kwargs)
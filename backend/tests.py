@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from item.tests import LOCMEM_CACHES
+from utils.metrics import format_labels
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RequestMetricsMiddlewareTest(TestCase):
+    def test_server_timing_reports_request_queries(self):
+        self.client.get("/api/order-now-list")
+        response = self.client.get("/api/order-now-list")
+        app_timing, db_timing = response["Server-Timing"].split(", ")
+        self.assertTrue(app_timing.startswith("app;dur="))
+        # menu snapshot is served from cache
+        self.assertTrue(db_timing.endswith('desc="0 queries"'))
+
+    @mock.patch("backend.middleware.REQUEST_QUERIES_THRESHOLD", 0)
+    def test_query_heavy_request_is_logged_with_its_queries(self):
+        with self.assertLogs("backend.middleware", "WARNING") as logs:
+            self.client.get("/api/order-now-list")
+        self.assertIn("(item:order-now-list)", logs.output[0])
+        self.assertIn('FROM "item_menuitem"', logs.output[0])
+
+
+class PrometheusFormatTest(TestCase):
+    def test_label_values_are_escaped(self):
+        self.assertEqual(
+            format_labels({"view": 'a"b\\c', "result": "hit"}),
+            'result="hit",view="a\\"b\\\\c"',
+        )
+
+
+class MediaServingTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        patcher = mock.patch("backend.media.MEDIA_ROOT", media_root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.makedirs(os.path.join(media_root, "menu_item"))
+        with open(os.path.join(media_root, "menu_item/123456.png"), "wb") as media:
+            media.write(b"0123456789")
+
+    def test_media_has_strong_etag_and_long_cache_for_immutable_names(self):
+        response = self.client.get("/media/menu_item/123456.png")
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertFalse(response["ETag"].startswith("W/"))
+        self.assertIn("immutable", response["Cache-Control"])
+
+        response = self.client.get(
+            "/media/menu_item/123456.png", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_single_byte_range_is_served_partially(self):
+        response = self.client.get(
+            "/media/menu_item/123456.png", HTTP_RANGE="bytes=2-4"
+        )
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+        self.assertEqual(b"".join(response.streaming_content), b"234")
+
+        response = self.client.get("/media/menu_item/123456.png", HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(response.streaming_content), b"789")
+
+        response = self.client.get(
+            "/media/menu_item/123456.png", HTTP_RANGE="bytes=20-"
+        )
+        self.assertEqual(response.status_code, 416)
+
+    @mock.patch("backend.media.MEDIA_SERVE_MODE", "nginx")
+    def test_transfer_is_delegated_to_proxy(self):
+        response = self.client.get("/media/menu_item/123456.png")
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected-media/menu_item/123456.png"
+        )
+        self.assertEqual(response.content, b"")
+
+    def test_paths_outside_media_root_are_not_served(self):
+        response = self.client.get("/media/../backend/settings.py")
+        self.assertEqual(response.status_code, 404)
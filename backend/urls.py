@@ -3,7 +3,9 @@ from django.conf.urls import url
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
-from django.views.static import serve
+
+from backend.media import serve_media
+from backend.views import PrometheusMetricsView, RequestMetricsView
 
 urlpatterns = [
     path("", admin.site.urls),
@@ -17,7 +19,8 @@ urlpatterns = [
     path("api/", include("reviews.urls")),
     path("api/", include("homepage_content.urls")),
     path("api/", include("log.urls")),
-    url(r"^media/(?P<path>.*)$", serve, {"document_root": settings.MEDIA_ROOT}),
+    path("api/metrics", PrometheusMetricsView.as_view(), name="prometheus-metrics"),
+    path("api/metrics/requests", RequestMetricsView.as_view(), name="request-metrics"),
+    path("media/<path:path>", serve_media, name="media"),
 ]
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,44 @@
+from redis.exceptions import RedisError
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from utils.metrics import get_request_metrics, render_prometheus
+from utils.renderers import PlainTextRenderer
+
+
+class RequestMetricsView(APIView):
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    @staticmethod
+    def get(request):
+        try:
+            metrics = get_request_metrics()
+        except RedisError:
+            return Response(
+                {"detail": "Metrics store unavailable."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return Response({"results": metrics}, status=status.HTTP_200_OK)
+
+
+class PrometheusMetricsView(APIView):
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PlainTextRenderer]
+
+    @staticmethod
+    def get(request):
+        try:
+            metrics = render_prometheus()
+        except RedisError:
+            return Response(
+                "Metrics store unavailable.\n",
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return Response(
+            metrics, content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
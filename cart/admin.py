@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db import transaction
 
-from cart.models import CartItem, Order, OrderKOT
+from cart.models import CartItem, Order, OrderKOT, UserOrderStats
+from cart.totals import update_order_totals
 
 
 class OrderAdmin(admin.ModelAdmin):
@@ -76,18 +78,10 @@ class CartAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         if not change:
-            obj.order.total_price += obj.item.price * obj.quantity
-            obj.order.save()
             obj.created_by = request.user
-        if change:
-            this_item = CartItem.objects.get(pk=obj.pk)
-            if this_item.quantity != obj.quantity:
-                # remove previous total
-                obj.order.total_price -= obj.item.price * this_item.quantity
-                # add updated total
-                obj.order.total_price += obj.item.price * obj.quantity
-                obj.order.save()
-        super().save_model(request, obj, form, change)
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            update_order_totals(obj.order_id)
 
 
 class OrderKOTAdmin(admin.ModelAdmin):
@@ -116,6 +110,20 @@ class OrderKOTAdmin(admin.ModelAdmin):
     date_hierarchy = "timestamp"
 
 
+class UserOrderStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "user",
+        "total_orders",
+        "total_cart_items",
+        "total_transaction",
+        "updated_at",
+    )
+    ordering = ("-total_transaction",)
+    search_fields = ("user__username",)
+    list_per_page = 10
+
+
 admin.site.register(Order, OrderAdmin)
 admin.site.register(CartItem, CartAdmin)
 admin.site.register(OrderKOT, OrderKOTAdmin)
+admin.site.register(UserOrderStats, UserOrderStatsAdmin)
@@ -0,0 +1,12 @@
+from utils.cache import get_cache_version, invalidate_namespace
+
+SALES_NAMESPACE = "sales"
+
+
+def get_sales_version():
+    return get_cache_version(SALES_NAMESPACE)
+
+
+def invalidate_sales_report(**kwargs):
+    """Signal receiver: cart changes expire the monthly sales snapshot"""
+    invalidate_namespace(SALES_NAMESPACE)
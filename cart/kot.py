@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models import Max, Sum
+
+from cart.kot_stream import publish_kot_batch
+from cart.models import CartItem, Order, OrderKOT
+from utils.metrics import increment
+
+
+def generate_kot_batch(order_id):
+    """
+    Writes the next KOT batch of an order holding, per cart item, the quantity
+    not yet sent to the kitchen
+    Order row is locked so concurrent calls can not produce the same batch
+    :returns generated batch or None when nothing is outstanding
+    """
+    with transaction.atomic():
+        order = Order.objects.select_for_update().only("id").get(pk=order_id)
+        sent_quantities = {}
+        last_batch = 0
+        for row in (
+            OrderKOT.objects.filter(order=order)
+            .values("cart_item")
+            .annotate(sent=Sum("quantity_diff"), last_batch=Max("batch"))
+            .order_by()
+        ):
+            sent_quantities[row["cart_item"]] = row["sent"]
+            last_batch = max(last_batch, row["last_batch"])
+
+        batch = last_batch + 1
+        new_kots = []
+        for cart_item in CartItem.objects.filter(order=order).select_related("item"):
+            diff = cart_item.quantity - sent_quantities.get(cart_item.id, 0)
+            if diff:
+                new_kots.append(
+                    OrderKOT(
+                        order=order,
+                        cart_item=cart_item,
+                        quantity_diff=diff,
+                        batch=batch,
+                    )
+                )
+        if not new_kots:
+            return None
+        OrderKOT.objects.bulk_create(new_kots)
+
+    kot_batch = {
+        "order": order.id,
+        "batch": batch,
+        "items": [
+            {
+                "cart_item": kot.cart_item.id,
+                "item": kot.cart_item.item.name,
+                "quantity_diff": kot.quantity_diff,
+            }
+            for kot in new_kots
+        ],
+    }
+    transaction.on_commit(lambda: publish_kot_batch(kot_batch))
+    increment("kot_batches_generated_total")
+    return kot_batch
@@ -0,0 +1,133 @@
+import json
+import logging
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from backend.settings import (KOT_STREAM_HEARTBEAT, KOT_STREAM_MAX_CONNECTIONS,
+                              KOT_STREAM_MAX_DURATION,
+                              KOT_STREAM_TOKEN_MAX_AGE)
+
+logger = logging.getLogger(__name__)
+
+KOT_CHANNEL = "kot-batches"
+STREAM_TOKEN_SALT = "kot-stream"
+
+
+def publish_kot_batch(kot_batch):
+    """Fans a generated KOT batch out to every connected kitchen display"""
+    try:
+        get_redis_connection("default").publish(KOT_CHANNEL, json.dumps(kot_batch))
+    except RedisError:
+        logger.exception("Could not publish KOT batch of order #%s", kot_batch["order"])
+
+
+def format_event(data, event=None, event_id=None):
+    lines = []
+    if event_id:
+        lines.append("id: {}".format(event_id))
+    if event:
+        lines.append("event: {}".format(event))
+    lines.append("data: {}".format(data))
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_kot_batches():
+    """
+    Yields server sent events for KOT batches published by any worker
+    Comment lines keep idle connections alive, the stream ends after
+    KOT_STREAM_MAX_DURATION and EventSource clients reconnect on their own
+    """
+    pubsub = get_redis_connection("default").pubsub(ignore_subscribe_messages=True)
+    try:
+        pubsub.subscribe(KOT_CHANNEL)
+        yield "retry: 3000\n\n"
+        stream_ends_at = time.monotonic() + KOT_STREAM_MAX_DURATION
+        while time.monotonic() < stream_ends_at:
+            message = pubsub.get_message(timeout=KOT_STREAM_HEARTBEAT)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            data = message["data"].decode()
+            kot_batch = json.loads(data)
+            yield format_event(
+                data,
+                event="kot",
+                event_id="{}-{}".format(kot_batch["order"], kot_batch["batch"]),
+            )
+    except RedisError:
+        logger.exception("KOT stream lost its redis subscription")
+    finally:
+        pubsub.close()
+
+
+def get_stream_token(user):
+    """:returns signed token that only opens the KOT stream of the user"""
+    return signing.TimestampSigner(salt=STREAM_TOKEN_SALT).sign(str(user.pk))
+
+
+class StreamTokenAuthentication(BaseAuthentication):
+    """?token= with a stream token, for EventSource clients"""
+
+    def authenticate(self, request):
+        token = request.query_params.get("token")
+        if not token:
+            return None
+        try:
+            user_id = signing.TimestampSigner(salt=STREAM_TOKEN_SALT).unsign(
+                token, max_age=KOT_STREAM_TOKEN_MAX_AGE
+            )
+            user = get_user_model().objects.get(pk=user_id, is_active=True)
+        except (signing.BadSignature, get_user_model().DoesNotExist):
+            raise AuthenticationFailed("Invalid or expired stream token.")
+        return user, None
+
+
+class StreamLimiter:
+    """Counts open streams of this process"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.active = 0
+
+    def acquire(self):
+        with self.lock:
+            if self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+
+
+kot_stream_limiter = StreamLimiter(KOT_STREAM_MAX_CONNECTIONS)
+
+
+class LimitedStream:
+    """
+    Holds a limiter slot until the server closes the response, which also
+    happens when the client left before the stream started
+    """
+
+    def __init__(self, stream, limiter):
+        self.stream = stream
+        self.limiter = limiter
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.stream)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.stream.close()
+            self.limiter.release()
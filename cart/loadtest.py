@@ -0,0 +1,149 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+
+class LoadTestClient:
+    """
+    Minimal json http client recording the latency of every request
+    under its endpoint name, shared by all virtual customers
+    """
+
+    def __init__(self, base_url, token=None, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def request(self, method, path, endpoint, data=None, authenticate=False):
+        """:returns decoded json response body, None on failure"""
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if authenticate and self.token:
+            headers["Authorization"] = "Token {}".format(self.token)
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=body, headers=headers, method=method
+        )
+        name = "{} {}".format(method, endpoint)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content = response.read()
+            failed = False
+        except (urllib.error.URLError, OSError):
+            content = b""
+            failed = True
+        duration = (time.perf_counter() - start) * 1000
+        with self.lock:
+            self.latencies[name].append(duration)
+            if failed:
+                self.errors[name] += 1
+        if failed:
+            return None
+        return json.loads(content) if content else {}
+
+
+def get_percentile(sorted_values, percentile):
+    """:returns nearest rank percentile of already sorted values"""
+    index = max(int(round(percentile / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[index]
+
+
+def run_order_scenario(client, randomizer, cart_items_count):
+    """
+    One customer journey: browse menu, open an order, fill the cart,
+    confirm it, generate the kitchen ticket and deliver it
+    :returns True when every step succeeded
+    """
+    menu = client.request("GET", "/api/order-now-list", "/api/order-now-list")
+    if not menu or not menu.get("results"):
+        return False
+    order = client.request(
+        "POST",
+        "/api/init-order",
+        "/api/init-order",
+        {
+            "custom_contact": "+977984{:07d}".format(randomizer.randrange(10 ** 7)),
+            "custom_location": "Load test location",
+        },
+    )
+    if not order:
+        return False
+
+    order_path = "/{}".format(order["id"])
+    menu_items = randomizer.sample(
+        menu["results"], min(cart_items_count, len(menu["results"]))
+    )
+    for menu_item in menu_items:
+        cart_item = client.request(
+            "POST",
+            "/api/cart/",
+            "/api/cart/",
+            {
+                "order": order["id"],
+                "item": menu_item["id"],
+                "quantity": randomizer.randint(1, 3),
+            },
+        )
+        if cart_item is None:
+            return False
+
+    steps = [
+        ("PATCH", "/api/done-from-customer", None, False),
+        ("POST", "/api/generate-post-kot", None, True),
+        ("PATCH", "/api/order", {"delivery_started": True}, True),
+        ("PATCH", "/api/order", {"is_delivered": True}, True),
+    ]
+    for method, endpoint, data, authenticate in steps:
+        path = endpoint + order_path
+        if endpoint == "/api/order":
+            path += "/"
+        if client.request(method, path, endpoint, data, authenticate) is None:
+            return False
+    return True
+
+
+def run_load_test(client, customers, orders_per_customer, cart_items_count):
+    """
+    Runs the order scenario from concurrent virtual customers
+    :returns per endpoint summary rows and total wall time in seconds
+    """
+    completed = []
+
+    def run_customer(number):
+        randomizer = random.Random(number)
+        for _ in range(orders_per_customer):
+            completed.append(run_order_scenario(client, randomizer, cart_items_count))
+
+    threads = [
+        threading.Thread(target=run_customer, args=(number,))
+        for number in range(customers)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - start
+
+    rows = []
+    for name, latencies in sorted(client.latencies.items()):
+        latencies = sorted(latencies)
+        rows.append(
+            {
+                "endpoint": name,
+                "requests": len(latencies),
+                "errors": client.errors[name],
+                "p50": get_percentile(latencies, 50),
+                "p95": get_percentile(latencies, 95),
+                "p99": get_percentile(latencies, 99),
+                "throughput": len(latencies) / wall_time,
+            }
+        )
+    return rows, wall_time, completed.count(True)
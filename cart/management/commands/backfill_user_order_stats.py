@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from cart.stats import rebuild_user_order_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuilds per user order statistics from existing orders."
+
+    def handle(self, *args, **options):
+        users_count = rebuild_user_order_stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Order statistics rebuilt for {} users.".format(users_count)
+            )
+        )
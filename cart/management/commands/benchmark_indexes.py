@@ -0,0 +1,115 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from cart.models import CartItem, Order, OrderKOT
+from cart.seed import seed_menu, seed_orders, seed_users
+from log.models import Log
+from transaction.models import Transaction
+
+INDEXED_MODELS = [Order, CartItem, OrderKOT, Log, Transaction]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds synthetic orders and prints plans and timings of the hot order, "
+        "KOT, log and transaction queries with and without their indexes. "
+        "Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write("Seeding {} orders...".format(options["orders"]))
+            users = seed_users(max(options["orders"] // 20, 1))
+            menu_items = seed_menu(10, 100, 5)
+            seed_orders(options["orders"], users, menu_items, cart_items_per_order=1)
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            pending_order = Order.objects.filter(done_from_customer=False).first()
+            user = pending_order.created_by if pending_order else users[0]
+            queries = self.get_queries(user)
+
+            self.stdout.write(self.style.MIGRATE_HEADING("With indexes"))
+            with_indexes = self.run_queries(queries, options["repeat"], "indexed")
+            self.drop_indexes()
+            self.stdout.write(self.style.MIGRATE_HEADING("Without indexes"))
+            without_indexes = self.run_queries(queries, options["repeat"], "unindexed")
+
+            self.stdout.write(self.style.MIGRATE_HEADING("Summary (median ms)"))
+            for name in queries:
+                self.stdout.write(
+                    "{:<28} {:>10.2f} {:>10.2f}".format(
+                        name, with_indexes[name], without_indexes[name]
+                    )
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def get_queries(user):
+        contact = user.profile.contact
+        return {
+            "pending order by contact": Order.objects.filter(
+                custom_contact=contact, created_by=user, done_from_customer=False
+            ).order_by(),
+            "pending order at login": Order.objects.filter(
+                created_by=user, done_from_customer=False
+            ).order_by("-created_at")[:1],
+            "delivered orders of user": Order.objects.filter(
+                created_by=user, is_delivered=True
+            ).order_by(),
+            "orders page": Order.objects.order_by("-created_at", "-id")[:50],
+            "monthly cart items": CartItem.objects.filter(
+                created_at__gte=user.date_joined
+            ).order_by()[:50],
+            "kot page": OrderKOT.objects.order_by("-timestamp", "-id")[:50],
+            "logs page": Log.objects.order_by("-timestamp", "-id")[:50],
+            "transactions page": Transaction.objects.order_by("-created_at", "-id")[
+                :50
+            ],
+        }
+
+    @staticmethod
+    def explain(queryset, label):
+        """
+        Plan of the queryset, the label keeps sqlite from answering with
+        a cached plan of the same statement prepared before indexes changed
+        """
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "{} /* {} */ {}".format(
+                    connection.ops.explain_query_prefix(), label, sql
+                ),
+                params,
+            )
+            return "\n".join(
+                " ".join(str(column) for column in row) for row in cursor.fetchall()
+            )
+
+    def run_queries(self, queries, repeat, label):
+        timings = {}
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.SUCCESS(name))
+            self.stdout.write(self.explain(queryset, label))
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                durations.append((time.perf_counter() - start) * 1000)
+            timings[name] = statistics.median(durations)
+        return timings
+
+    @staticmethod
+    def drop_indexes():
+        schema_editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    cursor.execute(str(index.remove_sql(model, schema_editor)))
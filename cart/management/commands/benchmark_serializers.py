@@ -0,0 +1,126 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from cart.models import Order, OrderKOT, get_user_lookups
+from cart.seed import seed_menu, seed_orders, seed_users
+from cart.serializers.kot import KOTSerializer
+from cart.serializers.order import OrderWithCartListSerializer
+from item.models import MenuItem
+from item.serializers import MenuItemSerializer
+from log.models import Log
+from log.serializers import LogSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds synthetic orders and compares rows per second of the compiled "
+        "list serializers against plain DRF, checking both render the same "
+        "bytes. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=2000)
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write("Seeding {} orders...".format(options["orders"]))
+            users = seed_users(max(options["orders"] // 20, 1))
+            menu_items = seed_menu(10, 100, 5)
+            seed_orders(options["orders"], users, menu_items)
+
+            self.stdout.write(
+                "{:<14} {:>8} {:>14} {:>14} {:>8}".format(
+                    "serializer", "rows", "drf rows/s", "fast rows/s", "speedup"
+                )
+            )
+            for name, serializer_class, queryset in self.get_benchmarks():
+                # timings cover serialization only, rows are loaded once
+                rows = list(queryset[: options["rows"]])
+                self.check_output(serializer_class, rows)
+                drf = self.run(self.serialize_with_drf, serializer_class, rows, options)
+                fast = self.run(self.serialize_fast, serializer_class, rows, options)
+                self.stdout.write(
+                    "{:<14} {:>8} {:>14.0f} {:>14.0f} {:>7.1f}x".format(
+                        name, len(rows), drf, fast, fast / drf
+                    )
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def get_benchmarks():
+        return [
+            (
+                "menu items",
+                MenuItemSerializer,
+                MenuItem.objects.select_related(
+                    "menu_item_group", "created_by", "updated_by"
+                )
+                .prefetch_related(
+                    "item_type", *get_user_lookups("created_by", "updated_by")
+                )
+                .order_by("id"),
+            ),
+            (
+                "orders",
+                OrderWithCartListSerializer,
+                Order.objects.with_cart_items().order_by("-created_at", "-id"),
+            ),
+            (
+                "kots",
+                KOTSerializer,
+                OrderKOT.objects.select_related(
+                    "order__created_by",
+                    "order__updated_by",
+                    "cart_item__order",
+                    "cart_item__item",
+                    "cart_item__created_by",
+                )
+                .prefetch_related(
+                    "cart_item__item__item_type",
+                    *get_user_lookups(
+                        "order__created_by",
+                        "order__updated_by",
+                        "cart_item__created_by",
+                    ),
+                )
+                .order_by("-timestamp", "-id"),
+            ),
+            (
+                "logs",
+                LogSerializer,
+                Log.objects.select_related("actor").order_by("-timestamp", "-id"),
+            ),
+        ]
+
+    @staticmethod
+    def serialize_with_drf(serializer_class, rows):
+        return serializers.ListSerializer(rows, child=serializer_class()).data
+
+    @staticmethod
+    def serialize_fast(serializer_class, rows):
+        return serializer_class(rows, many=True).data
+
+    @staticmethod
+    def run(serialize, serializer_class, rows, options):
+        """:returns median rows per second"""
+        durations = []
+        for _ in range(options["repeat"]):
+            start = time.perf_counter()
+            serialize(serializer_class, rows)
+            durations.append(time.perf_counter() - start)
+        return len(rows) / max(statistics.median(durations), 1e-9)
+
+    def check_output(self, serializer_class, rows):
+        drf = JSONRenderer().render(self.serialize_with_drf(serializer_class, rows))
+        fast = JSONRenderer().render(self.serialize_fast(serializer_class, rows))
+        if drf != fast:
+            raise CommandError(
+                "{} renders differently than DRF.".format(serializer_class.__name__)
+            )
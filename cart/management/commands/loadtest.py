@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from cart.loadtest import LoadTestClient, run_load_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays the ordering flow (menu, init order, cart, done from customer, "
+        "kot, delivery) from concurrent customers against a running server and "
+        "reports latency percentiles and throughput per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8002")
+        parser.add_argument(
+            "--token", help="Staff token for the kitchen and delivery steps."
+        )
+        parser.add_argument("--customers", type=int, default=10)
+        parser.add_argument("--orders-per-customer", type=int, default=10)
+        parser.add_argument("--cart-items", type=int, default=3)
+
+    def handle(self, *args, **options):
+        client = LoadTestClient(options["url"], options["token"])
+        rows, wall_time, completed = run_load_test(
+            client,
+            options["customers"],
+            options["orders_per_customer"],
+            options["cart_items"],
+        )
+        self.stdout.write(
+            "{:<32} {:>8} {:>7} {:>9} {:>9} {:>9} {:>9}".format(
+                "endpoint", "requests", "errors", "p50 ms", "p95 ms", "p99 ms", "req/s"
+            )
+        )
+        for row in rows:
+            self.stdout.write(
+                "{endpoint:<32} {requests:>8} {errors:>7} {p50:>9.1f} {p95:>9.1f} "
+                "{p99:>9.1f} {throughput:>9.1f}".format(**row)
+            )
+        total_orders = options["customers"] * options["orders_per_customer"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                "{} of {} orders completed in {:.1f}s.".format(
+                    completed, total_orders, wall_time
+                )
+            )
+        )
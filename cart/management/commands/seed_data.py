@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cart.seed import seed_menu, seed_orders, seed_reviews, seed_users
+from cart.stats import rebuild_user_order_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates synthetic customers, menu, orders with cart items, KOTs, "
+        "logs and transactions, and reviews for load testing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=10)
+        parser.add_argument("--items", type=int, default=100)
+        parser.add_argument("--item-types", type=int, default=5)
+        parser.add_argument("--orders", type=int, default=10000)
+        parser.add_argument("--cart-items-per-order", type=int, default=3)
+        parser.add_argument("--reviews", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        with transaction.atomic():
+            users = seed_users(options["users"], batch_size)
+            menu_items = seed_menu(
+                options["groups"], options["items"], options["item_types"], batch_size
+            )
+            orders = seed_orders(
+                options["orders"],
+                users,
+                menu_items,
+                options["cart_items_per_order"],
+                batch_size,
+            )
+            reviews = seed_reviews(options["reviews"], users, menu_items, batch_size)
+            rebuild_user_order_stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Seeded {} users, {} menu items, {} orders and {} reviews.".format(
+                    len(users), len(menu_items), len(orders), len(reviews)
+                )
+            )
+        )
@@ -0,0 +1,112 @@
+# Generated by Django 3.1.4 on 2026-10-18 17:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("item", "0001_initial"),
+        ("cart", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserOrderStats",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total_orders", models.PositiveBigIntegerField(default=0)),
+                ("total_cart_items", models.PositiveBigIntegerField(default=0)),
+                ("total_transaction", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="order_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "User Order Stats",
+                "verbose_name_plural": "User Order Stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="UserLocationStats",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("location", models.CharField(max_length=512)),
+                ("count", models.PositiveBigIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="location_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "User Location Stats",
+                "verbose_name_plural": "User Location Stats",
+                "unique_together": {("user", "location")},
+            },
+        ),
+        migrations.CreateModel(
+            name="UserItemStats",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveBigIntegerField(default=0)),
+                (
+                    "menu_item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="user_stats",
+                        to="item.menuitem",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="item_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "User Item Stats",
+                "verbose_name_plural": "User Item Stats",
+                "unique_together": {("user", "menu_item")},
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.1.4 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cart", "0002_user_order_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cartitem",
+            index=models.Index(fields=["created_at"], name="cart_item_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(done_from_customer=False),
+                fields=["custom_contact", "created_by"],
+                name="order_pending_contact_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(done_from_customer=False),
+                fields=["created_by", "-created_at"],
+                name="order_pending_user_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["created_by", "is_delivered"], name="order_user_delivered_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["-created_at", "-id"], name="order_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="orderkot",
+            index=models.Index(
+                fields=["-timestamp", "-id"], name="order_kot_timestamp_idx"
+            ),
+        ),
+    ]
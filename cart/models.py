@@ -1,11 +1,48 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 from phonenumber_field.modelfields import PhoneNumberField
 
+from cart.cache import invalidate_sales_report
 from item.models import MenuItem
 
 PAYMENT_CHOICES = [("Cash", "Cash")]
 
+# user relations rendered as primary key lists by nested user serializers
+USER_RELATED_LOOKUPS = ["groups", "user_permissions"]
+
+
+def get_user_lookups(*user_fields):
+    return [
+        "{}__{}".format(user_field, related)
+        for user_field in user_fields
+        for related in USER_RELATED_LOOKUPS
+    ]
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_cart_items(self):
+        """
+        Loads every relation rendered by OrderWithCartListSerializer
+        (cart items at depth 2) with a fixed number of queries
+        """
+        cart_items = CartItem.objects.select_related(
+            "item__menu_item_group",
+            "item__created_by",
+            "item__updated_by",
+            "created_by",
+        )
+        return self.select_related("created_by", "updated_by").prefetch_related(
+            *get_user_lookups("created_by", "updated_by"),
+            models.Prefetch("cart_items", queryset=cart_items),
+            "cart_items__item__item_type",
+            *get_user_lookups(
+                "cart_items__item__created_by", "cart_items__item__updated_by"
+            ),
+            "cart_items__created_by__groups__permissions",
+            "cart_items__created_by__user_permissions",
+        )
+
 
 class Order(models.Model):
     custom_location = models.CharField(max_length=512, null=True, blank=True)
@@ -44,11 +81,30 @@ class Order(models.Model):
         blank=True,
     )
 
+    objects = OrderQuerySet.as_manager()
+
     def __str__(self):
         return "Order #{} -- {}".format(self.pk, self.created_by)
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            # ongoing order lookups, only a small share of orders are pending
+            models.Index(
+                fields=["custom_contact", "created_by"],
+                condition=models.Q(done_from_customer=False),
+                name="order_pending_contact_idx",
+            ),
+            models.Index(
+                fields=["created_by", "-created_at"],
+                condition=models.Q(done_from_customer=False),
+                name="order_pending_user_idx",
+            ),
+            models.Index(
+                fields=["created_by", "is_delivered"], name="order_user_delivered_idx"
+            ),
+            models.Index(fields=["-created_at", "-id"], name="order_created_idx"),
+        ]
 
 
 class CartItem(models.Model):
@@ -82,6 +138,7 @@ class CartItem(models.Model):
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [models.Index(fields=["created_at"], name="cart_item_created_idx")]
 
 
 class MonthlySalesReport(models.Model):
@@ -111,3 +168,60 @@ class OrderKOT(models.Model):
         verbose_name = "Order KOT"
         verbose_name_plural = "Order KOTs"
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["-timestamp", "-id"], name="order_kot_timestamp_idx")
+        ]
+
+
+class UserOrderStats(models.Model):
+    """
+    Denormalized order totals of a customer
+    Maintained by cart.stats from the order lifecycle
+    """
+
+    user = models.OneToOneField(
+        get_user_model(), on_delete=models.CASCADE, related_name="order_stats"
+    )
+    total_orders = models.PositiveBigIntegerField(default=0)
+    total_cart_items = models.PositiveBigIntegerField(default=0)
+    total_transaction = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, editable=False)
+
+    class Meta:
+        verbose_name = "User Order Stats"
+        verbose_name_plural = "User Order Stats"
+
+    def __str__(self):
+        return "{} Order Stats".format(self.user.username)
+
+
+class UserItemStats(models.Model):
+    user = models.ForeignKey(
+        get_user_model(), on_delete=models.CASCADE, related_name="item_stats"
+    )
+    menu_item = models.ForeignKey(
+        MenuItem, on_delete=models.CASCADE, related_name="user_stats"
+    )
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = [["user", "menu_item"]]
+        verbose_name = "User Item Stats"
+        verbose_name_plural = "User Item Stats"
+
+
+class UserLocationStats(models.Model):
+    user = models.ForeignKey(
+        get_user_model(), on_delete=models.CASCADE, related_name="location_stats"
+    )
+    location = models.CharField(max_length=512)
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = [["user", "location"]]
+        verbose_name = "User Location Stats"
+        verbose_name_plural = "User Location Stats"
+
+
+post_save.connect(invalidate_sales_report, sender=CartItem)
+post_delete.connect(invalidate_sales_report, sender=CartItem)
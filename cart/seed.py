@@ -0,0 +1,235 @@
+import random
+
+from django.contrib.auth import get_user_model
+
+from accounts.models import Profile
+from cart.models import CartItem, Order, OrderKOT
+from item.cache import invalidate_catalog
+from item.models import ItemType, MenuItem, TopAndRecommendedItem
+from item_group.models import MenuItemGroup
+from log.models import Log
+from reviews.models import Review
+from transaction.models import Transaction
+
+SEED_PREFIX = "seed"
+SEED_IMAGE = "seed.png"
+
+
+def get_seed_contact(number):
+    return "+97798{:08d}".format(number)
+
+
+def bulk_create_in_batches(model, objects, batch_size):
+    """:returns created objects, primary keys are reloaded on sqlite"""
+    last_pk = model.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    created = model.objects.bulk_create(objects, batch_size=batch_size)
+    if created and created[0].pk is None:
+        pks = model.objects.filter(pk__gt=last_pk).order_by("pk")
+        for obj, pk in zip(created, pks.values_list("pk", flat=True)):
+            obj.pk = pk
+    return created
+
+
+def seed_users(users_count, batch_size=5000):
+    """
+    Bulk inserts synthetic customers with their profiles
+    Numbering continues after existing users, so seeding can be repeated
+    :returns created users
+    """
+    user_model = get_user_model()
+    first_number = user_model.objects.count()
+    users = bulk_create_in_batches(
+        user_model,
+        [
+            user_model(username="{}-{}".format(SEED_PREFIX, first_number + index))
+            for index in range(users_count)
+        ],
+        batch_size,
+    )
+    # bulk inserts skip the signal creating profiles
+    profiles = []
+    for index, user in enumerate(users):
+        user.profile = Profile(
+            full_name="Seed Customer {}".format(first_number + index),
+            contact=get_seed_contact(first_number + index),
+            address="Location {}".format(index % 500),
+        )
+        profiles.append(user.profile)
+    Profile.objects.bulk_create(profiles, batch_size=batch_size)
+    return users
+
+
+def seed_menu(groups_count, items_count, item_types_count, batch_size=5000):
+    """
+    Bulk inserts menu item groups, item types and menu items spread over them
+    :returns created menu items
+    """
+    randomizer = random.Random(items_count)
+    first_number = MenuItem.objects.count()
+    groups = bulk_create_in_batches(
+        MenuItemGroup,
+        [
+            MenuItemGroup(
+                name="{} group {}".format(SEED_PREFIX, first_number + index),
+                image=SEED_IMAGE,
+            )
+            for index in range(max(groups_count, 1))
+        ],
+        batch_size,
+    )
+    item_types = bulk_create_in_batches(
+        ItemType,
+        [
+            ItemType(
+                name="{} type {}".format(SEED_PREFIX, first_number + index),
+                badge=SEED_IMAGE,
+            )
+            for index in range(item_types_count)
+        ],
+        batch_size,
+    )
+    menu_items = bulk_create_in_batches(
+        MenuItem,
+        [
+            MenuItem(
+                name="{} item {}".format(SEED_PREFIX, first_number + index),
+                price=randomizer.randint(100, 1000),
+                menu_item_group=randomizer.choice(groups),
+                image=SEED_IMAGE,
+                is_veg=randomizer.random() > 0.5,
+            )
+            for index in range(items_count)
+        ],
+        batch_size,
+    )
+    if item_types:
+        MenuItem.item_type.through.objects.bulk_create(
+            [
+                MenuItem.item_type.through(menuitem=menu_item, itemtype=item_type)
+                for menu_item in menu_items
+                for item_type in randomizer.sample(item_types, min(2, len(item_types)))
+            ],
+            batch_size=batch_size,
+        )
+    # bulk inserts skip the signal creating special flags
+    TopAndRecommendedItem.objects.bulk_create(
+        [
+            TopAndRecommendedItem(
+                menu_item=menu_item,
+                top=randomizer.random() > 0.9,
+                recommended=randomizer.random() > 0.9,
+            )
+            for menu_item in menu_items
+        ],
+        batch_size=batch_size,
+    )
+    invalidate_catalog()
+    return menu_items
+
+
+def seed_orders(
+    orders_count, users, menu_items, cart_items_per_order=3, batch_size=5000
+):
+    """
+    Bulk inserts order history of the users
+    Every cart item gets a KOT and every order a log row, delivered orders
+    a transaction too. About one order in fifty is still pending
+    :returns created orders
+    """
+    randomizer = random.Random(orders_count)
+    orders = []
+    for _ in range(orders_count):
+        user = randomizer.choice(users)
+        is_done = randomizer.random() > 0.02
+        orders.append(
+            Order(
+                created_by=user,
+                custom_contact=user.profile.contact,
+                custom_location=user.profile.address,
+                done_from_customer=is_done,
+                delivery_started=is_done,
+                is_delivered=is_done and randomizer.random() > 0.1,
+            )
+        )
+    orders = bulk_create_in_batches(Order, orders, batch_size)
+
+    cart_items = []
+    for order in orders:
+        for menu_item in randomizer.sample(
+            menu_items, min(cart_items_per_order, len(menu_items))
+        ):
+            cart_items.append(
+                CartItem(
+                    order=order,
+                    item=menu_item,
+                    quantity=randomizer.randint(1, 5),
+                    created_by=order.created_by,
+                )
+            )
+    cart_items = bulk_create_in_batches(CartItem, cart_items, batch_size)
+
+    order_totals = {}
+    for cart_item in cart_items:
+        total = order_totals.setdefault(cart_item.order_id, [0, 0])
+        total[0] += cart_item.quantity
+        total[1] += cart_item.quantity * cart_item.item.price
+    for order in orders:
+        order.total_items, order.total_price = order_totals.get(order.pk, (0, 0))
+        order.grand_total = order.total_price
+    Order.objects.bulk_update(
+        orders, ["total_items", "total_price", "grand_total"], batch_size=batch_size
+    )
+
+    OrderKOT.objects.bulk_create(
+        [
+            OrderKOT(
+                order_id=cart_item.order_id,
+                cart_item=cart_item,
+                quantity_diff=cart_item.quantity,
+                batch=1,
+            )
+            for cart_item in cart_items
+            if cart_item.order.done_from_customer
+        ],
+        batch_size=batch_size,
+    )
+    Log.objects.bulk_create(
+        [
+            Log(
+                mode="done",
+                actor=order.created_by,
+                detail="Order #{} marked done by customer".format(order.pk),
+            )
+            for order in orders
+            if order.done_from_customer
+        ],
+        batch_size=batch_size,
+    )
+    Transaction.objects.bulk_create(
+        [
+            Transaction(
+                order=order, grand_total=order.grand_total, created_by=order.created_by
+            )
+            for order in orders
+            if order.is_delivered
+        ],
+        batch_size=batch_size,
+    )
+    return orders
+
+
+def seed_reviews(reviews_count, users, menu_items, batch_size=5000):
+    """:returns created reviews of menu items by the users"""
+    randomizer = random.Random(reviews_count)
+    reviews = []
+    for _ in range(reviews_count):
+        user = randomizer.choice(users)
+        reviews.append(
+            Review(
+                review="Seed review of a regular customer.",
+                menu_item=randomizer.choice(menu_items),
+                reviewer=user,
+                reviewer_contact=user.profile.contact,
+            )
+        )
+    return Review.objects.bulk_create(reviews, batch_size=batch_size)
@@ -1,18 +1,16 @@
-import decimal
-
 from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
-from cart.models import CartItem
-from utils.helper import get_delivery_charge, get_loyalty_discount
+from cart.cache import invalidate_sales_report
+from cart.models import CartItem, Order
+from cart.totals import update_order_totals
+from item.models import MenuItem
 
 
 class CartItemSerializer(serializers.ModelSerializer):
-    created_at = serializers.SerializerMethodField()
-
-    @staticmethod
-    def get_created_at(obj):
-        return obj.created_at.strftime("%b %d, %Y %H:%M")
+    created_at = serializers.DateTimeField(format="%b %d, %Y %H:%M", read_only=True)
 
     class Meta:
         model = CartItem
@@ -38,50 +36,125 @@ class CartItemPOSTSerializer(serializers.ModelSerializer):
         else:
             validated_data["created_by"] = creator
 
-        item_base_order = validated_data["order"]
-        cart_item = validated_data["item"]
-        item_base_order.total_items += int(validated_data["quantity"])
-        item_base_order.total_price += cart_item.price * int(validated_data["quantity"])
-
-        item_base_order.delivery_charge = get_delivery_charge()
-
-        item_base_order.loyalty_discount = get_loyalty_discount(
-            item_base_order.total_price
-        )
-
-        item_base_order.grand_total = (
-            item_base_order.total_price
-            + item_base_order.delivery_charge
-            - decimal.Decimal(item_base_order.loyalty_discount / 100)
-            * item_base_order.total_price
-        )
-
-        item_base_order.save()
-
-        return CartItem.objects.create(**validated_data)
+        with transaction.atomic():
+            cart_item = CartItem.objects.create(**validated_data)
+            update_order_totals(cart_item.order_id)
+        return cart_item
 
     def update(self, instance, validated_data):
-        if instance.quantity != validated_data["quantity"]:
-            instance.order.total_items -= instance.quantity
-            instance.order.total_items += validated_data["quantity"]
-
-            instance.order.total_price -= instance.quantity * instance.item.price
-            instance.order.total_price += instance.item.price * int(
-                validated_data["quantity"]
+        with transaction.atomic():
+            cart_item = super().update(instance, validated_data)
+            update_order_totals(cart_item.order_id)
+        return cart_item
+
+
+class CartOperationSerializer(serializers.Serializer):
+    ADD = "add"
+    UPDATE = "update"
+    REMOVE = "remove"
+
+    op = serializers.ChoiceField(choices=[ADD, UPDATE, REMOVE])
+    item = serializers.PrimaryKeyRelatedField(
+        queryset=MenuItem.objects.all(), required=False
+    )
+    cart_item = serializers.IntegerField(required=False)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+    def validate(self, attrs):
+        if attrs["op"] == self.ADD and "item" not in attrs:
+            raise serializers.ValidationError({"item": "Required to add an item."})
+        if attrs["op"] != self.ADD and "cart_item" not in attrs:
+            raise serializers.ValidationError(
+                {"cart_item": "Required to {} a cart item.".format(attrs["op"])}
             )
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """
+    Applies a whole cart diff of an order in one transaction
+    Expects order in context
+    """
+
+    operations = CartOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, operations):
+        order = self.context["order"]
+        cart_items = {
+            cart_item.pk: cart_item
+            for cart_item in CartItem.objects.filter(order=order)
+        }
+        items_in_cart = {cart_item.item_id for cart_item in cart_items.values()}
+        added_items = set()
+        touched_cart_items = set()
+        errors = []
+        for operation in operations:
+            error = {}
+            if operation["op"] == CartOperationSerializer.ADD:
+                item_id = operation["item"].pk
+                if item_id in items_in_cart or item_id in added_items:
+                    error["item"] = "Item is already in the cart."
+                added_items.add(item_id)
+            else:
+                cart_item_id = operation["cart_item"]
+                if cart_item_id not in cart_items:
+                    error["cart_item"] = "Cart item not found in order."
+                elif cart_item_id in touched_cart_items:
+                    error["cart_item"] = "Cart item is changed more than once."
+                else:
+                    operation["cart_item"] = cart_items[cart_item_id]
+                touched_cart_items.add(cart_item_id)
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return operations
 
-            instance.order.delivery_charge = get_delivery_charge()
-
-            instance.order.loyalty_discount = get_loyalty_discount(
-                instance.order.total_price
-            )
-
-            instance.order.grand_total = (
-                instance.order.total_price
-                + instance.order.delivery_charge
-                - decimal.Decimal(instance.order.loyalty_discount / 100)
-                * instance.order.total_price
-            )
-
-            instance.order.save()
-        return super().update(instance, validated_data)
+    def create(self, validated_data):
+        order = self.context["order"]
+        creator = self.context["request"].user
+        if isinstance(creator, AnonymousUser):
+            creator = None
+
+        now = timezone.datetime.now()
+        with transaction.atomic():
+            # concurrent batches of the order wait here, validation ran unlocked
+            Order.objects.select_for_update().only("id").get(pk=order.pk)
+            cart_items = {
+                cart_item.item_id: cart_item
+                for cart_item in CartItem.objects.filter(order=order)
+            }
+            new_cart_items = []
+            changed_cart_items = []
+            removed_cart_items = []
+            for operation in validated_data["operations"]:
+                if operation["op"] == CartOperationSerializer.ADD:
+                    cart_item = cart_items.get(operation["item"].pk)
+                    if cart_item is not None:
+                        # added by a concurrent batch since validation
+                        cart_item.quantity += operation["quantity"]
+                        cart_item.updated_at = now
+                        changed_cart_items.append(cart_item)
+                        continue
+                    new_cart_items.append(
+                        CartItem(
+                            order=order,
+                            item=operation["item"],
+                            quantity=operation["quantity"],
+                            created_by=creator,
+                        )
+                    )
+                elif operation["op"] == CartOperationSerializer.UPDATE:
+                    cart_item = operation["cart_item"]
+                    cart_item.quantity = operation["quantity"]
+                    cart_item.updated_at = now
+                    changed_cart_items.append(cart_item)
+                else:
+                    removed_cart_items.append(operation["cart_item"].pk)
+
+            CartItem.objects.filter(pk__in=removed_cart_items).delete()
+            CartItem.objects.bulk_update(changed_cart_items, ["quantity", "updated_at"])
+            CartItem.objects.bulk_create(new_cart_items)
+            order = update_order_totals(order.pk)
+        # bulk writes skip the model signals
+        invalidate_sales_report()
+        return order
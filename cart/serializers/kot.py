@@ -1,19 +1,17 @@
 from rest_framework import serializers
 
 from cart.models import OrderKOT
+from utils.serializers import FastListSerializer
 
 
 class KOTSerializer(serializers.ModelSerializer):
-    timestamp = serializers.SerializerMethodField()
-
-    @staticmethod
-    def get_timestamp(obj):
-        return obj.timestamp.strftime("%b %d, %Y %H:%M:%S")
+    timestamp = serializers.DateTimeField(format="%b %d, %Y %H:%M:%S", read_only=True)
 
     class Meta:
         model = OrderKOT
         fields = "__all__"
         depth = 2
+        list_serializer_class = FastListSerializer
 
 
 class KOTPOSTSerializer(serializers.ModelSerializer):
@@ -1,13 +1,16 @@
-import decimal
-
 from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
 
-from cart.models import CartItem, Order, OrderKOT
+from cart.models import Order, OrderKOT
 from cart.serializers.cart import CartItemSerializer
-from log.models import Log
+from cart.stats import record_order_delivered, record_order_done
+from cart.totals import update_order_totals
+from log.writer import write_log
 from transaction.models import Transaction
+from utils.metrics import increment
+from utils.serializers import FastListSerializer
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -77,109 +80,101 @@ class OrderPOSTSerializer(serializers.ModelSerializer):
         return Order.objects.create(**validated_data)
 
     def update(self, instance, validated_data):
-        is_delivery_started = validated_data.get(
-            "delivery_started", instance.delivery_started
-        )
-        is_delivered = validated_data.get("is_delivered", instance.is_delivered)
-        done_from_customer = validated_data.get(
-            "done_from_customer", instance.done_from_customer
-        )
-        delivery_charge = validated_data.get(
-            "delivery_charge", instance.delivery_charge
-        )
-        loyalty_discount = validated_data.get(
-            "loyalty_discount", instance.loyalty_discount
-        )
-
-        cart_items = CartItem.objects.filter(order=instance)
-        calc_total_quantity = 0
-        calc_total_price = 0
-        for item in cart_items:
-            calc_total_price += item.quantity * item.item.price
-            calc_total_quantity += item.quantity
-
-        instance.total_price = calc_total_price
-
-        # use delivery charge and loyalty discount from request data
-        instance.grand_total = (
-            calc_total_price
-            + int(delivery_charge)
-            - decimal.Decimal(loyalty_discount / 100) * calc_total_price
-        )
-
-        instance.save()
-
-        if done_from_customer:
-            validated_data["done_from_customer_at"] = timezone.datetime.now()
-            Log.objects.get_or_create(
-                mode="complete",
-                actor=self.context["request"].user,
-                detail="Order #{} from {} marked done by customer {}".format(
-                    instance.id, instance.custom_location, instance.custom_contact
-                ),
+        # one transaction holding the order lock of update_order_totals until the
+        # row is saved, status changes are checked against the locked row
+        with transaction.atomic():
+            Order.objects.select_for_update().only("id").get(pk=instance.pk)
+            instance.refresh_from_db(
+                fields=["delivery_started", "is_delivered", "done_from_customer"]
             )
-
-        if is_delivery_started:
-            validated_data["delivery_started_at"] = timezone.datetime.now()
-            Log.objects.get_or_create(
-                mode="start",
-                actor=self.context["request"].user,
-                detail="Delivery started for order #{} by {}".format(
-                    instance.id, self.context["request"].user.username
-                ),
+            is_delivery_started = validated_data.get(
+                "delivery_started", instance.delivery_started
+            )
+            is_delivered = validated_data.get("is_delivered", instance.is_delivered)
+            done_from_customer = validated_data.get(
+                "done_from_customer", instance.done_from_customer
             )
-        if is_delivered:
-            validated_data["delivered_at"] = timezone.datetime.now()
-            Log.objects.get_or_create(
-                mode="complete",
-                actor=self.context["request"].user,
-                detail="Delivery completed for order #{} by {}".format(
-                    instance.id, self.context["request"].user.username
-                ),
+            delivery_charge = validated_data.get(
+                "delivery_charge", instance.delivery_charge
             )
-            Transaction.objects.create(
-                order=instance,
-                grand_total=instance.grand_total,
-                created_by=self.context["request"].user,
+            loyalty_discount = validated_data.get(
+                "loyalty_discount", instance.loyalty_discount
+            )
+            is_marked_done = done_from_customer and not instance.done_from_customer
+            is_marked_delivery_started = (
+                is_delivery_started and not instance.delivery_started
+            )
+            is_marked_delivered = is_delivered and not instance.is_delivered
+
+            # use delivery charge and loyalty discount from request data
+            totals = update_order_totals(
+                instance.pk,
+                delivery_charge=int(delivery_charge),
+                loyalty_discount=loyalty_discount,
             )
-        return super().update(instance, validated_data)
+            instance.total_items = totals.total_items
+            instance.total_price = totals.total_price
+            instance.grand_total = totals.grand_total
+
+            if done_from_customer:
+                validated_data["done_from_customer_at"] = timezone.datetime.now()
+            if is_marked_done:
+                write_log(
+                    mode="complete",
+                    actor=self.context["request"].user,
+                    detail="Order #{} from {} marked done by customer {}".format(
+                        instance.id, instance.custom_location, instance.custom_contact
+                    ),
+                )
+
+            if is_delivery_started:
+                validated_data["delivery_started_at"] = timezone.datetime.now()
+            if is_marked_delivery_started:
+                write_log(
+                    mode="start",
+                    actor=self.context["request"].user,
+                    detail="Delivery started for order #{} by {}".format(
+                        instance.id, self.context["request"].user.username
+                    ),
+                )
+            if is_delivered:
+                validated_data["delivered_at"] = timezone.datetime.now()
+            if is_marked_delivered:
+                write_log(
+                    mode="complete",
+                    actor=self.context["request"].user,
+                    detail="Delivery completed for order #{} by {}".format(
+                        instance.id, self.context["request"].user.username
+                    ),
+                )
+                Transaction.objects.create(
+                    order=instance,
+                    grand_total=instance.grand_total,
+                    created_by=self.context["request"].user,
+                )
+            order = super().update(instance, validated_data)
+
+            if is_marked_done:
+                record_order_done(order)
+            if is_marked_delivery_started:
+                increment("deliveries_started_total")
+            if is_marked_delivered:
+                record_order_delivered(order)
+                increment("deliveries_completed_total")
+            return order
 
 
 class OrderWithCartListSerializer(serializers.ModelSerializer):
     cart_items = CartItemSerializer(many=True, read_only=True)
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
-    delivery_started_at = serializers.SerializerMethodField()
-    delivered_at = serializers.SerializerMethodField()
-    done_from_customer_at = serializers.SerializerMethodField()
-
-    @staticmethod
-    def get_created_at(obj):
-        return obj.created_at.strftime("%Y/%m/%d %H:%M:%S")
-
-    @staticmethod
-    def get_delivery_started_at(obj):
-        if not obj.delivery_started_at:
-            return obj.delivery_started_at
-        return obj.delivery_started_at.strftime("%Y/%m/%d %H:%M:%S")
-
-    @staticmethod
-    def get_updated_at(obj):
-        if not obj.updated_at:
-            return obj.updated_at
-        return obj.updated_at.strftime("%Y/%m/%d %H:%M:%S")
-
-    @staticmethod
-    def get_delivered_at(obj):
-        if not obj.delivered_at:
-            return obj.delivered_at
-        return obj.delivered_at.strftime("%Y/%m/%d %H:%M:%S")
-
-    @staticmethod
-    def get_done_from_customer_at(obj):
-        if not obj.done_from_customer_at:
-            return obj.done_from_customer_at
-        return obj.done_from_customer_at.strftime("%Y/%m/%d %H:%M:%S")
+    created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M:%S", read_only=True)
+    updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M:%S", read_only=True)
+    delivery_started_at = serializers.DateTimeField(
+        format="%Y/%m/%d %H:%M:%S", read_only=True
+    )
+    delivered_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M:%S", read_only=True)
+    done_from_customer_at = serializers.DateTimeField(
+        format="%Y/%m/%d %H:%M:%S", read_only=True
+    )
 
     class Meta:
         model = Order
@@ -207,3 +202,4 @@ class OrderWithCartListSerializer(serializers.ModelSerializer):
             "payment_type",
         ]
         depth = 1
+        list_serializer_class = FastListSerializer
@@ -0,0 +1,126 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from cart.models import (CartItem, Order, UserItemStats, UserLocationStats,
+                         UserOrderStats)
+
+
+def increment_counters(model, user_id, field, values, attempts=3):
+    """
+    Adds one to the counter of each value of field for the user
+    Counter rows are created on first increment, when a concurrent order
+    created one first the increment is retried against the existing row
+    """
+    values = set(values)
+    if not values:
+        return
+    lookup = {"user_id": user_id, "{}__in".format(field): values}
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                existing_values = set(
+                    model.objects.filter(**lookup).values_list(field, flat=True)
+                )
+                model.objects.filter(**lookup).update(count=F("count") + 1)
+                model.objects.bulk_create(
+                    [
+                        model(**{"user_id": user_id, field: value, "count": 1})
+                        for value in values - existing_values
+                    ]
+                )
+            return
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+
+
+def record_order_done(order):
+    """Counts a completed order and its cart items for the order owner"""
+    if order.created_by_id is None:
+        return
+    item_ids = list(
+        CartItem.objects.filter(order=order).values_list("item_id", flat=True)
+    )
+    with transaction.atomic():
+        UserOrderStats.objects.get_or_create(user_id=order.created_by_id)
+        UserOrderStats.objects.filter(user_id=order.created_by_id).update(
+            total_orders=F("total_orders") + 1,
+            total_cart_items=F("total_cart_items") + len(item_ids),
+        )
+        increment_counters(UserItemStats, order.created_by_id, "menu_item_id", item_ids)
+
+
+def record_order_delivered(order):
+    """Adds a delivered order to the owner's spend and visited locations"""
+    if order.created_by_id is None:
+        return
+    with transaction.atomic():
+        UserOrderStats.objects.get_or_create(user_id=order.created_by_id)
+        UserOrderStats.objects.filter(user_id=order.created_by_id).update(
+            total_transaction=F("total_transaction") + order.grand_total
+        )
+        if order.custom_location:
+            increment_counters(
+                UserLocationStats,
+                order.created_by_id,
+                "location",
+                [order.custom_location],
+            )
+
+
+def rebuild_user_order_stats():
+    """
+    Recomputes every user statistic from orders with grouped queries
+    :returns number of users with statistics
+    """
+    # ordering is cleared so that Meta.ordering does not leak into GROUP BY
+    done_orders = Order.objects.filter(
+        done_from_customer=True, created_by__isnull=False
+    ).order_by()
+    delivered_orders = done_orders.filter(is_delivered=True)
+    done_cart_items = CartItem.objects.filter(order__in=done_orders).order_by()
+
+    order_stats = {}
+
+    def get_stats(user_id):
+        if user_id not in order_stats:
+            order_stats[user_id] = UserOrderStats(user_id=user_id)
+        return order_stats[user_id]
+
+    for row in done_orders.values("created_by").annotate(count=Count("id")):
+        get_stats(row["created_by"]).total_orders = row["count"]
+    for row in done_cart_items.values("order__created_by").annotate(count=Count("id")):
+        get_stats(row["order__created_by"]).total_cart_items = row["count"]
+    for row in delivered_orders.values("created_by").annotate(total=Sum("grand_total")):
+        get_stats(row["created_by"]).total_transaction = row["total"]
+
+    item_stats = [
+        UserItemStats(
+            user_id=row["order__created_by"],
+            menu_item_id=row["item"],
+            count=row["count"],
+        )
+        for row in done_cart_items.values("order__created_by", "item").annotate(
+            count=Count("id")
+        )
+    ]
+    location_stats = [
+        UserLocationStats(
+            user_id=row["created_by"],
+            location=row["custom_location"],
+            count=row["count"],
+        )
+        for row in delivered_orders.exclude(custom_location__isnull=True)
+        .exclude(custom_location="")
+        .values("created_by", "custom_location")
+        .annotate(count=Count("id"))
+    ]
+
+    with transaction.atomic():
+        UserOrderStats.objects.all().delete()
+        UserItemStats.objects.all().delete()
+        UserLocationStats.objects.all().delete()
+        UserOrderStats.objects.bulk_create(order_stats.values(), batch_size=1000)
+        UserItemStats.objects.bulk_create(item_stats, batch_size=1000)
+        UserLocationStats.objects.bulk_create(location_stats, batch_size=1000)
+    return len(order_stats)
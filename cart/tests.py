@@ -1,3 +1,495 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, Group, Permission
+from django.db import IntegrityError, OperationalError, connection
+from django.test import (RequestFactory, TestCase, TransactionTestCase,
+                         override_settings)
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from backend.settings import SALES_REPORT_CACHE_TIMEOUT
+from cart.kot_stream import kot_stream_limiter, publish_kot_batch
+from cart.models import (CartItem, Order, OrderKOT, UserItemStats,
+                         UserOrderStats)
+from cart.serializers.cart import CartBatchSerializer, CartItemPOSTSerializer
+from cart.serializers.kot import KOTSerializer
+from cart.serializers.order import OrderWithCartListSerializer
+from cart.stats import increment_counters
+from item.models import ItemType, MenuItem
+from item.serializers import MenuItemSerializer
+from item.tests import LOCMEM_CACHES
+from item_group.models import MenuItemGroup
+from log.models import Log
+from log.serializers import LogSerializer
+from transaction.models import Transaction
+
+
+class CartTestMixin:
+    @classmethod
+    def create_menu_item(cls, name, price=100, **kwargs):
+        group, _ = MenuItemGroup.objects.get_or_create(
+            name="Group", defaults={"image": "group.png"}
+        )
+        return MenuItem.objects.create(
+            name=name, price=price, menu_item_group=group, image="item.png", **kwargs
+        )
+
+    def authenticate(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.defaults["HTTP_AUTHORIZATION"] = "Token {}".format(token.key)
+
+
+class OrderListQueryCountTest(CartTestMixin, TestCase):
+    # token lookup, orders with users, 4 user relations, cart items,
+    # item types, 4 item user relations, cart item user groups
+    # with their permissions and cart item user permissions
+    ORDERS_LIST_QUERIES = 15
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create(username="admin", is_staff=True)
+        cls.customer = get_user_model().objects.create(username="customer")
+        group = Group.objects.create(name="Customers")
+        group.permissions.add(Permission.objects.first())
+        cls.customer.groups.add(group)
+        cls.item_type = ItemType.objects.create(name="Spicy", badge="badge.png")
+
+    def create_orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(
+                created_by=self.customer, updated_by=self.admin
+            )
+            for _ in range(3):
+                menu_item = self.create_menu_item(
+                    "Item {}".format(MenuItem.objects.count()),
+                    created_by=self.admin,
+                    updated_by=self.admin,
+                )
+                menu_item.item_type.add(self.item_type)
+                CartItem.objects.create(
+                    order=order, item=menu_item, created_by=self.customer
+                )
+
+    def test_orders_list_query_count_does_not_grow_with_orders(self):
+        self.authenticate(self.admin)
+        self.create_orders(1)
+        with self.assertNumQueries(self.ORDERS_LIST_QUERIES):
+            self.client.get("/api/orders")
+
+        self.create_orders(10)
+        with self.assertNumQueries(self.ORDERS_LIST_QUERIES):
+            response = self.client.get("/api/orders")
+        self.assertEqual(len(response.json()["results"]), 11)
+
+    def test_user_orders_query_count_does_not_grow_with_orders(self):
+        self.authenticate(self.admin)
+        self.create_orders(1)
+        with self.assertNumQueries(self.ORDERS_LIST_QUERIES + 1):
+            self.client.get("/api/user/{}/orders".format(self.customer.pk))
+
+        self.create_orders(10)
+        with self.assertNumQueries(self.ORDERS_LIST_QUERIES + 1):
+            self.client.get("/api/user/{}/orders".format(self.customer.pk))
+
+
+class FastListSerializerTest(CartTestMixin, TestCase):
+    def setUp(self):
+        admin = get_user_model().objects.create(username="admin", is_staff=True)
+        customer = get_user_model().objects.create(username="customer")
+        group = Group.objects.create(name="Customers")
+        group.permissions.add(Permission.objects.first())
+        customer.groups.add(group)
+        item_type = ItemType.objects.create(name="Spicy", badge="badge.png")
+        momo = self.create_menu_item("Momo", created_by=admin, updated_by=admin)
+        momo.item_type.add(item_type)
+        self.create_menu_item("Chowmein", is_veg=True, description="Veg")
+        for is_delivered in [True, False]:
+            order = Order.objects.create(
+                created_by=customer,
+                updated_by=admin if is_delivered else None,
+                custom_contact="+9779812345678",
+                is_delivered=is_delivered,
+                delivered_at=timezone.datetime(2021, 2, 3, 4, 5, 6)
+                if is_delivered
+                else None,
+            )
+            cart_item = CartItem.objects.create(
+                order=order, item=momo, quantity=2, created_by=customer
+            )
+            OrderKOT.objects.create(
+                order=order, cart_item=cart_item, quantity_diff=2, batch=1
+            )
+            Log.objects.create(mode="done", actor=customer, detail="Done")
+        Log.objects.create(mode="create", actor=None, detail="System")
+        self.context = {"request": RequestFactory().get("/")}
+
+    def assertRendersLikeDrf(self, serializer_class, queryset):
+        rows = list(queryset)
+        drf = serializers.ListSerializer(
+            rows, child=serializer_class(), context=self.context
+        ).data
+        fast = serializer_class(rows, many=True, context=self.context).data
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(drf))
+
+    def test_list_serializers_render_same_bytes_as_drf(self):
+        self.assertRendersLikeDrf(MenuItemSerializer, MenuItem.objects.all())
+        self.assertRendersLikeDrf(
+            OrderWithCartListSerializer, Order.objects.with_cart_items()
+        )
+        self.assertRendersLikeDrf(KOTSerializer, OrderKOT.objects.all())
+        self.assertRendersLikeDrf(LogSerializer, Log.objects.all())
+
+    def test_dates_keep_their_formats(self):
+        data = OrderWithCartListSerializer(
+            Order.objects.order_by("id"), many=True, context=self.context
+        ).data
+        self.assertEqual(data[0]["delivered_at"], "2021/02/03 04:05:06")
+        self.assertIsNone(data[1]["delivered_at"])
+        kot = KOTSerializer(OrderKOT.objects.all(), many=True).data[0]
+        self.assertEqual(
+            kot["timestamp"],
+            OrderKOT.objects.first().timestamp.strftime("%b %d, %Y %H:%M:%S"),
+        )
+
+
+class KotBatchTest(CartTestMixin, TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="kitchen")
+        self.authenticate(self.user)
+        self.order = Order.objects.create(created_by=self.user)
+        self.momo = CartItem.objects.create(
+            order=self.order, item=self.create_menu_item("Momo"), quantity=2
+        )
+
+    def generate_post_kot(self):
+        return self.client.post("/api/generate-post-kot/{}".format(self.order.pk))
+
+    def test_first_batch_holds_full_cart(self):
+        response = self.client.post("/api/init-fist-batch/{}".format(self.order.pk))
+        self.assertEqual(response.status_code, 201)
+        kot = OrderKOT.objects.get(order=self.order)
+        self.assertEqual((kot.batch, kot.quantity_diff), (1, 2))
+
+        response = self.client.post("/api/init-fist-batch/{}".format(self.order.pk))
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_kot_holds_only_outstanding_quantities(self):
+        self.generate_post_kot()
+        self.momo.quantity = 5
+        self.momo.save()
+        CartItem.objects.create(
+            order=self.order, item=self.create_menu_item("Chowmein"), quantity=1
+        )
+
+        response = self.generate_post_kot()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["batch"], 2)
+        self.assertEqual(
+            sorted(
+                (item["item"], item["quantity_diff"])
+                for item in response.json()["items"]
+            ),
+            [("Chowmein", 1), ("Momo", 3)],
+        )
+        self.assertEqual(self.generate_post_kot().status_code, 204)
+
+
+class OrderStatsTest(CartTestMixin, TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="regular")
+        self.momo = self.create_menu_item("Momo")
+        self.order = Order.objects.create(created_by=self.user)
+        CartItem.objects.create(order=self.order, item=self.momo, quantity=2)
+
+    def test_order_done_twice_is_counted_once(self):
+        self.authenticate(self.user)
+        url = "/api/done-from-customer/{}".format(self.order.pk)
+        self.assertEqual(self.client.patch(url).status_code, 204)
+        self.assertEqual(self.client.patch(url).status_code, 400)
+        stats = UserOrderStats.objects.get(user=self.user)
+        self.assertEqual((stats.total_orders, stats.total_cart_items), (1, 1))
+        self.assertEqual(UserItemStats.objects.get(user=self.user).count, 1)
+
+    def test_delivery_is_recorded_once_with_current_totals(self):
+        self.authenticate(self.user)
+        url = "/api/order/{}/".format(self.order.pk)
+        for _ in range(2):
+            response = self.client.patch(
+                url, {"is_delivered": True}, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 200)
+        transaction = Transaction.objects.get(order=self.order)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price, 200)
+        self.assertEqual(transaction.grand_total, self.order.grand_total)
+
+    def test_counter_insert_conflict_is_retried(self):
+        bulk_create = UserItemStats.objects.bulk_create
+        calls = []
+
+        def conflict_once(rows):
+            calls.append(rows)
+            if len(calls) == 1:
+                # another order of the user created the counter meanwhile
+                raise IntegrityError("UNIQUE constraint failed")
+            return bulk_create(rows)
+
+        with mock.patch.object(
+            UserItemStats.objects, "bulk_create", side_effect=conflict_once
+        ):
+            increment_counters(
+                UserItemStats, self.user.id, "menu_item_id", [self.momo.id]
+            )
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(UserItemStats.objects.get(user=self.user).count, 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SalesReportCacheTest(CartTestMixin, TestCase):
+    def test_report_snapshots_expire(self):
+        admin = get_user_model().objects.create(username="admin", is_staff=True)
+        self.authenticate(admin)
+        with mock.patch("utils.cache.cache.set") as cache_set:
+            response = self.client.get("/api/sales-report")
+        self.assertEqual(response.status_code, 200)
+        key, content, timeout = cache_set.call_args[0]
+        self.assertTrue(key.startswith("sales-report:"))
+        self.assertEqual(timeout, SALES_REPORT_CACHE_TIMEOUT)
+
+
+class OrderTotalsConcurrencyTest(CartTestMixin, TransactionTestCase):
+    THREADS = 8
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="customer")
+        self.order = Order.objects.create(created_by=self.user)
+        self.menu_items = [
+            self.create_menu_item("Item {}".format(index), price=100 + index)
+            for index in range(self.THREADS)
+        ]
+
+    def add_to_cart(self, menu_item):
+        request = RequestFactory().post("/api/cart/")
+        request.user = self.user
+        try:
+            # in-memory sqlite test database fails lock waits right away
+            # instead of blocking, the failed save is rolled back entirely
+            for _ in range(100):
+                serializer = CartItemPOSTSerializer(
+                    data={"order": self.order.pk, "item": menu_item.pk, "quantity": 2},
+                    context={"request": request},
+                )
+                try:
+                    serializer.is_valid(raise_exception=True)
+                    serializer.save()
+                    return
+                except OperationalError:
+                    time.sleep(0.01)
+        finally:
+            connection.close()
+
+    def test_concurrent_cart_additions_keep_totals_consistent(self):
+        threads = [
+            threading.Thread(target=self.add_to_cart, args=(menu_item,))
+            for menu_item in self.menu_items
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.order.refresh_from_db()
+        self.assertEqual(
+            CartItem.objects.filter(order=self.order).count(), self.THREADS
+        )
+        self.assertEqual(self.order.total_items, 2 * self.THREADS)
+        self.assertEqual(
+            self.order.total_price, sum(2 * item.price for item in self.menu_items)
+        )
+
+
+class CartBatchConcurrencyTest(CartTestMixin, TransactionTestCase):
+    THREADS = 8
+
+    def setUp(self):
+        self.order = Order.objects.create()
+        self.pizza = self.create_menu_item("Pizza", price=500)
+
+    def add_pizza(self):
+        url = "/api/order/{}/cart/batch".format(self.order.pk)
+        operations = [{"op": "add", "item": self.pizza.pk, "quantity": 1}]
+        try:
+            # retried like add_to_cart, sqlite fails lock waits right away
+            for _ in range(100):
+                try:
+                    self.client_class().post(
+                        url, {"operations": operations}, content_type="application/json"
+                    )
+                except OperationalError:
+                    time.sleep(0.01)
+                    continue
+                return
+        finally:
+            connection.close()
+
+    def test_concurrent_batches_adding_an_item_share_one_cart_item(self):
+        # every batch is validated against the empty cart before any is saved
+        barrier = threading.Barrier(self.THREADS, timeout=5)
+        waited = threading.local()
+        create = CartBatchSerializer.create
+
+        def create_after_all_validated(serializer, validated_data):
+            if not getattr(waited, "done", False):
+                waited.done = True
+                barrier.wait()
+            return create(serializer, validated_data)
+
+        with mock.patch.object(
+            CartBatchSerializer, "create", create_after_all_validated
+        ):
+            threads = [
+                threading.Thread(target=self.add_pizza) for _ in range(self.THREADS)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # batches saved after another merged into its row instead of a duplicate
+        cart_item = CartItem.objects.get(order=self.order)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_items, cart_item.quantity)
+
+    def test_item_added_after_validation_is_merged(self):
+        request = RequestFactory().post("/api/cart/")
+        request.user = AnonymousUser()
+        serializer = CartBatchSerializer(
+            data={"operations": [{"op": "add", "item": self.pizza.pk, "quantity": 2}]},
+            context={"request": request, "order": self.order},
+        )
+        serializer.is_valid(raise_exception=True)
+        CartItem.objects.create(order=self.order, item=self.pizza, quantity=1)
+        serializer.save()
+
+        cart_item = CartItem.objects.get(order=self.order)
+        self.assertEqual(cart_item.quantity, 3)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_items, 3)
+
+
+class CartBatchTest(CartTestMixin, TestCase):
+    def setUp(self):
+        self.order = Order.objects.create()
+        self.momo = CartItem.objects.create(
+            order=self.order, item=self.create_menu_item("Momo", price=150)
+        )
+        self.chowmein = CartItem.objects.create(
+            order=self.order, item=self.create_menu_item("Chowmein", price=120)
+        )
+        self.pizza = self.create_menu_item("Pizza", price=500)
+
+    def post_batch(self, operations):
+        return self.client.post(
+            "/api/order/{}/cart/batch".format(self.order.pk),
+            {"operations": operations},
+            content_type="application/json",
+        )
+
+    def test_batch_applies_whole_cart_diff(self):
+        response = self.post_batch(
+            [
+                {"op": "add", "item": self.pizza.pk, "quantity": 2},
+                {"op": "update", "cart_item": self.momo.pk, "quantity": 3},
+                {"op": "remove", "cart_item": self.chowmein.pk},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(
+                (cart_item.item.name, cart_item.quantity)
+                for cart_item in self.order.cart_items.all()
+            ),
+            [("Momo", 3), ("Pizza", 2)],
+        )
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_items, 5)
+        self.assertEqual(self.order.total_price, 1450)
+        self.assertEqual(response.json()["results"]["total_price"], "1450.00")
+
+    def test_invalid_operation_rejects_whole_batch(self):
+        foreign_cart_item = CartItem.objects.create(
+            order=Order.objects.create(), item=self.pizza
+        )
+        response = self.post_batch(
+            [
+                {"op": "update", "cart_item": self.momo.pk, "quantity": 3},
+                {"op": "add", "item": self.momo.item_id},
+                {"op": "remove", "cart_item": foreign_cart_item.pk},
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["operations"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("item", errors[1])
+        self.assertIn("cart_item", errors[2])
+        self.momo.refresh_from_db()
+        self.assertEqual(self.momo.quantity, 1)
+
+
+class KotStreamTest(CartTestMixin, TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="kitchen")
+        redis_patch = mock.patch(
+            "cart.kot_stream.get_redis_connection",
+            return_value=fakeredis.FakeStrictRedis(),
+        )
+        redis_patch.start()
+        self.addCleanup(redis_patch.stop)
+
+    def open_stream(self, token):
+        return self.client.get(
+            "/api/kot-stream", {"token": token}, HTTP_ACCEPT="text/event-stream"
+        )
+
+    def get_stream_token(self):
+        self.authenticate(self.user)
+        token = self.client.post("/api/kot-stream-token").json()["token"]
+        del self.client.defaults["HTTP_AUTHORIZATION"]
+        return token
+
+    @mock.patch("cart.kot_stream.KOT_STREAM_HEARTBEAT", 0.01)
+    def test_event_source_subscribes_with_stream_token(self):
+        response = self.open_stream(self.get_stream_token())
+        self.assertEqual(response.status_code, 200)
+        events = iter(response.streaming_content)
+        self.assertEqual(next(events), b"retry: 3000\n\n")
+        publish_kot_batch({"order": 7, "batch": 2, "kots": []})
+        # skips keepalives sent while the subscription settles
+        event = next(event for event in events if not event.startswith(b":"))
+        self.assertIn("id: 7-2\nevent: kot\n", event.decode())
+        response.close()
+        self.assertEqual(kot_stream_limiter.active, 0)
+
+    def test_invalid_stream_token_is_rejected(self):
+        token = self.get_stream_token()
+        response = self.open_stream(token + "x")
+        self.assertIn(response.status_code, (401, 403))
+
+    @mock.patch.object(kot_stream_limiter, "limit", 1)
+    def test_concurrent_streams_are_capped(self):
+        token = self.get_stream_token()
+        first = self.open_stream(token)
+        self.assertEqual(first.status_code, 200)
+        second = self.open_stream(token)
+        self.assertEqual(second.status_code, 503)
+        self.assertEqual(second["Retry-After"], "3")
+        first.close()
+        third = self.open_stream(token)
+        self.assertEqual(third.status_code, 200)
+        third.close()
@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+
+from cart.models import CartItem, Order
+from utils.helper import (get_delivery_charge, get_grand_total,
+                          get_loyalty_discount)
+
+
+def update_order_totals(order_id, delivery_charge=None, loyalty_discount=None):
+    """
+    Recomputes order totals from its cart items with a single aggregate
+    Order row is locked until commit so concurrent cart edits can not
+    overwrite each other's totals. Run cart writes in the same transaction.
+    Delivery charge and loyalty discount are derived unless supplied.
+    :returns order with updated totals
+    """
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order_id)
+        totals = CartItem.objects.filter(order_id=order_id).aggregate(
+            total_items=Sum("quantity"),
+            total_price=Sum(
+                F("quantity") * F("item__price"),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+        order.total_items = totals["total_items"] or 0
+        order.total_price = totals["total_price"] or 0
+        order.delivery_charge = (
+            get_delivery_charge() if delivery_charge is None else delivery_charge
+        )
+        order.loyalty_discount = (
+            get_loyalty_discount(order.total_price)
+            if loyalty_discount is None
+            else loyalty_discount
+        )
+        order.grand_total = get_grand_total(
+            order.total_price, order.delivery_charge, order.loyalty_discount
+        )
+        order.save(
+            update_fields=[
+                "total_items",
+                "total_price",
+                "delivery_charge",
+                "loyalty_discount",
+                "grand_total",
+                "updated_at",
+            ]
+        )
+    return order
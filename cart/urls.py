@@ -1,9 +1,11 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from cart.views.cart import CartItemQuantityUpdateView, CartItemViewSet
+from cart.views.cart import (CartBatchView, CartItemQuantityUpdateView,
+                             CartItemViewSet)
 from cart.views.kot import (GeneratePostKotView, InitFirstBatchKot,
-                            KotListView, OrderKotViewSet)
+                            KotListView, KotStreamTokenView, KotStreamView,
+                            OrderKotViewSet)
 from cart.views.order import (DoneFromCustomerView, InitializeOrder,
                               OrderViewSet, OrderWithCartItemsList,
                               OrderWithCartListView, PartialUpdateOrderView,
@@ -24,6 +26,7 @@ urlpatterns += [
     path(
         "order/<int:pk>/cart", OrderWithCartListView.as_view(), name="initialize-order"
     ),
+    path("order/<int:pk>/cart/batch", CartBatchView.as_view(), name="cart-batch"),
     path(
         "update-order/<int:pk>", PartialUpdateOrderView.as_view(), name="update-order"
     ),
@@ -40,6 +43,8 @@ urlpatterns += [
         name="done-from-customer",
     ),
     path("kot", KotListView.as_view(), name="kot-filter"),
+    path("kot-stream", KotStreamView.as_view(), name="kot-stream"),
+    path("kot-stream-token", KotStreamTokenView.as_view(), name="kot-stream-token"),
     path(
         "init-fist-batch/<int:pk>",
         InitFirstBatchKot.as_view(),
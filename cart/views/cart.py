@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import status, viewsets
 from rest_framework.authentication import TokenAuthentication
@@ -5,8 +6,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from cart.models import CartItem, OrderKOT
-from cart.serializers.cart import CartItemPOSTSerializer, CartItemSerializer
+from cart.models import CartItem, Order, OrderKOT
+from cart.serializers.cart import (CartBatchSerializer, CartItemPOSTSerializer,
+                                   CartItemSerializer)
+from cart.serializers.order import OrderWithCartListSerializer
+from cart.totals import update_order_totals
 
 
 class CartItemViewSet(viewsets.ModelViewSet):
@@ -20,15 +24,9 @@ class CartItemViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         cart_item = self.get_object()
-        cart_item.order.total_items -= cart_item.quantity
-        cart_item.order.total_price -= cart_item.quantity * cart_item.item.price
-
-        if cart_item.order.total_items < 0:
-            cart_item.order.total_items = 0
-        if cart_item.order.total_price < 0:
-            cart_item.order.total_price = 0
-        cart_item.order.save()
-        cart_item.delete()
+        with transaction.atomic():
+            cart_item.delete()
+            update_order_totals(cart_item.order_id)
         return Response(
             {"message": "Cart order_location removed successfully."},
             status=status.HTTP_204_NO_CONTENT,
@@ -86,3 +84,28 @@ class CartItemQuantityUpdateView(APIView):
                 status=status.HTTP_200_OK,
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class CartBatchView(APIView):
+    def post(self, request, pk):
+        try:
+            order = Order.objects.get(pk=pk)
+        except Order.DoesNotExist:
+            return Response(
+                {"message": "Order not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+        serializer = CartBatchSerializer(
+            data=request.data, context={"request": request, "order": order}
+        )
+        if serializer.is_valid():
+            serializer.save()
+            order = Order.objects.with_cart_items().get(pk=pk)
+            return Response(
+                {
+                    "results": OrderWithCartListSerializer(
+                        instance=order, context={"request": request}
+                    ).data
+                },
+                status=status.HTTP_200_OK,
+            )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
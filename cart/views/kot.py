@@ -1,13 +1,22 @@
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.generics import ListAPIView, get_object_or_404
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from cart.models import CartItem, Order, OrderKOT
+from cart.kot import generate_kot_batch
+from cart.kot_stream import (LimitedStream, StreamTokenAuthentication,
+                             get_stream_token, kot_stream_limiter,
+                             stream_kot_batches)
+from cart.models import Order, OrderKOT
 from cart.serializers.kot import KOTPOSTSerializer, KOTSerializer
+from utils.pagination import TimestampCursorPagination
+from utils.renderers import EventStreamRenderer
 
 
 class OrderKotViewSet(viewsets.ModelViewSet):
@@ -27,24 +36,15 @@ class InitFirstBatchKot(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        order = get_object_or_404(Order, pk=pk)
-        order_kots = OrderKOT.objects.filter(order=order)
-        if len(order_kots) > 0:
-            return Response(
-                "Kot is already initialized.", status=status.HTTP_400_BAD_REQUEST
-            )
-        else:
-            cart_items = CartItem.objects.filter(order=order)
-            for cart_item in cart_items:
-                OrderKOT.objects.create(
-                    order=order,
-                    cart_item=cart_item,
-                    batch=1,
-                    quantity_diff=cart_item.quantity,
+        with transaction.atomic():
+            # lock of generate_kot_batch, a concurrent init waits and sees batch one
+            order = get_object_or_404(Order.objects.select_for_update(), pk=pk)
+            if OrderKOT.objects.filter(order=order).exists():
+                return Response(
+                    "Kot is already initialized.", status=status.HTTP_400_BAD_REQUEST
                 )
-            return Response(
-                "First batch kot initialized.", status=status.HTTP_201_CREATED
-            )
+            generate_kot_batch(order.pk)
+        return Response("First batch kot initialized.", status=status.HTTP_201_CREATED)
 
 
 class KotListView(ListAPIView):
@@ -52,6 +52,7 @@ class KotListView(ListAPIView):
     authentication_classes = [TokenAuthentication]
     serializer_class = KOTSerializer
     queryset = OrderKOT.objects.all()
+    pagination_class = TimestampCursorPagination
     filter_backends = [DjangoFilterBackend]
     filter_fields = ("batch", "order", "timestamp")
 
@@ -60,60 +61,54 @@ class GeneratePostKotView(APIView):
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
-    @staticmethod
-    def get_last_batch(kot_list):
-        last_batch = 1
-        for item_order_kot in kot_list:
-            if item_order_kot.batch > last_batch:
-                last_batch = item_order_kot.batch
-        return last_batch
-
     def post(self, request, pk):
         order = get_object_or_404(Order, pk=pk)
-        order_kots = OrderKOT.objects.filter(order=order).order_by("-timestamp")
-        cart_items = CartItem.objects.filter(order=order).order_by("-created_at")
-
-        temp_kot_items = {}
-        temp_cart_items = {}
-
-        for cart_item in cart_items:
-            temp_cart_items[cart_item.item.id] = cart_item.quantity
-
-        latest_batch = self.get_last_batch(order_kots)
-
-        for order_kot in order_kots:
-            try:
-                temp_kot_items[order_kot.cart_item.item.id] += order_kot.quantity_diff
-            except KeyError:
-                temp_kot_items[order_kot.cart_item.item.id] = order_kot.quantity_diff
-
-        print(temp_cart_items)
-        print(temp_kot_items)
-
-        for cart_item in cart_items:
-            try:
-                total_kot_items = temp_kot_items[cart_item.item.id]
-                diff = cart_item.quantity - total_kot_items
-                if diff == 0:
-                    # we have the kot and the diff is zero
-                    # take a chill pill and pass out from here
-                    pass
-                else:
-                    # cart item quantity must have been updated
-                    # new kot should be created with the diff
-                    OrderKOT.objects.create(
-                        order=order,
-                        cart_item=cart_item,
-                        quantity_diff=diff,
-                        batch=latest_batch + 1,
-                    )
-            except KeyError:
-                # kot not made yet for the item
-                # maybe newly added from admin
-                OrderKOT.objects.create(
-                    order=order,
-                    cart_item=cart_item,
-                    quantity_diff=cart_item.quantity,
-                    batch=latest_batch + 1,
-                )
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        kot_batch = generate_kot_batch(order.pk)
+        if kot_batch is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(kot_batch, status=status.HTTP_201_CREATED)
+
+
+class KotStreamTokenView(APIView):
+    """Stream token for EventSource clients, which can not send headers"""
+
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @staticmethod
+    def post(request):
+        return Response(
+            {"token": get_stream_token(request.user)}, status=status.HTTP_200_OK
+        )
+
+
+class KotStreamView(APIView):
+    """
+    Pushes newly generated KOT batches to kitchen displays as server sent events
+    Browsers connect with ?token= from kot-stream-token, others with the
+    Authorization header. Busy workers answer 503 with Retry-After
+    """
+
+    authentication_classes = [StreamTokenAuthentication, TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+
+    @staticmethod
+    def get(request):
+        if not kot_stream_limiter.acquire():
+            # plain response, event stream renderer does not render bodies
+            response = HttpResponse(
+                "Too many KOT streams, retry later.",
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content_type="text/plain",
+            )
+            response["Retry-After"] = 3
+            return response
+        response = StreamingHttpResponse(
+            LimitedStream(stream_kot_batches(), kot_stream_limiter),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # stop nginx from buffering the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
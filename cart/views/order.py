@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.authentication import TokenAuthentication
@@ -7,11 +8,16 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.models import Profile
-from cart.models import CartItem, Order, OrderKOT
+from cart.kot import generate_kot_batch
+from cart.models import Order
 from cart.serializers.order import (OrderCreateSerializer, OrderPOSTSerializer,
                                     OrderSerializer,
                                     OrderWithCartListSerializer)
-from log.models import Log
+from cart.stats import record_order_done
+from log.writer import write_log
+from notification.outbox import queue_order_confirmation
+from utils.metrics import increment
+from utils.pagination import CreatedAtCursorPagination
 
 
 class OrderWithCartItemsList(APIView):
@@ -19,11 +25,13 @@ class OrderWithCartItemsList(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        orders = Order.objects.all().order_by("-created_at")
+        orders = Order.objects.with_cart_items()
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(orders, request, view=self)
         serializer = OrderWithCartListSerializer(
-            instance=orders, many=True, read_only=True
+            instance=page, many=True, read_only=True
         )
-        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class PartialUpdateOrderView(APIView):
@@ -54,7 +62,7 @@ class OrderWithCartListView(APIView):
     @staticmethod
     def get(request, pk):
         try:
-            order = Order.objects.get(pk=pk)
+            order = Order.objects.with_cart_items().get(pk=pk)
             serializer = OrderWithCartListSerializer(
                 instance=order, context={"request": request}
             )
@@ -74,6 +82,7 @@ class InitializeOrder(APIView):
         if serializer.is_valid():
             order = serializer.save()
             order.save()
+            increment("orders_created_total")
             return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -97,6 +106,11 @@ class OrderViewSet(viewsets.ModelViewSet):
         "updated_at",
     ]
 
+    def get_queryset(self):
+        if self.action in ["list", "retrieve"]:
+            return self.queryset.with_cart_items()
+        return super(OrderViewSet, self).get_queryset()
+
     def get_serializer_class(self):
         if self.action in ["create", "partial_update", "update"]:
             return OrderPOSTSerializer
@@ -105,7 +119,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         order = self.get_object()
         order.delete()
-        Log.objects.create(
+        write_log(
             mode="delete",
             actor=request.user,
             detail="Deleted order #{} of user {}".format(
@@ -125,7 +139,7 @@ class UserOrders(APIView):
     def get(self, request, pk):
         try:
             user = get_user_model().objects.get(pk=pk)
-            orders = Order.objects.filter(created_by=user)
+            orders = Order.objects.with_cart_items().filter(created_by=user)
             serializer = OrderWithCartListSerializer(
                 instance=orders, read_only=True, many=True
             )
@@ -142,75 +156,73 @@ class DoneFromCustomerView(APIView):
 
     def patch(self, request, pk):
         try:
-            order = Order.objects.get(pk=pk)
-            if order.done_from_customer:
-                return Response(
-                    {"detail": "Order already set done."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            else:
-                if isinstance(request.user, get_user_model()):
-                    """
-                    If request user is already registered user
-                    then set order author as the request user
-                    """
-                    order.created_by = request.user
-                    order.save()
+            # locked so a concurrent request waits and then sees the order done
+            with transaction.atomic():
+                order = Order.objects.select_for_update().get(pk=pk)
+                if order.done_from_customer:
+                    return Response(
+                        {"detail": "Order already set done."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
                 else:
-                    try:
+                    if isinstance(request.user, get_user_model()):
                         """
-                        If request user is anonymous and order custom_contact belongs
-                        to some user, then assign order to user found.
+                        If request user is already registered user
+                        then set order author as the request user
                         """
-                        profile = Profile.objects.get(contact=order.custom_contact)
-                        order.created_by = profile.user
+                        order.created_by = request.user
                         order.save()
-                    except Profile.DoesNotExist:
-                        """
-                        If request user is anonymous and order custom_contact is totally unique,
-                        then create a new user with the custom_contact and assign order author
-                        """
-                        user = get_user_model().objects.create(
-                            username="{}".format(
-                                str(order.custom_contact.national_number)
+                    else:
+                        try:
+                            """
+                            If request user is anonymous and order custom_contact belongs
+                            to some user, then assign order to user found.
+                            """
+                            profile = Profile.objects.get(contact=order.custom_contact)
+                            order.created_by = profile.user
+                            order.save()
+                        except Profile.DoesNotExist:
+                            """
+                            If request user is anonymous and order custom_contact is totally unique,
+                            then create a new user with the custom_contact and assign order author
+                            """
+                            user = get_user_model().objects.create(
+                                username="{}".format(
+                                    str(order.custom_contact.national_number)
+                                )
                             )
-                        )
-                        if order.custom_email:
-                            user.email = order.custom_email
-                        user.set_password(str(order.custom_contact.national_number))
-                        user.save()
+                            if order.custom_email:
+                                user.email = order.custom_email
+                            user.set_password(str(order.custom_contact.national_number))
+                            user.save()
 
-                        user.profile.contact = order.custom_contact
-                        user.profile.address = order.custom_location
-                        user.save()
+                            user.profile.contact = order.custom_contact
+                            user.profile.address = order.custom_location
+                            user.save()
 
-                        order.created_by = user
-                        order.save()
+                            order.created_by = user
+                            order.save()
 
-                order.done_from_customer = True
-                order.done_from_customer_at = timezone.datetime.now()
-                order.save()
-
-                # create batch one for kot
-                cart_items = CartItem.objects.filter(order=order)
-                for cart_item in cart_items:
-                    OrderKOT.objects.create(
-                        order=order,
-                        cart_item=cart_item,
-                        batch=1,
-                        quantity_diff=cart_item.quantity,
+                    order.done_from_customer = True
+                    order.done_from_customer_at = timezone.datetime.now()
+                    order.save()
+
+                    # create batch one for kot
+                    generate_kot_batch(order.pk)
+                    record_order_done(order)
+                    increment("orders_done_total")
+                    queue_order_confirmation(order)
+                    write_log(
+                        mode="done",
+                        actor=order.created_by,
+                        detail="Order #{} marked done by customer {} from {}".format(
+                            order.id, order.custom_contact, order.custom_location
+                        ),
+                    )
+                    return Response(
+                        {"result": "Order sucessfully set as done."},
+                        status=status.HTTP_204_NO_CONTENT,
                     )
-                Log.objects.create(
-                    mode="done",
-                    actor=order.created_by,
-                    detail="Order #{} marked done by customer {} from {}".format(
-                        order.id, order.custom_contact, order.custom_location
-                    ),
-                )
-                return Response(
-                    {"result": "Order sucessfully set as done."},
-                    status=status.HTTP_204_NO_CONTENT,
-                )
         except Order.DoesNotExist:
             return Response(
                 {"detail": "Order does not exist."}, status=status.HTTP_404_NOT_FOUND
@@ -1,7 +1,6 @@
-import itertools
-from collections import Counter
-
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Sum
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.authentication import TokenAuthentication
@@ -9,11 +8,14 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from cart.models import CartItem, MonthlySalesReport, Order
+from backend.settings import SALES_REPORT_CACHE_TIMEOUT
+from cart.cache import get_sales_version
+from cart.models import (CartItem, MonthlySalesReport, UserItemStats,
+                         UserLocationStats, UserOrderStats)
 from cart.serializers.report import (RecentLocationsSerializer,
                                      SalesReportSerializer,
                                      UserTopItemsSerializer)
-from item.models import MenuItem
+from utils.cache import cached_json_response
 
 
 class RecentLocation:
@@ -29,73 +31,32 @@ class TopItem:
         self.name = name
 
 
-def get_reverse_sorted_dict(not_sorted_dict):
-    """
-    :param not_sorted_dict dictionary to sort
-    :returns dict sorted dictionary
-    """
-    return dict(sorted(not_sorted_dict.items(), key=lambda item: item[1], reverse=True))
-
-
-def get_top_items_from_dict(desc_sorted_dict, top_count):
-    """
-    :returns top `count` items form the reverse sorted dict
-    """
-    if len(desc_sorted_dict) <= top_count:
-        return desc_sorted_dict
-    else:
-        return dict(itertools.islice(desc_sorted_dict.items(), top_count))
-
-
-def get_top_items_of_user(cart_items):
-    """:returns top items with from supplied cart items"""
-    top_items = []
-    item_id_list = []
-
-    for cart_item in cart_items:
-        item_id_list.append(cart_item.item.id)
-
-    item_with_count_dict = dict(Counter(item_id_list))
-    desc_sorted_dict = get_reverse_sorted_dict(item_with_count_dict)
-    top_six_items_dict = get_top_items_from_dict(desc_sorted_dict, 6)
-
-    for itemId, count in top_six_items_dict.items():
-        item = MenuItem.objects.get(pk=itemId)
-        top_item = TopItem(image=item.image.url, count=count, name=item.name)
-        top_items.append(top_item)
-
-    return top_items
-
-
-def get_most_recent_locations_of_user(completed_orders):
-    """:returns top locations with count from supplied orders"""
-    # recent order_location calculation
-    recent_locations = []
-    most_recent_locations = []
-
-    for order in completed_orders:
-        recent_locations.append(order.custom_location)
-
-    recent_locations_with_count_dict = dict(Counter(recent_locations))
-    desc_sorted_recent_locations_dict = get_reverse_sorted_dict(
-        recent_locations_with_count_dict
+def get_top_items_of_user(user_id):
+    """:returns six most ordered items of the user"""
+    item_stats = (
+        UserItemStats.objects.filter(user_id=user_id)
+        .select_related("menu_item")
+        .order_by("-count")[:6]
     )
-    most_recent_locations_dict = get_top_items_from_dict(
-        desc_sorted_recent_locations_dict, 3
-    )
-
-    for location, count in most_recent_locations_dict.items():
-        location_obj = RecentLocation(location=location, count=count)
-        most_recent_locations.append(location_obj)
-    return most_recent_locations
+    return [
+        TopItem(
+            image=item_stat.menu_item.image.url,
+            count=item_stat.count,
+            name=item_stat.menu_item.name,
+        )
+        for item_stat in item_stats
+    ]
 
 
-def get_total_transaction_amount_of_a_user(completed_orders):
-    """:returns sum of grand total of supplied orders"""
-    total_transaction = 0
-    for order in completed_orders:
-        total_transaction += order.grand_total
-    return total_transaction
+def get_most_recent_locations_of_user(user_id):
+    """:returns three most delivered to locations of the user"""
+    location_stats = UserLocationStats.objects.filter(user_id=user_id).order_by(
+        "-count"
+    )[:3]
+    return [
+        RecentLocation(location=location_stat.location, count=location_stat.count)
+        for location_stat in location_stats
+    ]
 
 
 class StorySummaryDetailView(APIView):
@@ -104,42 +65,86 @@ class StorySummaryDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            user = get_user_model().objects.get(pk=pk)
-            total_orders = Order.objects.filter(created_by=user).count()
-            all_cart_items = CartItem.objects.filter(created_by=user)
-            cart_items_count = all_cart_items.count()
-
-            top_items = get_top_items_of_user(all_cart_items)
-
-            top_items = UserTopItemsSerializer(
-                instance=top_items,
-                many=True,
-                read_only=True,
-                context={"request": request},
-            )
+            stats = UserOrderStats.objects.get(user_id=pk)
+        except UserOrderStats.DoesNotExist:
+            if not get_user_model().objects.filter(pk=pk).exists():
+                return Response(
+                    {"details": "User not found."}, status=status.HTTP_404_NOT_FOUND
+                )
+            # user without completed orders yet
+            stats = UserOrderStats(user_id=pk)
+
+        top_items = UserTopItemsSerializer(
+            instance=get_top_items_of_user(pk),
+            many=True,
+            read_only=True,
+            context={"request": request},
+        )
+        most_recent_locations = RecentLocationsSerializer(
+            instance=get_most_recent_locations_of_user(pk), many=True, read_only=True
+        )
+        return Response(
+            {
+                "total_transaction": stats.total_transaction,
+                "total_orders": stats.total_orders,
+                "total_cart_items_count": stats.total_cart_items,
+                "top_items": top_items.data,
+                "most_recent_locations": most_recent_locations.data,
+            },
+            status=status.HTTP_200_OK,
+        )
 
-            completed_orders = Order.objects.filter(created_by=user, is_delivered=True)
-            most_recent_locations = get_most_recent_locations_of_user(completed_orders)
-            most_recent_locations = RecentLocationsSerializer(
-                instance=most_recent_locations, many=True, read_only=True
-            ).data
-
-            total_transaction = get_total_transaction_amount_of_a_user(completed_orders)
-
-            return Response(
-                {
-                    "total_transaction": total_transaction,
-                    "total_orders": total_orders,
-                    "total_cart_items_count": cart_items_count,
-                    "top_items": top_items.data,
-                    "most_recent_locations": most_recent_locations,
-                },
-                status=status.HTTP_200_OK,
-            )
-        except get_user_model().DoesNotExist:
-            return Response(
-                {"details": "User not found."}, status=status.HTTP_404_NOT_FOUND
+
+def get_monthly_sales(year, month):
+    """
+    :returns quantity weighted sales per menu item of a month, best sellers first
+    """
+    return (
+        CartItem.objects.filter(created_at__year=year, created_at__month=month)
+        .values("item")
+        .annotate(sale_count=Sum("quantity"))
+        .order_by("-sale_count")
+    )
+
+
+def update_monthly_sales_report(now):
+    """
+    Upserts MonthlySalesReport rows of the month in bulk
+    Only rows whose sale count changed are written
+    :returns report rows of the month
+    """
+    date = now.strftime("%Y/%m")
+    existing_reports = {
+        report.menu_item_id: report
+        for report in MonthlySalesReport.objects.filter(date=date)
+    }
+    new_reports = []
+    changed_reports = []
+    for sale in get_monthly_sales(now.year, now.month):
+        report = existing_reports.pop(sale["item"], None)
+        if report is None:
+            new_reports.append(
+                MonthlySalesReport(
+                    menu_item_id=sale["item"], sale_count=sale["sale_count"], date=date
+                )
             )
+        elif report.sale_count != sale["sale_count"]:
+            report.sale_count = sale["sale_count"]
+            changed_reports.append(report)
+
+    with transaction.atomic():
+        MonthlySalesReport.objects.bulk_create(new_reports)
+        MonthlySalesReport.objects.bulk_update(changed_reports, ["sale_count"])
+        # items whose cart items were all removed since last report
+        MonthlySalesReport.objects.filter(
+            pk__in=[report.pk for report in existing_reports.values()]
+        ).delete()
+
+    return (
+        MonthlySalesReport.objects.filter(date=date)
+        .select_related("menu_item")
+        .order_by("-sale_count")
+    )
 
 
 class SalesReportListView(APIView):
@@ -147,24 +152,23 @@ class SalesReportListView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        # most ordered items calculation
-        bought_items_list = []
-        item_id_list = []
-        all_cart_items = CartItem.objects.all()
-        for cart_item in all_cart_items:
-            item_id_list.append(cart_item.item.id)
-        item_with_count_dict = dict(Counter(item_id_list))
-        desc_sorted_dict = get_reverse_sorted_dict(item_with_count_dict)
         now = timezone.datetime.now()
-        for itemId, count in desc_sorted_dict.items():
-            item = MenuItem.objects.get(pk=itemId)
-            bought_item, created = MonthlySalesReport.objects.get_or_create(
-                menu_item=item, date=now.strftime("%Y/%m")
-            )
-            bought_item.sale_count = count
-            bought_item.save()
-            bought_items_list.append(bought_item)
+        # report is only rebuilt after cart items change
+        cache_key = "sales-report:{}:{}".format(
+            now.strftime("%Y/%m"), get_sales_version()
+        )
+        return cached_json_response(
+            request,
+            cache_key,
+            lambda: self.get_report_data(request, now),
+            timeout=SALES_REPORT_CACHE_TIMEOUT,
+        )
+
+    @staticmethod
+    def get_report_data(request, now):
         serializer = SalesReportSerializer(
-            instance=bought_items_list, many=True, context={"request": request}
+            instance=update_monthly_sales_report(now),
+            many=True,
+            context={"request": request},
         )
-        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
+        return {"results": serializer.data}
@@ -1,7 +1,35 @@
 workers = 4
+# threaded workers so long lived kitchen display streams do not pin a process,
+# KOT_STREAM_MAX_CONNECTIONS keeps streams from taking every thread
+worker_class = "gthread"
+threads = 8
 max_requests = 1000
 timeout = 30
 bind = "0.0.0.0:8002"
 preload_app = True
 accesslog = "/home/ubuntu/dev/foodswipe/BackEnd/logs/gunicorn/access.log"
-errorlog = "/home/ubuntu/dev/foodswipe/BackEnd/logs/gunicorn/error.log"
\ No newline at end of file
+errorlog = "/home/ubuntu/dev/foodswipe/BackEnd/logs/gunicorn/error.log"
+
+
+def post_worker_init(worker):
+    # build the menu indexes before the first request pays for them
+    from django.db import connection
+
+    from item.facets import menu_facets
+    from item.search import menu_search
+
+    try:
+        menu_search.get_index()
+        menu_facets.get_index()
+    except Exception:
+        # the first request builds them instead
+        worker.log.exception("Could not warm the menu indexes")
+    finally:
+        connection.close()
+
+
+def worker_exit(server, worker):
+    # flush audit logs still queued in this worker
+    from log.writer import log_writer
+
+    log_writer.stop()
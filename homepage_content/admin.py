@@ -59,7 +59,6 @@ class HomePageContentAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
     def delete_model(self, request, obj):
-        obj.image.delete()
         obj.delete()
 
 
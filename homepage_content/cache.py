@@ -0,0 +1,12 @@
+from utils.cache import ConditionalGetMixin, invalidate_namespace
+
+HOMEPAGE_NAMESPACE = "homepage"
+
+
+def invalidate_homepage(**kwargs):
+    """Signal receiver: homepage content changes expire cached responses"""
+    invalidate_namespace(HOMEPAGE_NAMESPACE)
+
+
+class HomepageConditionalGetMixin(ConditionalGetMixin):
+    cache_namespace = HOMEPAGE_NAMESPACE
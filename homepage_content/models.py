@@ -4,9 +4,13 @@ import random
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 
 from backend.settings import (ALLOWED_IMAGES_EXTENSIONS,
                               HOMEPAGE_CONTENT_IMAGE_MAX_SIZE)
+from homepage_content.cache import invalidate_homepage
+from media_store.storage import track_blob_references
+from utils.images import register_image_derivatives
 
 
 def upload_image_to(instance, filename):
@@ -36,3 +40,9 @@ class HomePageContent(models.Model):
     def clean(self):
         if self.image.size / 1000 > HOMEPAGE_CONTENT_IMAGE_MAX_SIZE:
             raise ValidationError("Image size exceeds max image upload size.")
+
+
+post_save.connect(invalidate_homepage, sender=HomePageContent)
+post_delete.connect(invalidate_homepage, sender=HomePageContent)
+register_image_derivatives(HomePageContent, "image", on_ready=invalidate_homepage)
+track_blob_references(HomePageContent, "image")
@@ -5,10 +5,12 @@ from backend.settings import (ALLOWED_IMAGES_EXTENSIONS,
                               HOMEPAGE_CONTENT_IMAGE_MAX_SIZE)
 from homepage_content.models import HomePageContent
 from utils.file import check_size
+from utils.images import ImageSrcsetField
 
 
 class HomePageContentSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(use_url=True, read_only=True)
+    image_srcset = ImageSrcsetField(source="image")
 
     class Meta:
         model = HomePageContent
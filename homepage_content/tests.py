@@ -1,3 +1,34 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from homepage_content.models import HomePageContent
+from item.tests import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HomePageContentTest(TestCase):
+    def setUp(self):
+        self.content = HomePageContent.objects.create(
+            heading="Momo Friday",
+            subtitle="Every momo at half price",
+            image="banner.png",
+            button_text="Order now",
+            button_icon="mdi-cart",
+            button_to="/order-now",
+        )
+
+    def test_list_is_revalidated_against_changes(self):
+        first = self.client.get("/api/home-page-contents")
+        self.assertEqual(first.json()["results"][0]["heading"], "Momo Friday")
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/api/home-page-contents", HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+        self.assertEqual(response.status_code, 304)
+
+        self.content.heading = "Momo Saturday"
+        self.content.save()
+        response = self.client.get(
+            "/api/home-page-contents", HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["heading"], "Momo Saturday")
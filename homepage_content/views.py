@@ -4,12 +4,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from homepage_content.cache import HomepageConditionalGetMixin
 from homepage_content.models import HomePageContent
 from homepage_content.serializer import (HomePageContentPOSTSerializer,
                                          HomePageContentSerializer)
 
 
-class HomePageContentListView(APIView):
+class HomePageContentListView(HomepageConditionalGetMixin, APIView):
     authentication_classes = ()
     permission_classes = ()
 
@@ -37,7 +38,6 @@ class HomepageContentViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         homepage_content = self.get_object()
-        homepage_content.image.delete()
         homepage_content.delete()
         return Response(
             {"message": "Homepage content item deleted successfully."},
@@ -91,7 +91,6 @@ class MenuItemAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
     def delete_model(self, request, obj):
-        obj.image.delete()
         obj.delete()
 
 
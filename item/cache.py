@@ -0,0 +1,63 @@
+import threading
+
+from backend.settings import MENU_CACHE_TIMEOUT
+from utils.cache import (ConditionalGetMixin, cached_json_response,
+                         get_cache_version, invalidate_namespace)
+
+CATALOG_NAMESPACE = "catalog"
+
+
+def get_catalog_version():
+    return get_cache_version(CATALOG_NAMESPACE)
+
+
+def invalidate_catalog(**kwargs):
+    """Signal receiver: any catalog change expires all menu snapshots"""
+    invalidate_namespace(CATALOG_NAMESPACE)
+
+
+def get_menu_cache_key(request, name):
+    """
+    Snapshot key for a public menu endpoint
+    Host is part of the key since serialized image urls are absolute
+    """
+    return "menu:{}:{}:{}".format(
+        name, get_catalog_version(), request.build_absolute_uri("/")
+    )
+
+
+def cached_menu_response(request, name, build_data):
+    return cached_json_response(
+        request,
+        get_menu_cache_key(request, name),
+        build_data,
+        timeout=MENU_CACHE_TIMEOUT,
+    )
+
+
+class CatalogIndex:
+    """
+    Holds an in-memory structure built from the catalog in this process,
+    rebuilt on first use after the catalog version moved, i.e. after any
+    catalog change in any worker
+    """
+
+    def __init__(self, build_index):
+        """:param build_index: function of the catalog version giving the index"""
+        self.build_index = build_index
+        self.lock = threading.Lock()
+        self.index = None
+
+    def get_index(self):
+        version = get_catalog_version()
+        index = self.index
+        if index is not None and index.version == version:
+            return index
+        with self.lock:
+            if self.index is None or self.index.version != version:
+                self.index = self.build_index(version)
+            return self.index
+
+
+class CatalogConditionalGetMixin(ConditionalGetMixin):
+    cache_namespace = CATALOG_NAMESPACE
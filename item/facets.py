@@ -0,0 +1,202 @@
+from collections import defaultdict
+
+from rest_framework.exceptions import ValidationError
+
+from backend.settings import MENU_PRICE_BANDS
+from item.cache import CatalogIndex
+from item.models import ItemType, MenuItem
+from item_group.models import MenuItemGroup
+
+FACETS = ("is_veg", "is_bar_item", "menu_item_group", "item_type", "price_band")
+BOOLEAN_FACETS = ("is_veg", "is_bar_item")
+# spellings django-filter accepts for boolean filters
+BOOLEAN_VALUES = {
+    "true": "true",
+    "True": "true",
+    "1": "true",
+    "false": "false",
+    "False": "false",
+    "0": "false",
+}
+
+
+def get_price_bands():
+    """:returns (value, lower, upper) of every band, upper None for the last"""
+    bounds = [0] + list(MENU_PRICE_BANDS)
+    bands = []
+    for lower, upper in zip(bounds, bounds[1:] + [None]):
+        value = "{}-{}".format(lower, upper) if upper else "{}+".format(lower)
+        bands.append((value, lower, upper))
+    return bands
+
+
+def get_price_band(price, bands):
+    for value, lower, upper in bands:
+        if upper is None or price < upper:
+            return value
+
+
+def to_bitset(positions, size):
+    bitmap = bytearray((size + 7) // 8)
+    for position in positions:
+        bitmap[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bitmap, "little")
+
+
+def iter_positions(bitset):
+    while bitset:
+        lowest = bitset & -bitset
+        yield lowest.bit_length() - 1
+        bitset ^= lowest
+
+
+def count_bits(bitset):
+    return bin(bitset).count("1")
+
+
+class MenuFacetIndex:
+    """
+    One bitset of menu item positions per facet value, bit n standing for
+    the n-th menu item in list order. Filters are unions within a facet and
+    intersections across facets
+    """
+
+    def __init__(self, items, labels, version=None):
+        """
+        :param items: dicts of id and facet values, values of item_type a list
+        :param labels: facet -> {value: label} of every value to offer
+        """
+        self.version = version
+        self.ids = [item["id"] for item in items]
+        self.positions = {menu_item_id: i for i, menu_item_id in enumerate(self.ids)}
+        self.everything = (1 << len(self.ids)) - 1
+        self.labels = labels
+        positions = {facet: defaultdict(list) for facet in FACETS}
+        for position, item in enumerate(items):
+            for facet in FACETS:
+                values = item[facet]
+                for value in values if isinstance(values, list) else [values]:
+                    positions[facet][value].append(position)
+        self.bitsets = {
+            facet: {
+                value: to_bitset(positions[facet][value], len(self.ids))
+                for value in labels[facet]
+            }
+            for facet in FACETS
+        }
+
+    def get_selection(self, query_params):
+        """
+        :returns facet -> selected values of the query
+        None when a value is not in the index, left to the database to answer
+        :raises ValidationError: for unknown price bands, no column to fall back on
+        """
+        selection = {}
+        for facet in FACETS:
+            values = [value for value in query_params.getlist(facet) if value != ""]
+            if not values:
+                continue
+            if facet in BOOLEAN_FACETS:
+                values = [BOOLEAN_VALUES.get(value) for value in values]
+            if not all(value in self.bitsets[facet] for value in values):
+                if facet == "price_band":
+                    raise ValidationError(
+                        {
+                            "price_band": [
+                                "Select one of {}.".format(
+                                    ", ".join(self.labels["price_band"])
+                                )
+                            ]
+                        }
+                    )
+                return None
+            selection[facet] = values
+        return selection
+
+    def get_bitset(self, ids):
+        return to_bitset(
+            (self.positions[i] for i in ids if i in self.positions), len(self.ids)
+        )
+
+    def get_matches(self, selection, base=None, exclude=None):
+        matches = self.everything if base is None else base
+        for facet, values in selection.items():
+            if facet == exclude:
+                continue
+            union = 0
+            for value in values:
+                union |= self.bitsets[facet][value]
+            matches &= union
+        return matches
+
+    def get_ids(self, bitset):
+        return [self.ids[position] for position in iter_positions(bitset)]
+
+    def get_counts(self, selection, base=None):
+        """
+        Counts of each facet value ignore the selection of that facet itself,
+        so they tell how many items selecting the value would add
+        """
+        counts = {}
+        for facet in FACETS:
+            matches = self.get_matches(selection, base, exclude=facet)
+            counts[facet] = [
+                {
+                    "value": value,
+                    "label": label,
+                    "count": count_bits(self.bitsets[facet][value] & matches),
+                }
+                for value, label in self.labels[facet].items()
+            ]
+        return counts
+
+
+def load_facet_index(version=None):
+    item_types = defaultdict(list)
+    for menu_item_id, item_type_id in MenuItem.item_type.through.objects.values_list(
+        "menuitem_id", "itemtype_id"
+    ):
+        item_types[menu_item_id].append(str(item_type_id))
+    bands = get_price_bands()
+    items = []
+    # same order as the menu item list
+    for menu_item in MenuItem.objects.values(
+        "id", "is_veg", "is_bar_item", "menu_item_group_id", "price"
+    ).order_by("created_at", "id"):
+        group_id = menu_item["menu_item_group_id"]
+        items.append(
+            {
+                "id": menu_item["id"],
+                "is_veg": "true" if menu_item["is_veg"] else "false",
+                "is_bar_item": "true" if menu_item["is_bar_item"] else "false",
+                "menu_item_group": [] if group_id is None else str(group_id),
+                "item_type": item_types[menu_item["id"]],
+                "price_band": get_price_band(menu_item["price"], bands),
+            }
+        )
+    labels = {
+        "is_veg": {"true": "Veg", "false": "Non veg"},
+        "is_bar_item": {"true": "Bar", "false": "Kitchen"},
+        "menu_item_group": {
+            str(group_id): name
+            for group_id, name in MenuItemGroup.objects.values_list(
+                "id", "name"
+            ).order_by("name")
+        },
+        "item_type": {
+            str(item_type_id): name
+            for item_type_id, name in ItemType.objects.values_list(
+                "id", "name"
+            ).order_by("name")
+        },
+        "price_band": {
+            value: "Rs. {} and above".format(lower)
+            if upper is None
+            else "Rs. {} - {}".format(lower, upper)
+            for value, lower, upper in bands
+        },
+    }
+    return MenuFacetIndex(items, labels, version)
+
+
+menu_facets = CatalogIndex(load_facet_index)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from utils.images import (derivatives_ready, generate_derivatives,
+                          registered_image_fields)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates missing image derivatives of existing uploads, "
+        "e.g. after adding widths or formats."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true", help="Regenerate existing derivatives."
+        )
+
+    def handle(self, *args, **options):
+        for model, field_name, on_ready in registered_image_fields:
+            generated = []
+            names = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{"{}__isnull".format(field_name): True})
+                .values_list(field_name, flat=True)
+            )
+            storage = model._meta.get_field(field_name).storage
+            for name in names.iterator():
+                if options["force"] or not derivatives_ready(name):
+                    if generate_derivatives(storage, name):
+                        generated.append(name)
+            if generated and on_ready is not None:
+                on_ready(names=generated)
+            self.stdout.write(
+                "{}.{}: {} images processed.".format(
+                    model._meta.label, field_name, len(generated)
+                )
+            )
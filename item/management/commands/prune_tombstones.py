@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from item.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes catalog tombstones older than MENU_SYNC_TOMBSTONE_RETENTION, "
+        "clients with older tokens get the full catalog. Meant to run daily "
+        "from cron."
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(
+            self.style.SUCCESS("Pruned {} catalog tombstones.".format(deleted))
+        )
@@ -0,0 +1,50 @@
+# Generated by Django 3.1.4 on 2026-10-18 18:30
+
+import datetime
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("item", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogTombstone",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("menu_item", "Menu Item"),
+                            ("menu_item_group", "Menu Item Group"),
+                            ("item_type", "Item Type"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                (
+                    "deleted_at",
+                    models.DateTimeField(db_index=True, default=datetime.datetime.now),
+                ),
+            ],
+            options={
+                "verbose_name": "Catalog Tombstone",
+                "verbose_name_plural": "Catalog Tombstones",
+                "ordering": ["-deleted_at"],
+            },
+        ),
+    ]
@@ -5,11 +5,16 @@ from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
 from django.dispatch import receiver
+from django.utils import timezone
 
 from backend.settings import ALLOWED_IMAGES_EXTENSIONS, MAX_UPLOAD_IMAGE_SIZE
+from item.cache import invalidate_catalog
 from item_group.models import MenuItemGroup
+from media_store.storage import track_blob_references
+from utils.images import register_image_derivatives
 
 
 def upload_menu_item_media_to(instance, filename):
@@ -48,7 +53,7 @@ class ItemType(models.Model):
             raise ValidationError("Image size exceeds max image upload size.")
 
     def delete(self, using=None, keep_parents=False):
-        self.badge.delete()
+        self.badge.delete(save=False)
         super().delete(using, keep_parents)
 
 
@@ -101,7 +106,7 @@ class Item(models.Model):
             raise ValidationError("Image size exceeds max image upload size.")
 
     def delete(self, using=None, keep_parents=False):
-        self.image.delete()
+        self.image.delete(save=False)
         super().delete(using, keep_parents)
 
 
@@ -165,7 +170,113 @@ class TopAndRecommendedItem(models.Model):
         ordering = ["-timestamp"]
 
 
+TOMBSTONE_KIND_CHOICES = [
+    ("menu_item", "Menu Item"),
+    ("menu_item_group", "Menu Item Group"),
+    ("item_type", "Item Type"),
+]
+
+
+class CatalogTombstone(models.Model):
+    """Deleted catalog rows, so that synced clients can drop them too"""
+
+    kind = models.CharField(max_length=16, choices=TOMBSTONE_KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.datetime.now, db_index=True)
+
+    def __str__(self):
+        return "{} {}".format(self.kind, self.object_id)
+
+    class Meta:
+        verbose_name = "Catalog Tombstone"
+        verbose_name_plural = "Catalog Tombstones"
+        ordering = ["-deleted_at"]
+
+
 @receiver(post_save, sender=MenuItem)
 def create_menu_item_special(sender, instance, created, **kwargs):
     if created:
         TopAndRecommendedItem.objects.create(menu_item=instance)
+
+
+for catalog_model in (MenuItem, MenuItemGroup, ItemType, TopAndRecommendedItem):
+    post_save.connect(invalidate_catalog, sender=catalog_model)
+    post_delete.connect(invalidate_catalog, sender=catalog_model)
+m2m_changed.connect(invalidate_catalog, sender=MenuItem.item_type.through)
+
+
+def touch_catalog_images(model, field_name, modified_field):
+    """
+    on_ready of catalog images: image_srcset of the rows changed without
+    save, moving their modification time lets synced clients refetch them
+    """
+
+    def on_ready(names=(), **kwargs):
+        model.objects.filter(**{"{}__in".format(field_name): names}).update(
+            **{modified_field: timezone.datetime.now()}
+        )
+        invalidate_catalog()
+
+    return on_ready
+
+
+register_image_derivatives(
+    MenuItem, "image", on_ready=touch_catalog_images(MenuItem, "image", "updated_at")
+)
+register_image_derivatives(
+    ItemType, "badge", on_ready=touch_catalog_images(ItemType, "badge", "timestamp")
+)
+register_image_derivatives(
+    MenuItemGroup,
+    "image",
+    on_ready=touch_catalog_images(MenuItemGroup, "image", "updated_at"),
+)
+track_blob_references(MenuItem, "image")
+track_blob_references(ItemType, "badge")
+track_blob_references(MenuItemGroup, "image")
+
+
+def record_tombstone(kind):
+    """Old tombstones are removed by the prune_tombstones command"""
+
+    def receiver(sender, instance, **kwargs):
+        CatalogTombstone.objects.create(
+            kind=kind, object_id=instance.pk, deleted_at=timezone.datetime.now()
+        )
+
+    return receiver
+
+
+post_delete.connect(record_tombstone("menu_item"), sender=MenuItem, weak=False)
+post_delete.connect(
+    record_tombstone("menu_item_group"), sender=MenuItemGroup, weak=False
+)
+post_delete.connect(record_tombstone("item_type"), sender=ItemType, weak=False)
+
+
+def touch_menu_items(menu_items):
+    """Changes that bypass save still have to reach synced clients"""
+    menu_items.update(updated_at=timezone.datetime.now())
+
+
+@receiver(m2m_changed, sender=MenuItem.item_type.through)
+def touch_menu_item_types(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        touch_menu_items(MenuItem.objects.filter(pk=instance.pk))
+    elif action == "pre_clear":
+        touch_menu_items(MenuItem.objects.filter(item_type=instance))
+    else:
+        touch_menu_items(MenuItem.objects.filter(pk__in=pk_set))
+
+
+@receiver(pre_delete, sender=MenuItemGroup)
+def touch_group_menu_items(sender, instance, **kwargs):
+    # menu items lose their group through SET_NULL, without save
+    touch_menu_items(MenuItem.objects.filter(menu_item_group=instance))
+
+
+@receiver(pre_delete, sender=ItemType)
+def touch_typed_menu_items(sender, instance, **kwargs):
+    touch_menu_items(MenuItem.objects.filter(item_type=instance))
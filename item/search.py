@@ -0,0 +1,256 @@
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.core.files.storage import default_storage
+
+from item.cache import CatalogIndex
+from item.models import MenuItem
+
+# weight of a token by the field it was found in
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "group": 1.5,
+    "item_types": 1.5,
+    "ingredients": 1.0,
+    "description": 0.5,
+}
+EXACT_FACTOR = 1.0
+PREFIX_FACTOR = 0.7
+# per edit, typos rank below what was actually typed
+TYPO_FACTOR = 0.5
+MAX_PREFIX_EXPANSIONS = 50
+NAME_PREFIX_BONUS = 2.0
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """Lower case ascii, so accents and case never stop a match"""
+    text = unicodedata.normalize("NFKD", text or "")
+    return text.encode("ascii", "ignore").decode("ascii").lower()
+
+
+def tokenize(text):
+    return TOKEN.findall(normalize(text))
+
+
+def get_trigrams(token):
+    padded = "  {} ".format(token)
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+def get_max_typos(term):
+    if len(term) < 4:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+
+def get_edit_distance(first, second, max_distance):
+    """
+    Optimal string alignment distance, adjacent swaps count as one edit
+    :returns max_distance + 1 as soon as the distance exceeds max_distance
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+    previous_row = None
+    row = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        before_previous_row, previous_row = previous_row, row
+        row = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = first[i - 1] != second[j - 1]
+            row[j] = min(
+                previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost
+            )
+            if (
+                i > 1
+                and j > 1
+                and first[i - 1] == second[j - 2]
+                and first[i - 2] == second[j - 1]
+            ):
+                row[j] = min(row[j], before_previous_row[j - 2] + 1)
+        # a swap still reaches back to the previous row
+        if min(row) > max_distance and min(previous_row) >= max_distance:
+            return max_distance + 1
+    return row[-1]
+
+
+class MenuSearchIndex:
+    """
+    Inverted index over menu item text with a sorted vocabulary for prefix
+    lookups and a trigram index to find tokens close to misspelled terms
+    """
+
+    def __init__(self, documents, version=None):
+        self.documents = documents
+        self.version = version
+        self.postings = defaultdict(dict)
+        for position, document in enumerate(documents):
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(document[field]):
+                    postings = self.postings[token]
+                    postings[position] = postings.get(position, 0) + weight
+        self.idf = {
+            token: math.log(1 + len(documents) / len(postings))
+            for token, postings in self.postings.items()
+        }
+        self.vocabulary = sorted(self.postings)
+        self.trigrams = defaultdict(list)
+        for token in self.vocabulary:
+            for trigram in get_trigrams(token):
+                self.trigrams[trigram].append(token)
+
+    def get_prefix_tokens(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\uffff", lo=start)
+        return self.vocabulary[start : min(end, start + MAX_PREFIX_EXPANSIONS)]
+
+    def get_similar_tokens(self, term):
+        """:returns tokens within the typo budget of the term, by edit count"""
+        max_typos = get_max_typos(term)
+        if not max_typos:
+            return []
+        trigrams = get_trigrams(term)
+        shared = Counter(
+            token for trigram in trigrams for token in self.trigrams.get(trigram, ())
+        )
+        # every edit changes at most three trigrams
+        min_shared = len(trigrams) - 3 * max_typos
+        similar = []
+        for token, count in shared.items():
+            if count >= min_shared:
+                distance = get_edit_distance(term, token, max_typos)
+                if distance <= max_typos:
+                    similar.append((token, distance))
+        return similar
+
+    def expand(self, term, prefix=False):
+        """
+        :returns index tokens matching the term with their match factor
+        Only the word still being typed, prefix=True, matches as a prefix
+        """
+        factors = {}
+        if term in self.postings:
+            factors[term] = EXACT_FACTOR
+        if prefix:
+            for token in self.get_prefix_tokens(term):
+                factors.setdefault(token, PREFIX_FACTOR)
+        if term not in self.postings:
+            for token, distance in self.get_similar_tokens(term):
+                factors.setdefault(token, TYPO_FACTOR ** distance)
+        return factors.items()
+
+    def search(self, query, limit):
+        """
+        Every term has to match a document, exactly or with typos, the last
+        one also as prefix
+        :returns documents ranked by field weighted tf-idf of the best matches
+        """
+        terms = tokenize(query)
+        scores = None
+        for index, term in enumerate(terms):
+            term_scores = {}
+            for token, factor in self.expand(term, prefix=index == len(terms) - 1):
+                idf = self.idf[token]
+                for position, weight in self.postings[token].items():
+                    score = factor * weight * idf
+                    if score > term_scores.get(position, 0):
+                        term_scores[position] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    position: scores[position] + score
+                    for position, score in term_scores.items()
+                    if position in scores
+                }
+            if not scores:
+                return []
+        if not scores:
+            return []
+
+        phrase = " ".join(terms)
+        for position in scores:
+            if self.documents[position]["search_name"].startswith(phrase):
+                scores[position] += NAME_PREFIX_BONUS
+        ranked = heapq.nsmallest(
+            limit,
+            scores.items(),
+            key=lambda pair: (
+                -pair[1],
+                len(self.documents[pair[0]]["name"]),
+                self.documents[pair[0]]["name"],
+            ),
+        )
+        return [
+            dict(self.documents[position], score=round(score, 4))
+            for position, score in ranked
+        ]
+
+
+def load_documents():
+    """:returns searchable text and result fields of every menu item"""
+    item_types = defaultdict(list)
+    for menu_item_id, item_type in MenuItem.item_type.through.objects.values_list(
+        "menuitem_id", "itemtype__name"
+    ):
+        item_types[menu_item_id].append(item_type)
+    documents = []
+    for menu_item in MenuItem.objects.values(
+        "id",
+        "name",
+        "description",
+        "ingredients",
+        "price",
+        "image",
+        "is_veg",
+        "is_available",
+        "menu_item_group__name",
+    ).order_by("id"):
+        documents.append(
+            {
+                "id": menu_item["id"],
+                "name": menu_item["name"],
+                "search_name": " ".join(tokenize(menu_item["name"])),
+                "group": menu_item["menu_item_group__name"],
+                "item_types": " ".join(item_types[menu_item["id"]]),
+                "ingredients": menu_item["ingredients"],
+                "description": menu_item["description"],
+                "price": menu_item["price"],
+                "image": menu_item["image"],
+                "is_veg": menu_item["is_veg"],
+                "is_available": menu_item["is_available"],
+            }
+        )
+    return documents
+
+
+def load_search_index(version=None):
+    return MenuSearchIndex(load_documents(), version)
+
+
+class MenuSearch(CatalogIndex):
+    def search(self, query, limit):
+        return self.get_index().search(query, limit)
+
+
+menu_search = MenuSearch(load_search_index)
+
+
+def get_search_result(document, request):
+    return {
+        "id": document["id"],
+        "name": document["name"],
+        "group": document["group"],
+        "price": str(document["price"]),
+        "avatar": request.build_absolute_uri(default_storage.url(document["image"]))
+        if document["image"]
+        else None,
+        "is_veg": document["is_veg"],
+        "is_available": document["is_available"],
+        "score": document["score"],
+    }
@@ -3,27 +3,24 @@ from rest_framework import serializers
 
 from backend.settings import ALLOWED_IMAGES_EXTENSIONS, MAX_UPLOAD_IMAGE_SIZE
 from item.models import ItemType, MenuItem, TopAndRecommendedItem
-from log.models import Log
+from item_group.models import MenuItemGroup
+from log.writer import write_log
 from utils.file import check_size
+from utils.images import ImageSrcsetField
+from utils.serializers import FastListSerializer
 
 
 class MenuItemSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(use_url=True)
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
-
-    @staticmethod
-    def get_created_at(obj):
-        return obj.created_at.strftime("%Y/%m/%d %H:%M:%S")
-
-    @staticmethod
-    def get_updated_at(obj):
-        return obj.updated_at.strftime("%Y/%m/%d %H:%M:%S")
+    image_srcset = ImageSrcsetField(source="image")
+    created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M:%S", read_only=True)
+    updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M:%S", read_only=True)
 
     class Meta:
         model = MenuItem
         fields = "__all__"
         depth = 1
+        list_serializer_class = FastListSerializer
 
     def update(self, instance, validated_data):
         validated_data["updated_by"] = self.context["request"].user
@@ -61,7 +58,7 @@ class MenuItemPOSTSerializer(serializers.ModelSerializer):
         for item_type in item_types:
             menu_item.item_type.add(item_type)
         menu_item.save()
-        Log.objects.create(
+        write_log(
             mode="create",
             actor=validated_data["created_by"],
             detail="New menu item added. ({})".format(menu_item.name),
@@ -77,6 +74,7 @@ class ItemTypeSerializer(serializers.ModelSerializer):
     badge = serializers.FileField(
         validators=[FileExtensionValidator(ALLOWED_IMAGES_EXTENSIONS)]
     )
+    badge_srcset = ImageSrcsetField(source="badge")
 
     class Meta:
         model = ItemType
@@ -91,11 +89,12 @@ class ItemTypeSerializer(serializers.ModelSerializer):
 
 class OrderNowListSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(max_length=None, use_url=True)
+    image_srcset = ImageSrcsetField(source="image")
     group = serializers.SerializerMethodField()
 
     class Meta:
         model = MenuItem
-        fields = ["id", "name", "group", "image", "price"]
+        fields = ["id", "name", "group", "image", "image_srcset", "price"]
 
     @staticmethod
     def get_group(menu_item):
@@ -115,3 +114,49 @@ class TopAndRecommendedMenuItemPostSerializer(serializers.ModelSerializer):
     class Meta:
         model = TopAndRecommendedItem
         fields = "__all__"
+
+
+class SyncMenuItemSerializer(serializers.ModelSerializer):
+    """Menu item of the delta sync, related rows by id"""
+
+    image = serializers.ImageField(use_url=True)
+    image_srcset = ImageSrcsetField(source="image")
+
+    class Meta:
+        model = MenuItem
+        fields = [
+            "id",
+            "name",
+            "description",
+            "ingredients",
+            "price",
+            "scale",
+            "weight",
+            "calorie",
+            "is_veg",
+            "is_available",
+            "is_bar_item",
+            "bar_size",
+            "menu_item_group",
+            "item_type",
+            "image",
+            "image_srcset",
+        ]
+
+
+class SyncMenuItemGroupSerializer(serializers.ModelSerializer):
+    image = serializers.ImageField(use_url=True)
+    image_srcset = ImageSrcsetField(source="image")
+
+    class Meta:
+        model = MenuItemGroup
+        fields = ["id", "name", "description", "image", "image_srcset"]
+
+
+class SyncItemTypeSerializer(serializers.ModelSerializer):
+    badge = serializers.ImageField(use_url=True)
+    badge_srcset = ImageSrcsetField(source="badge")
+
+    class Meta:
+        model = ItemType
+        fields = ["id", "name", "badge", "badge_srcset"]
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from backend.settings import MENU_SYNC_OVERLAP, MENU_SYNC_TOMBSTONE_RETENTION
+from item.models import CatalogTombstone, ItemType, MenuItem
+from item.serializers import (SyncItemTypeSerializer,
+                              SyncMenuItemGroupSerializer,
+                              SyncMenuItemSerializer)
+from item_group.models import MenuItemGroup
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def get_sync_token(moment):
+    """:returns opaque token of a moment, microseconds since the epoch"""
+    return str((moment - EPOCH) // timedelta(microseconds=1))
+
+
+def parse_sync_token(token):
+    """:raises ValueError for tokens this server did not hand out"""
+    microseconds = int(token)
+    if microseconds < 0:
+        raise ValueError("Negative sync token")
+    return EPOCH + timedelta(microseconds=microseconds)
+
+
+def get_catalog_changes(since, request):
+    """
+    Menu items, groups and item types changed after since and ids of those
+    deleted, or the full catalog when since is None or tombstones of that
+    time were already pruned
+    Changes are repeated for MENU_SYNC_OVERLAP, applying them is idempotent
+    """
+    now = timezone.datetime.now()
+    full = since is None or since < now - timedelta(
+        seconds=MENU_SYNC_TOMBSTONE_RETENTION
+    )
+    menu_items = MenuItem.objects.prefetch_related("item_type").order_by("id")
+    menu_item_groups = MenuItemGroup.objects.order_by("id")
+    item_types = ItemType.objects.order_by("id")
+    deleted = {"menu_items": [], "menu_item_groups": [], "item_types": []}
+    if not full:
+        after = since - timedelta(seconds=MENU_SYNC_OVERLAP)
+        menu_items = menu_items.filter(updated_at__gt=after)
+        menu_item_groups = menu_item_groups.filter(updated_at__gt=after)
+        item_types = item_types.filter(timestamp__gt=after)
+        tombstones = CatalogTombstone.objects.filter(deleted_at__gt=after)
+        for kind, object_id in tombstones.order_by("id").values_list(
+            "kind", "object_id"
+        ):
+            deleted[kind + "s"].append(object_id)
+
+    context = {"request": request}
+    return {
+        "token": get_sync_token(now),
+        "full": full,
+        "menu_items": SyncMenuItemSerializer(
+            menu_items, many=True, context=context
+        ).data,
+        "menu_item_groups": SyncMenuItemGroupSerializer(
+            menu_item_groups, many=True, context=context
+        ).data,
+        "item_types": SyncItemTypeSerializer(
+            item_types, many=True, context=context
+        ).data,
+        "deleted": deleted,
+    }
+
+
+def prune_tombstones():
+    """:returns number of tombstones deleted, older than any token still synced"""
+    cutoff = timezone.datetime.now() - timedelta(seconds=MENU_SYNC_TOMBSTONE_RETENTION)
+    deleted, _ = CatalogTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -1,3 +1,389 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from item.models import CatalogTombstone, ItemType, MenuItem
+from item_group.models import MenuItemGroup
+from utils.images import (delete_derivatives, derivative_queue,
+                          get_derivative_name, process_image,
+                          registered_image_fields)
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MenuCacheTest(TestCase):
+    def setUp(self):
+        group = MenuItemGroup.objects.create(name="Momo", image="group.png")
+        self.menu_item = MenuItem.objects.create(
+            name="Chicken Momo", price=200, menu_item_group=group, image="momo.png"
+        )
+
+    def test_order_now_list_is_served_from_snapshot(self):
+        first = self.client.get("/api/order-now-list")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/order-now-list")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second.json()["results"][0]["name"], "Chicken Momo")
+
+    def test_catalog_change_invalidates_snapshot(self):
+        self.client.get("/api/item-group-with-items")
+        self.menu_item.name = "Buff Momo"
+        self.menu_item.save()
+        response = self.client.get("/api/item-group-with-items")
+        menu_items = response.json()["results"][0]["menu_items"]
+        self.assertEqual(menu_items[0]["name"], "Buff Momo")
+
+    def test_unchanged_catalog_is_not_modified(self):
+        for url in ["/api/order-now-list", "/api/item-group-with-items"]:
+            first = self.client.get(url)
+            self.assertIn("no-cache", first["Cache-Control"])
+            with self.assertNumQueries(0):
+                second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(second.status_code, 304)
+            self.assertEqual(second.content, b"")
+
+        first = self.client.get("/api/order-now-list")
+        self.menu_item.price = 250
+        self.menu_item.save()
+        response = self.client.get(
+            "/api/order-now-list", HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        response = self.client.get(
+            "/api/order-now-list",
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    @mock.patch("utils.cache.time.time", return_value=1000.5)
+    def test_changes_within_a_second_move_last_modified(self, time):
+        self.menu_item.price = 240
+        self.menu_item.save()
+        first = self.client.get("/api/order-now-list")
+        self.menu_item.price = 250
+        self.menu_item.save()
+        response = self.client.get(
+            "/api/order-now-list", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_item_type_list_etag_follows_query(self):
+        first = self.client.get("/api/item-type/")
+        response = self.client.get("/api/item-type/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            "/api/item-type/", {"search": "spicy"}, HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ImageDerivativeTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.group = MenuItemGroup.objects.create(name="Momo", image="group.png")
+
+    @staticmethod
+    def create_png(width, height):
+        output = io.BytesIO()
+        Image.new("RGBA", (width, height), (200, 50, 50, 128)).save(output, "PNG")
+        return ContentFile(output.getvalue(), name="momo.png")
+
+    def create_menu_item(self):
+        menu_item = MenuItem(name="Chicken Momo", price=200, menu_item_group=self.group)
+        menu_item.image.save("momo.png", self.create_png(800, 400), save=False)
+        menu_item.save()
+        return menu_item
+
+    def test_uploads_get_scaled_webp_and_jpeg_derivatives(self):
+        menu_item = self.create_menu_item()
+        name = menu_item.image.name
+        with default_storage.open(get_derivative_name(name, 160, "webp")) as webp:
+            self.assertEqual(Image.open(webp).size, (160, 80))
+        with default_storage.open(get_derivative_name(name, 1024, "jpeg")) as jpeg:
+            # never scaled up
+            self.assertEqual(Image.open(jpeg).size, (800, 400))
+
+        menu_item_data = self.client.get("/api/order-now-list").json()["results"][0]
+        self.assertTrue(
+            menu_item_data["image_srcset"]["webp"]["320w"].endswith(
+                get_derivative_name(name, 320, "webp")
+            )
+        )
+
+    def test_srcset_is_empty_without_derivatives(self):
+        MenuItem.objects.create(
+            name="Veg Momo", price=150, menu_item_group=self.group, image="missing.png"
+        )
+        menu_item_data = self.client.get("/api/order-now-list").json()["results"][0]
+        self.assertIsNone(menu_item_data["image_srcset"])
+
+    def test_derivatives_are_deleted_with_menu_item(self):
+        menu_item = self.create_menu_item()
+        derivative_name = get_derivative_name(menu_item.image.name, 640, "webp")
+        self.assertTrue(default_storage.exists(derivative_name))
+        menu_item.delete()
+        self.assertFalse(default_storage.exists(derivative_name))
+
+    @mock.patch("item.sync.MENU_SYNC_OVERLAP", 0)
+    def test_ready_derivatives_reach_synced_clients(self):
+        menu_item = self.create_menu_item()
+        name = menu_item.image.name
+        delete_derivatives(name)
+        token = self.client.get("/api/menu/changes").json()["token"]
+        self.assertEqual(
+            self.client.get("/api/menu/changes", {"since": token}).json()["menu_items"],
+            [],
+        )
+
+        on_ready = next(
+            on_ready
+            for model, field_name, on_ready in registered_image_fields
+            if model is MenuItem
+        )
+        process_image(menu_item.image.storage, name, on_ready)
+        data = self.client.get("/api/menu/changes", {"since": token}).json()
+        self.assertEqual(
+            [item["name"] for item in data["menu_items"]], ["Chicken Momo"]
+        )
+        self.assertIsNotNone(data["menu_items"][0]["image_srcset"])
+
+    def test_derivatives_are_queued_when_async(self):
+        # fresh executor state, restored for the tests after this one
+        with override_settings(IMAGE_DERIVATIVES_ASYNC=True), mock.patch.multiple(
+            derivative_queue, executor=None, pid=None
+        ), mock.patch("utils.images.ThreadPoolExecutor") as executor:
+            menu_item = self.create_menu_item()
+        self.assertTrue(executor.return_value.submit.called)
+        derivative_name = get_derivative_name(menu_item.image.name, 640, "webp")
+        self.assertFalse(default_storage.exists(derivative_name))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MenuSearchTest(TestCase):
+    def setUp(self):
+        momo = MenuItemGroup.objects.create(name="Momo", image="momo.png")
+        pizza = MenuItemGroup.objects.create(name="Pizza", image="pizza.png")
+        spicy = ItemType.objects.create(name="Spicy", badge="spicy.png")
+        MenuItem.objects.create(
+            name="Chicken Momo", price=200, menu_item_group=momo, image="1.png"
+        ).item_type.add(spicy)
+        MenuItem.objects.create(
+            name="Veg Momo", price=150, menu_item_group=momo, image="2.png"
+        )
+        MenuItem.objects.create(
+            name="Margherita",
+            price=500,
+            menu_item_group=pizza,
+            image="3.png",
+            ingredients="Cheese, tomato and chicken stock",
+        )
+
+    def search(self, query):
+        response = self.client.get("/api/menu-search", {"q": query})
+        return [item["name"] for item in response.json()["results"]]
+
+    def test_last_word_is_matched_as_prefix(self):
+        self.assertEqual(self.search("veg mo"), ["Veg Momo"])
+        self.assertEqual(self.search("marg"), ["Margherita"])
+        self.assertEqual(self.search("mo veg"), [])
+
+    def test_misspelled_words_still_match(self):
+        self.assertEqual(self.search("chiken momo"), ["Chicken Momo"])
+        self.assertEqual(self.search("margarita"), ["Margherita"])
+
+    def test_name_matches_rank_above_other_fields(self):
+        self.assertEqual(self.search("chicken"), ["Chicken Momo", "Margherita"])
+        self.assertEqual(self.search("spicy"), ["Chicken Momo"])
+
+    def test_index_follows_catalog_changes(self):
+        self.assertEqual(self.search("buff"), [])
+        MenuItem.objects.filter(name="Veg Momo").get().delete()
+        MenuItem.objects.create(
+            name="Buff Momo",
+            price=180,
+            menu_item_group=MenuItemGroup.objects.get(name="Momo"),
+            image="4.png",
+        )
+        self.assertEqual(self.search("buff"), ["Buff Momo"])
+        self.assertEqual(self.search("momo"), ["Buff Momo", "Chicken Momo"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MenuFacetTest(TestCase):
+    def setUp(self):
+        self.momo = MenuItemGroup.objects.create(name="Momo", image="momo.png")
+        self.drinks = MenuItemGroup.objects.create(name="Drinks", image="drinks.png")
+        self.spicy = ItemType.objects.create(name="Spicy", badge="spicy.png")
+        MenuItem.objects.create(
+            name="Chicken Momo", price=200, menu_item_group=self.momo, image="1.png"
+        ).item_type.add(self.spicy)
+        MenuItem.objects.create(
+            name="Veg Momo",
+            price=150,
+            is_veg=True,
+            menu_item_group=self.momo,
+            image="2.png",
+        ).item_type.add(self.spicy)
+        MenuItem.objects.create(
+            name="Mojito",
+            price=600,
+            is_veg=True,
+            is_bar_item=True,
+            menu_item_group=self.drinks,
+            image="3.png",
+        )
+
+    def get_menu_items(self, **params):
+        return self.client.get("/api/menu-item/", params).json()
+
+    @staticmethod
+    def get_counts(data, facet):
+        return {entry["value"]: entry["count"] for entry in data["facets"][facet]}
+
+    def test_filters_intersect_across_facets(self):
+        data = self.get_menu_items(is_veg="true", item_type=self.spicy.id)
+        self.assertEqual(data["count"], 1)
+        self.assertEqual([item["name"] for item in data["results"]], ["Veg Momo"])
+        self.assertEqual(data["results"][0]["menu_item_group"]["name"], "Momo")
+
+        data = self.get_menu_items(price_band=["0-200", "500-1000"], is_veg="True")
+        self.assertEqual(
+            [item["name"] for item in data["results"]], ["Veg Momo", "Mojito"]
+        )
+
+    def test_counts_ignore_the_selection_of_their_own_facet(self):
+        data = self.get_menu_items(is_veg="true")
+        self.assertEqual(self.get_counts(data, "is_veg"), {"true": 2, "false": 1})
+        self.assertEqual(
+            self.get_counts(data, "menu_item_group"),
+            {str(self.drinks.id): 1, str(self.momo.id): 1},
+        )
+        self.assertEqual(
+            self.get_counts(data, "price_band"),
+            {"0-200": 1, "200-500": 0, "500-1000": 1, "1000+": 0},
+        )
+
+    def test_search_narrows_results_and_counts(self):
+        data = self.get_menu_items(search="momo", is_bar_item="false")
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(self.get_counts(data, "is_bar_item"), {"true": 0, "false": 2})
+
+    def test_index_follows_catalog_changes(self):
+        self.assertEqual(self.get_menu_items(is_bar_item="true")["count"], 1)
+        MenuItem.objects.filter(name="Veg Momo").update(is_bar_item=True)
+        # queryset updates bypass signals
+        self.assertEqual(self.get_menu_items(is_bar_item="true")["count"], 1)
+        MenuItem.objects.get(name="Chicken Momo").save()
+        self.assertEqual(self.get_menu_items(is_bar_item="true")["count"], 2)
+
+    def test_unknown_values_are_left_to_the_database(self):
+        response = self.client.get("/api/menu-item/", {"menu_item_group": 9999})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("facets", response.json())
+
+    def test_unknown_price_band_is_rejected(self):
+        response = self.client.get("/api/menu-item/", {"price_band": "200-300"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("price_band", response.json())
+
+    def test_database_answers_keep_facets(self):
+        with mock.patch("item.facets.MenuFacetIndex.get_selection", return_value=None):
+            data = self.get_menu_items(is_veg="true")
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(self.get_counts(data, "is_veg"), {"true": 2, "false": 0})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("item.sync.MENU_SYNC_OVERLAP", 0)
+class MenuSyncTest(TestCase):
+    def setUp(self):
+        self.momo = MenuItemGroup.objects.create(name="Momo", image="momo.png")
+        self.spicy = ItemType.objects.create(name="Spicy", badge="spicy.png")
+        self.chicken_momo = MenuItem.objects.create(
+            name="Chicken Momo", price=200, menu_item_group=self.momo, image="1.png"
+        )
+        self.veg_momo = MenuItem.objects.create(
+            name="Veg Momo", price=150, menu_item_group=self.momo, image="2.png"
+        )
+
+    def get_changes(self, since=None):
+        params = {} if since is None else {"since": since}
+        response = self.client.get("/api/menu/changes", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_without_token_the_full_catalog_is_sent(self):
+        data = self.get_changes()
+        self.assertTrue(data["full"])
+        self.assertEqual(
+            [item["name"] for item in data["menu_items"]], ["Chicken Momo", "Veg Momo"]
+        )
+        self.assertEqual(len(data["menu_item_groups"]), 1)
+        self.assertEqual(len(data["item_types"]), 1)
+
+    def test_only_changes_since_the_token_are_sent(self):
+        token = self.get_changes()["token"]
+        data = self.get_changes(token)
+        self.assertFalse(data["full"])
+        self.assertEqual(data["menu_items"], [])
+        self.assertEqual(data["menu_item_groups"], [])
+
+        self.veg_momo.price = 160
+        self.veg_momo.save()
+        data = self.get_changes(token)
+        self.assertEqual([item["price"] for item in data["menu_items"]], ["160.00"])
+        self.assertEqual(self.get_changes(data["token"])["menu_items"], [])
+
+    def test_deletes_and_relation_changes_are_sent(self):
+        token = self.get_changes()["token"]
+        veg_momo_id = self.veg_momo.id
+        self.veg_momo.delete()
+        self.spicy.item_types.add(self.chicken_momo)
+        data = self.get_changes(token)
+        self.assertEqual(data["deleted"]["menu_items"], [veg_momo_id])
+        self.assertEqual(
+            [item["item_type"] for item in data["menu_items"]], [[self.spicy.id]]
+        )
+
+        token = data["token"]
+        momo_id = self.momo.id
+        self.momo.delete()
+        data = self.get_changes(token)
+        self.assertEqual(data["deleted"]["menu_item_groups"], [momo_id])
+        self.assertEqual(
+            [item["menu_item_group"] for item in data["menu_items"]], [None]
+        )
+
+    def test_invalid_token_is_rejected(self):
+        response = self.client.get("/api/menu/changes", {"since": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_old_tombstones_are_pruned_by_command(self):
+        veg_momo_id, chicken_momo_id = self.veg_momo.id, self.chicken_momo.id
+        self.veg_momo.delete()
+        self.chicken_momo.delete()
+        CatalogTombstone.objects.filter(object_id=veg_momo_id).update(
+            deleted_at=timezone.datetime(2021, 1, 1)
+        )
+        call_command("prune_tombstones", stdout=open("/dev/null", "w"))
+        self.assertEqual(
+            list(CatalogTombstone.objects.values_list("object_id", flat=True)),
+            [chicken_momo_id],
+        )
@@ -1,9 +1,10 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from item.views import (ItemTypeViewSet, MenuItemViewSet,
-                        OrderNowItemsListView, RecommendedItemsListView,
-                        TopItemsListView, TopRecommendedMenuItemViewSet)
+from item.views import (ItemTypeViewSet, MenuChangesView, MenuItemViewSet,
+                        MenuSearchView, OrderNowItemsListView,
+                        RecommendedItemsListView, TopItemsListView,
+                        TopRecommendedMenuItemViewSet)
 
 router = DefaultRouter()
 router.register("item-type", ItemTypeViewSet, basename="menu-item-type")
@@ -18,6 +19,8 @@ app_name = "item"
 
 urlpatterns += [
     path("order-now-list", OrderNowItemsListView.as_view(), name="order-now-list"),
+    path("menu-search", MenuSearchView.as_view(), name="menu-search"),
+    path("menu/changes", MenuChangesView.as_view(), name="menu-changes"),
     path("top-items", TopItemsListView.as_view(), name="top-items"),
     path("recommended-items", RecommendedItemsListView.as_view(), name="top-items"),
 ]
@@ -1,15 +1,20 @@
-from rest_framework import status, viewsets
+from rest_framework import serializers, status, viewsets
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from item.cache import CatalogConditionalGetMixin, cached_menu_response
+from item.facets import menu_facets
 from item.models import ItemType, MenuItem, TopAndRecommendedItem
+from item.search import get_search_result, menu_search
 from item.serializers import (ItemTypeSerializer, MenuItemPOSTSerializer,
                               MenuItemSerializer, OrderNowListSerializer,
                               TopAndRecommendedMenuItemPostSerializer,
                               TopAndRecommendedMenuItemSerializer)
-from log.models import Log
+from item.sync import get_catalog_changes, parse_sync_token
+from log.writer import write_log
 
 
 class MenuItemViewSet(viewsets.ModelViewSet):
@@ -27,11 +32,52 @@ class MenuItemViewSet(viewsets.ModelViewSet):
             return MenuItemPOSTSerializer
         return super(MenuItemViewSet, self).get_serializer_class()
 
+    def list(self, request, *args, **kwargs):
+        """
+        Filters are answered from the facet index, with counts per facet value
+        ?price_band= e.g. 200-500 or 1000+ is only available here
+        """
+        index = menu_facets.get_index()
+        selection = index.get_selection(request.query_params)
+        if selection is None:
+            response = super(MenuItemViewSet, self).list(request, *args, **kwargs)
+            # counts of the rows the database matched, keeps the response shape
+            response.data["facets"] = index.get_counts(
+                {},
+                index.get_bitset(
+                    self.filter_queryset(self.get_queryset()).values_list(
+                        "id", flat=True
+                    )
+                ),
+            )
+            return response
+        base = None
+        search_filter = SearchFilter()
+        if search_filter.get_search_terms(request):
+            base = index.get_bitset(
+                search_filter.filter_queryset(
+                    request, self.get_queryset(), self
+                ).values_list("id", flat=True)
+            )
+        page = self.paginate_queryset(index.get_ids(index.get_matches(selection, base)))
+        menu_items = (
+            MenuItem.objects.select_related(
+                "menu_item_group", "created_by", "updated_by"
+            )
+            .prefetch_related("item_type")
+            .in_bulk(page)
+        )
+        serializer = self.get_serializer(
+            [menu_items[i] for i in page if i in menu_items], many=True
+        )
+        response = self.get_paginated_response(serializer.data)
+        response.data["facets"] = index.get_counts(selection, base)
+        return response
+
     def destroy(self, request, *args, **kwargs):
         menu_item = self.get_object()
-        menu_item.image.delete()
         menu_item.delete()
-        Log.objects.create(
+        write_log(
             mode="delete",
             actor=request.user,
             detail="Menu item deleted. ({})".format(menu_item.name),
@@ -42,7 +88,8 @@ class MenuItemViewSet(viewsets.ModelViewSet):
         )
 
 
-class ItemTypeViewSet(viewsets.ModelViewSet):
+class ItemTypeViewSet(CatalogConditionalGetMixin, viewsets.ModelViewSet):
+    conditional_actions = ["list"]
     queryset = ItemType.objects.all().order_by("id")
     serializer_class = ItemTypeSerializer
     search_fields = ["name"]
@@ -56,7 +103,6 @@ class ItemTypeViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         item_type = self.get_object()
-        item_type.badge.delete()
         item_type.delete()
         return Response(
             {"message": "Menu item type deleted successfully."},
@@ -64,19 +110,77 @@ class ItemTypeViewSet(viewsets.ModelViewSet):
         )
 
 
-class OrderNowItemsListView(APIView):
+class OrderNowItemsListView(CatalogConditionalGetMixin, APIView):
 
     authentication_classes = ()
     permission_classes = ()
 
     def get(self, request):
-        menu_items = MenuItem.objects.order_by("name")
+        return cached_menu_response(
+            request, "order-now-list", lambda: self.get_menu_data(request)
+        )
+
+    @staticmethod
+    def get_menu_data(request):
+        menu_items = MenuItem.objects.select_related("menu_item_group").order_by("name")
         serializer = OrderNowListSerializer(
             instance=menu_items, many=True, context={"request": request}
         )
-        for item in serializer.data:
+        results = serializer.data
+        for item in results:
             item["avatar"] = item.pop("image")
-        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
+        return {"results": results}
+
+
+class MenuSearchView(APIView):
+    """
+    ?q= matches menu item names, groups, item types, ingredients and
+    descriptions, the last word as a prefix and longer words with typos
+    """
+
+    authentication_classes = ()
+    permission_classes = ()
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(
+                int(request.query_params.get("limit", self.default_limit)),
+                self.max_limit,
+            )
+        except ValueError:
+            limit = self.default_limit
+        documents = menu_search.search(request.query_params.get("q", ""), max(limit, 1))
+        return Response(
+            {
+                "results": [
+                    get_search_result(document, request) for document in documents
+                ]
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class MenuChangesView(APIView):
+    """
+    Delta sync of the catalog, ?since= takes the token of the previous poll
+    Without it, or when it is too old, the full catalog is sent with full true
+    """
+
+    authentication_classes = ()
+    permission_classes = ()
+
+    def get(self, request):
+        since = request.query_params.get("since")
+        if since:
+            try:
+                since = parse_sync_token(since)
+            except (ValueError, OverflowError):
+                raise serializers.ValidationError({"since": "Invalid sync token."})
+        return Response(
+            get_catalog_changes(since or None, request), status=status.HTTP_200_OK
+        )
 
 
 class TopRecommendedMenuItemViewSet(viewsets.ModelViewSet):
@@ -91,18 +195,27 @@ class TopRecommendedMenuItemViewSet(viewsets.ModelViewSet):
         return super(TopRecommendedMenuItemViewSet, self).get_serializer_class()
 
 
+def get_special_items_data(request, **flags):
+    all_items = (
+        TopAndRecommendedItem.objects.filter(**flags)
+        .select_related("menu_item__menu_item_group")
+        .prefetch_related("menu_item__item_type")
+        .order_by("-menu_item__created_at")
+    )
+    serializer = TopAndRecommendedMenuItemSerializer(
+        instance=all_items, many=True, read_only=True, context={"request": request}
+    )
+    return {"results": serializer.data}
+
+
 class TopItemsListView(APIView):
     authentication_classes = ()
     permission_classes = ()
 
     def get(self, request):
-        all_items = TopAndRecommendedItem.objects.filter(top=True).order_by(
-            "-menu_item__created_at"
-        )
-        serializer = TopAndRecommendedMenuItemSerializer(
-            instance=all_items, many=True, read_only=True, context={"request": request}
+        return cached_menu_response(
+            request, "top-items", lambda: get_special_items_data(request, top=True)
         )
-        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
 
 
 class RecommendedItemsListView(APIView):
@@ -110,10 +223,8 @@ class RecommendedItemsListView(APIView):
     permission_classes = ()
 
     def get(self, request):
-        all_items = TopAndRecommendedItem.objects.filter(recommended=True).order_by(
-            "-menu_item__created_at"
-        )
-        serializer = TopAndRecommendedMenuItemSerializer(
-            instance=all_items, many=True, read_only=True, context={"request": request}
+        return cached_menu_response(
+            request,
+            "recommended-items",
+            lambda: get_special_items_data(request, recommended=True),
         )
-        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
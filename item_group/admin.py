@@ -43,7 +43,6 @@ class MenuItemGroupAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
     def delete_model(self, request, obj):
-        obj.image.delete()
         obj.delete()
 
 
@@ -54,5 +54,5 @@ class MenuItemGroup(models.Model):
             raise ValidationError("Image size exceeds max image upload size.")
 
     def delete(self, using=None, keep_parents=False):
-        self.image.delete()
+        self.image.delete(save=False)
         super().delete(using, keep_parents)
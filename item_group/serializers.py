@@ -4,30 +4,34 @@ from rest_framework import serializers
 from backend.settings import ALLOWED_IMAGES_EXTENSIONS, MAX_UPLOAD_IMAGE_SIZE
 from item.models import MenuItem
 from item_group.models import MenuItemGroup
-from log.models import Log
+from log.writer import write_log
 from utils.file import check_size
+from utils.images import ImageSrcsetField
 
 
 class ItemSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(max_length=None, use_url=True)
+    image_srcset = ImageSrcsetField(source="image")
 
     class Meta:
         model = MenuItem
-        fields = ["id", "name", "image", "price", "item_type"]
+        fields = ["id", "name", "image", "image_srcset", "price", "item_type"]
         depth = 1
 
 
 class ItemGroupSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(max_length=None, use_url=True)
+    image_srcset = ImageSrcsetField(source="image")
     menu_items = ItemSerializer(many=True, read_only=True)
 
     class Meta:
         model = MenuItemGroup
-        fields = ["id", "name", "image", "menu_items"]
+        fields = ["id", "name", "image", "image_srcset", "menu_items"]
         depth = 1
 
 
 class MenuItemGroupSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source="image")
     created_at = serializers.SerializerMethodField()
     updated_at = serializers.SerializerMethodField()
 
@@ -69,7 +73,7 @@ class MenuItemGroupPOSTSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data["created_by"] = self.context["request"].user
-        Log.objects.create(
+        write_log(
             mode="create",
             actor=validated_data["created_by"],
             detail="New menu item group added. ({})".format(validated_data["name"]),
@@ -4,11 +4,12 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from item.cache import CatalogConditionalGetMixin, cached_menu_response
 from item_group.models import MenuItemGroup
 from item_group.serializers import (ItemGroupSerializer,
                                     MenuItemGroupPOSTSerializer,
                                     MenuItemGroupSerializer)
-from log.models import Log
+from log.writer import write_log
 
 
 class MenuItemGroupViewSet(viewsets.ModelViewSet):
@@ -31,9 +32,8 @@ class MenuItemGroupViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         menu_item_group = self.get_object()
-        menu_item_group.image.delete()
         menu_item_group.delete()
-        Log.objects.create(
+        write_log(
             mode="delete",
             actor=request.user,
             detail="Menu item group deleted. ({})".format(menu_item_group.name),
@@ -44,19 +44,21 @@ class MenuItemGroupViewSet(viewsets.ModelViewSet):
         )
 
 
-class MenuItemGroupsWithItemListView(APIView):
+class MenuItemGroupsWithItemListView(CatalogConditionalGetMixin, APIView):
     authentication_classes = ()
     permission_classes = ()
 
     def get(self, request):
-        try:
-            menu_item_group = MenuItemGroup.objects.all()
-            serializer = ItemGroupSerializer(
-                instance=menu_item_group, many=True, context={"request": request}
-            )
-            return Response({"results": serializer.data}, status=status.HTTP_200_OK)
-        except MenuItemGroup.DoesNotExist:
-            return Response(
-                {"message": "Menu item group not found."},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+        return cached_menu_response(
+            request, "item-group-with-items", lambda: self.get_menu_data(request)
+        )
+
+    @staticmethod
+    def get_menu_data(request):
+        menu_item_group = MenuItemGroup.objects.prefetch_related(
+            "menu_items__item_type"
+        )
+        serializer = ItemGroupSerializer(
+            instance=menu_item_group, many=True, context={"request": request}
+        )
+        return {"results": serializer.data}
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from log.models import Log
+from log.models import Log, LogArchive
 
 
 class LogAdmin(admin.ModelAdmin):
@@ -13,7 +13,14 @@ class LogAdmin(admin.ModelAdmin):
     list_filter = ("timestamp", "mode")
     date_hierarchy = "timestamp"
     search_fields = ("mode", "actor__username", "detail")
+    list_select_related = ("actor",)
     list_per_page = 10
 
 
+class LogArchiveAdmin(admin.ModelAdmin):
+    list_display = ("month", "rows", "path", "updated_at")
+    readonly_fields = ("month", "rows", "path")
+
+
 admin.site.register(Log, LogAdmin)
+admin.site.register(LogArchive, LogArchiveAdmin)
@@ -0,0 +1,108 @@
+import datetime
+import gzip
+import json
+import os
+
+from django.db import transaction
+
+from backend.settings import LOG_ARCHIVE_DIR, LOG_RETENTION_MONTHS
+from log.models import Log, LogArchive
+
+ARCHIVE_CHUNK_SIZE = 2000
+
+
+def get_retention_cutoff(now, retention_months=LOG_RETENTION_MONTHS):
+    """:returns first day of the oldest month kept in the Log table"""
+    month_index = now.year * 12 + now.month - 1 - retention_months
+    return datetime.datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def get_month_range(month_start):
+    if month_start.month == 12:
+        return month_start, month_start.replace(year=month_start.year + 1, month=1)
+    return month_start, month_start.replace(month=month_start.month + 1)
+
+
+def serialize_log(log):
+    return json.dumps(
+        {
+            "id": log["id"],
+            "mode": log["mode"],
+            "timestamp": log["timestamp"].isoformat(),
+            "actor": log["actor"],
+            "actor_username": log["actor__username"],
+            "detail": log["detail"],
+        }
+    )
+
+
+def archive_month(month_start):
+    """
+    Appends logs of the month to its archive file, then deletes them
+    Rows are only deleted after the file is synced to disk, the file size is
+    recorded in the same transaction. Bytes past it were written by a run
+    that failed before deleting its rows and are dropped, the rows are
+    still in the table and archived again
+    :returns archive of the month, None when the month has no logs
+    """
+    start, end = get_month_range(month_start)
+    logs = Log.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    month = start.strftime("%Y-%m")
+    path = os.path.join(LOG_ARCHIVE_DIR, "logs-{}.jsonl.gz".format(month))
+    os.makedirs(LOG_ARCHIVE_DIR, exist_ok=True)
+
+    archive = LogArchive.objects.filter(month=month).first()
+    archived_size = archive.size if archive is not None else 0
+    if os.path.exists(path) and os.path.getsize(path) > archived_size:
+        os.truncate(path, archived_size)
+
+    archived_ids = []
+    # appending adds a gzip member, readers decompress members back to back
+    with gzip.open(path, "at", encoding="utf-8") as archive_file:
+        for log in (
+            logs.order_by("timestamp", "id")
+            .values("id", "mode", "timestamp", "actor", "actor__username", "detail")
+            .iterator(chunk_size=ARCHIVE_CHUNK_SIZE)
+        ):
+            archive_file.write(serialize_log(log) + "\n")
+            archived_ids.append(log["id"])
+        archive_file.flush()
+        os.fsync(archive_file.fileno())
+    if not archived_ids:
+        return None
+
+    with transaction.atomic():
+        for index in range(0, len(archived_ids), ARCHIVE_CHUNK_SIZE):
+            Log.objects.filter(
+                pk__in=archived_ids[index : index + ARCHIVE_CHUNK_SIZE]
+            ).delete()
+        archive, _ = LogArchive.objects.get_or_create(
+            month=month, defaults={"path": path}
+        )
+        archive.rows += len(archived_ids)
+        archive.path = path
+        archive.size = os.path.getsize(path)
+        archive.save()
+    return archive
+
+
+def archive_old_logs(now, retention_months=LOG_RETENTION_MONTHS):
+    """
+    Moves every month older than the retention out of the Log table
+    :returns archives written to
+    """
+    cutoff = get_retention_cutoff(now, retention_months)
+    months = Log.objects.filter(timestamp__lt=cutoff).dates("timestamp", "month")
+    archives = []
+    for month in months:
+        archive = archive_month(datetime.datetime(month.year, month.month, 1))
+        if archive is not None:
+            archives.append(archive)
+    return archives
+
+
+def read_archive(path):
+    """:returns generator over log dicts of an archive file"""
+    with gzip.open(path, "rt", encoding="utf-8") as archive_file:
+        for line in archive_file:
+            yield json.loads(line)
@@ -0,0 +1,12 @@
+from django_filters import DateTimeFromToRangeFilter, FilterSet
+
+from log.models import Log
+
+
+class LogFilter(FilterSet):
+    # timestamp_after and timestamp_before query parameters
+    timestamp = DateTimeFromToRangeFilter()
+
+    class Meta:
+        model = Log
+        fields = ["mode", "actor", "timestamp"]
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from backend.settings import LOG_RETENTION_MONTHS
+from log.archive import archive_old_logs
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves logs older than the retention period into monthly gzip "
+        "compressed json lines archives. Meant to run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-months", type=int, default=LOG_RETENTION_MONTHS
+        )
+
+    def handle(self, *args, **options):
+        archives = archive_old_logs(
+            timezone.datetime.now(), options["retention_months"]
+        )
+        for archive in archives:
+            self.stdout.write("{} -> {}".format(archive, archive.path))
+        self.stdout.write(
+            self.style.SUCCESS("Archived {} months of logs.".format(len(archives)))
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.4 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("log", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["-timestamp", "-id"], name="log_timestamp_idx"),
+        ),
+    ]
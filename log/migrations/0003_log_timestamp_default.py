@@ -0,0 +1,21 @@
+# Generated by Django 3.1.4 on 2026-10-18 18:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("log", "0002_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="log",
+            name="timestamp",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.1.4 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("log", "0003_log_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LogArchive",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "month",
+                    models.CharField(help_text="YYYY-MM", max_length=7, unique=True),
+                ),
+                ("path", models.CharField(max_length=512)),
+                ("rows", models.PositiveBigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["-month"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["mode", "-timestamp"], name="log_mode_timestamp_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["actor", "-timestamp"], name="log_actor_timestamp_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.1.4 on 2026-10-18 18:52
+
+import os
+
+from django.db import migrations, models
+
+
+def set_archive_sizes(apps, schema_editor):
+    # files written so far belong to committed runs
+    LogArchive = apps.get_model("log", "LogArchive")
+    for archive in LogArchive.objects.all():
+        if os.path.exists(archive.path):
+            archive.size = os.path.getsize(archive.path)
+            archive.save(update_fields=["size"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("log", "0004_log_archive_and_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="logarchive",
+            name="size",
+            field=models.PositiveBigIntegerField(
+                default=0, help_text="Bytes of the file whose rows were deleted"
+            ),
+        ),
+        migrations.RunPython(set_archive_sizes, migrations.RunPython.noop),
+    ]
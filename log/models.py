@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 LOG_MODES_CHOICES = [
     ("create", "Create"),
@@ -13,7 +14,8 @@ LOG_MODES_CHOICES = [
 
 class Log(models.Model):
     mode = models.CharField(max_length=8, choices=LOG_MODES_CHOICES, editable=False)
-    timestamp = models.DateTimeField(auto_now_add=True, editable=False)
+    # set when queued, rows are inserted later by the log writer
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     actor = models.ForeignKey(
         get_user_model(),
         null=True,
@@ -28,3 +30,32 @@ class Log(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["-timestamp", "-id"], name="log_timestamp_idx"),
+            models.Index(fields=["mode", "-timestamp"], name="log_mode_timestamp_idx"),
+            models.Index(
+                fields=["actor", "-timestamp"], name="log_actor_timestamp_idx"
+            ),
+        ]
+
+
+class LogArchive(models.Model):
+    """
+    Month of logs moved out of the Log table into a gzip compressed
+    json lines file under LOG_ARCHIVE_DIR
+    """
+
+    month = models.CharField(max_length=7, unique=True, help_text="YYYY-MM")
+    path = models.CharField(max_length=512)
+    rows = models.PositiveBigIntegerField(default=0)
+    size = models.PositiveBigIntegerField(
+        default=0, help_text="Bytes of the file whose rows were deleted"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, editable=False)
+
+    class Meta:
+        ordering = ["-month"]
+
+    def __str__(self):
+        return "Logs of {}".format(self.month)
@@ -1,16 +1,27 @@
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from log.models import Log
+from log.models import Log, LogArchive
+from utils.serializers import FastListSerializer
 
 
-class LogSerializer(serializers.ModelSerializer):
-    timestamp = serializers.SerializerMethodField()
+class LogActorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = ["id", "username"]
 
-    @staticmethod
-    def get_timestamp(obj):
-        return obj.timestamp.strftime("%b %d, %Y %H:%M:%S")
+
+class LogSerializer(serializers.ModelSerializer):
+    actor = LogActorSerializer(read_only=True)
+    timestamp = serializers.DateTimeField(format="%b %d, %Y %H:%M:%S", read_only=True)
 
     class Meta:
         model = Log
-        depth = 1
+        fields = "__all__"
+        list_serializer_class = FastListSerializer
+
+
+class LogArchiveSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LogArchive
         fields = "__all__"
@@ -1,3 +1,153 @@
-from django.test import TestCase
+import datetime
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from log.archive import archive_old_logs, read_archive
+from log.models import Log, LogArchive
+from log.writer import LogWriter
+
+
+class LogWriterTest(TransactionTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="admin")
+        self.writer = LogWriter(enabled=True, batch_size=2, flush_interval=0.05)
+
+    def tearDown(self):
+        self.writer.stop()
+
+    def test_queued_logs_are_flushed_on_stop(self):
+        for index in range(5):
+            self.writer.write(Log(mode="create", actor=self.user, detail=str(index)))
+        self.writer.stop()
+        self.assertEqual(
+            sorted(Log.objects.values_list("detail", flat=True)),
+            ["0", "1", "2", "3", "4"],
+        )
+
+    def test_logs_are_written_synchronously_after_stop(self):
+        self.writer.stop()
+        self.writer.write(Log(mode="delete", actor=self.user, detail="Removed"))
+        self.assertTrue(Log.objects.filter(detail="Removed").exists())
+
+    def test_writer_follows_the_setting(self):
+        writer = LogWriter(enabled=None, batch_size=2, flush_interval=60)
+        self.addCleanup(writer.stop)
+        writer.write(Log(mode="create", actor=self.user, detail="Sync"))
+        self.assertTrue(Log.objects.filter(detail="Sync").exists())
+        with override_settings(LOG_WRITER_ASYNC=True):
+            writer.write(Log(mode="create", actor=self.user, detail="Queued"))
+        self.assertFalse(Log.objects.filter(detail="Queued").exists())
+        writer.stop()
+        self.assertTrue(Log.objects.filter(detail="Queued").exists())
+
+
+class LogQueryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create(username="admin", is_staff=True)
+        cls.rider = get_user_model().objects.create(username="rider")
+        Log.objects.create(
+            mode="create",
+            actor=cls.admin,
+            detail="Old",
+            timestamp=datetime.datetime(2021, 1, 5),
+        )
+        Log.objects.create(
+            mode="start",
+            actor=cls.rider,
+            detail="Started",
+            timestamp=datetime.datetime(2021, 2, 5),
+        )
+        Log.objects.create(
+            mode="create",
+            actor=cls.admin,
+            detail="New",
+            timestamp=datetime.datetime(2021, 2, 10),
+        )
+
+    def setUp(self):
+        token, _ = Token.objects.get_or_create(user=self.admin)
+        self.client.defaults["HTTP_AUTHORIZATION"] = "Token {}".format(token.key)
+
+    def get_details(self, **params):
+        response = self.client.get("/api/log", params)
+        self.assertEqual(response.status_code, 200)
+        return [log["detail"] for log in response.json()["results"]]
+
+    def test_logs_filter_by_mode_actor_and_time_range(self):
+        self.assertEqual(self.get_details(mode="create"), ["New", "Old"])
+        self.assertEqual(self.get_details(actor=self.rider.pk), ["Started"])
+        self.assertEqual(
+            self.get_details(mode="create", timestamp_after="2021-02-01"), ["New"]
+        )
+
+    def test_log_actor_is_rendered_without_user_row(self):
+        log = self.client.get("/api/log").json()["results"][0]
+        self.assertEqual(log["actor"], {"id": self.admin.pk, "username": "admin"})
+
+
+class LogArchiveTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="admin")
+        self.archive_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch("log.archive.LOG_ARCHIVE_DIR", self.archive_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.archive_dir.cleanup)
+
+    def create_log(self, detail, timestamp):
+        return Log.objects.create(
+            mode="create", actor=self.user, detail=detail, timestamp=timestamp
+        )
+
+    def test_logs_older_than_retention_are_moved_to_monthly_archives(self):
+        self.create_log("January", datetime.datetime(2021, 1, 31, 23))
+        self.create_log("February", datetime.datetime(2021, 2, 1))
+        self.create_log("April", datetime.datetime(2021, 4, 2))
+
+        archives = archive_old_logs(datetime.datetime(2021, 5, 15), 2)
+
+        self.assertEqual(
+            [archive.month for archive in archives], ["2021-01", "2021-02"]
+        )
+        self.assertEqual(list(Log.objects.values_list("detail", flat=True)), ["April"])
+        january = LogArchive.objects.get(month="2021-01")
+        self.assertEqual(january.rows, 1)
+        self.assertEqual(os.path.basename(january.path), "logs-2021-01.jsonl.gz")
+        log = next(read_archive(january.path))
+        self.assertEqual(log["detail"], "January")
+        self.assertEqual(log["actor_username"], "admin")
+
+    def test_archiving_a_month_again_appends_to_its_archive(self):
+        self.create_log("First", datetime.datetime(2021, 1, 1))
+        archive_old_logs(datetime.datetime(2021, 5, 1), 1)
+        self.create_log("Late", datetime.datetime(2021, 1, 2))
+        archive_old_logs(datetime.datetime(2021, 5, 1), 1)
+
+        archive = LogArchive.objects.get(month="2021-01")
+        self.assertEqual(archive.rows, 2)
+        self.assertEqual(
+            [log["detail"] for log in read_archive(archive.path)], ["First", "Late"]
+        )
+
+    def test_rows_of_a_failed_run_are_archived_once(self):
+        self.create_log("First", datetime.datetime(2021, 1, 1))
+        # the file is synced but the process dies before deleting the rows
+        with mock.patch(
+            "log.archive.transaction.atomic", side_effect=RuntimeError("killed")
+        ):
+            with self.assertRaises(RuntimeError):
+                archive_old_logs(datetime.datetime(2021, 5, 1), 1)
+        self.assertTrue(os.listdir(self.archive_dir.name))
+
+        archive_old_logs(datetime.datetime(2021, 5, 1), 1)
+        archive = LogArchive.objects.get(month="2021-01")
+        self.assertEqual(archive.rows, 1)
+        self.assertEqual(
+            [log["detail"] for log in read_archive(archive.path)], ["First"]
+        )
@@ -1,7 +1,10 @@
 from django.urls import path
 
-from log.views import LogsListView
+from log.views import LogArchiveListView, LogsListView
 
 app_name = "log"
 
-urlpatterns = [path("log", LogsListView.as_view(), name="logs-list")]
+urlpatterns = [
+    path("log", LogsListView.as_view(), name="logs-list"),
+    path("log/archives", LogArchiveListView.as_view(), name="log-archives-list"),
+]
@@ -1,21 +1,32 @@
-from rest_framework import status
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAdminUser
-from rest_framework.response import Response
-from rest_framework.views import APIView
 
-from log.models import Log
-from log.serializers import LogSerializer
+from log.filters import LogFilter
+from log.models import Log, LogArchive
+from log.serializers import LogArchiveSerializer, LogSerializer
+from utils.pagination import TimestampCursorPagination
 
 
-class LogsListView(APIView):
+class LogsListView(ListAPIView):
+    """
+    Filter by ?mode=, ?actor=, ?timestamp_after= and ?timestamp_before=
+    Each filter is served by an index ending in timestamp, matching the page order
+    """
+
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAdminUser]
+    serializer_class = LogSerializer
+    queryset = Log.objects.select_related("actor")
+    pagination_class = TimestampCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = LogFilter
+
 
-    @staticmethod
-    def get(request):
-        logs = Log.objects.all().order_by("-timestamp")
-        return Response(
-            {"results": LogSerializer(instance=logs, many=True, read_only=True).data},
-            status=status.HTTP_200_OK,
-        )
+class LogArchiveListView(ListAPIView):
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAdminUser]
+    serializer_class = LogArchiveSerializer
+    queryset = LogArchive.objects.all()
+    pagination_class = None
@@ -0,0 +1,117 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection
+
+from backend.settings import LOG_WRITER_BATCH_SIZE, LOG_WRITER_FLUSH_INTERVAL
+from log.models import Log
+
+logger = logging.getLogger(__name__)
+
+STOP = object()
+
+
+class LogWriter:
+    """
+    Buffers Log rows in process and bulk inserts them from a daemon thread
+    once batch_size rows are queued or flush_interval seconds passed since
+    the first one. Writes synchronously when disabled or stopped,
+    enabled None follows settings.LOG_WRITER_ASYNC
+    """
+
+    def __init__(self, enabled, batch_size, flush_interval):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.queue = None
+        self.thread = None
+        self.pid = None
+        self.stopped = False
+
+    def write(self, log):
+        enabled = settings.LOG_WRITER_ASYNC if self.enabled is None else self.enabled
+        if not enabled or self.stopped:
+            self.save([log])
+            return
+        self.ensure_started()
+        self.queue.put(log)
+
+    def ensure_started(self):
+        """Starts the flush thread, again in every worker forked from a preloaded app"""
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread.is_alive():
+                return
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(
+                target=self.run, name="log-writer", daemon=True
+            )
+            self.pid = os.getpid()
+            self.thread.start()
+
+    def run(self):
+        try:
+            self.process_queue()
+        finally:
+            connection.close()
+
+    def process_queue(self):
+        while True:
+            log = self.queue.get()
+            if log is STOP:
+                return
+            batch = [log]
+            deadline = time.monotonic() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    log = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if log is STOP:
+                    stopping = True
+                    break
+                batch.append(log)
+            self.save(batch)
+            if stopping:
+                return
+
+    @staticmethod
+    def save(batch):
+        close_old_connections()
+        try:
+            Log.objects.bulk_create(batch)
+        except DatabaseError:
+            # one bad row, e.g. an actor deleted meanwhile, must not drop the batch
+            for log in batch:
+                try:
+                    log.save()
+                except DatabaseError:
+                    logger.exception("Could not write log: %s", log.detail)
+
+    def stop(self, timeout=10):
+        """Flushes queued rows, later writes are saved synchronously"""
+        self.stopped = True
+        if (
+            self.thread is not None
+            and self.pid == os.getpid()
+            and self.thread.is_alive()
+        ):
+            self.queue.put(STOP)
+            self.thread.join(timeout)
+
+
+log_writer = LogWriter(None, LOG_WRITER_BATCH_SIZE, LOG_WRITER_FLUSH_INTERVAL)
+atexit.register(log_writer.stop)
+
+
+def write_log(mode, actor, detail):
+    """Queues an audit log entry off the request path"""
+    log_writer.write(Log(mode=mode, actor=actor, detail=detail))
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from media_store.models import MediaBlob
+
+
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ("name", "size", "ref_count", "created_at")
+    search_fields = ("name",)
+    readonly_fields = ("name", "size", "ref_count")
+    list_per_page = 10
+
+
+admin.site.register(MediaBlob, MediaBlobAdmin)
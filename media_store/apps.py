@@ -0,0 +1,5 @@
+from django.apps import AppConfig
+
+
+class MediaStoreConfig(AppConfig):
+    name = "media_store"
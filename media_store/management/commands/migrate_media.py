@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from media_store.storage import BLOBS_DIR, ContentAddressedStorage
+from utils.images import (derivatives_ready, generate_derivatives,
+                          registered_image_fields)
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves media uploaded under random names into content addressed blobs, "
+        "deduplicating identical files. Safe to run again."
+    )
+
+    def handle(self, *args, **options):
+        legacy_files = set()
+        for model, field_name, on_ready in registered_image_fields:
+            storage = model._meta.get_field(field_name).storage
+            if not isinstance(storage, ContentAddressedStorage):
+                continue
+            migrated, missing = [], 0
+            rows = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{"{}__isnull".format(field_name): True})
+                .exclude(**{"{}__startswith".format(field_name): BLOBS_DIR + "/"})
+                .values_list("pk", field_name)
+            )
+            for pk, name in rows.iterator():
+                if not storage.exists(name):
+                    missing += 1
+                    continue
+                with storage.open(name) as legacy_file:
+                    blob_name = storage.save(name, legacy_file)
+                # bypasses signals, so the reference is taken here
+                model.objects.filter(pk=pk).update(**{field_name: blob_name})
+                storage.acquire(blob_name)
+                if not derivatives_ready(blob_name):
+                    generate_derivatives(storage, blob_name)
+                legacy_files.add((storage, name))
+                migrated.append(blob_name)
+            # rows changed without save, on_ready lets synced clients know
+            if migrated and on_ready is not None:
+                on_ready(names=migrated)
+            self.stdout.write(
+                "{}.{}: {} files migrated, {} missing.".format(
+                    model._meta.label, field_name, len(migrated), missing
+                )
+            )
+
+        # legacy names can be shared between rows, remove them once all moved
+        for storage, name in legacy_files:
+            storage.delete(name)
+        self.stdout.write(
+            self.style.SUCCESS("Removed {} legacy files.".format(len(legacy_files)))
+        )
@@ -0,0 +1,36 @@
+# Generated by Django 3.1.4 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaBlob",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("size", models.PositiveBigIntegerField(default=0)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Media Blob",
+                "verbose_name_plural": "Media Blobs",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class MediaBlob(models.Model):
+    """
+    Uploaded file stored once under its content hash
+    ref_count is the number of rows referencing it, the file goes with the last
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+
+    class Meta:
+        verbose_name = "Media Blob"
+        verbose_name_plural = "Media Blobs"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import Counter
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+
+from media_store.models import MediaBlob
+from utils.images import delete_derivatives
+
+BLOBS_DIR = "blobs"
+
+# references taken by save() for the row about to store the name, per thread
+pending_references = threading.local()
+
+
+def get_pending_references():
+    if not hasattr(pending_references, "names"):
+        pending_references.names = Counter()
+    return pending_references.names
+
+
+def get_content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_blob_name(content_hash, name):
+    """:returns blobs/ab/<sha256>.ext, only the extension of name is kept"""
+    _, extension = os.path.splitext(name)
+    return "{}/{}/{}{}".format(
+        BLOBS_DIR, content_hash[:2], content_hash, extension.lower()
+    )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores uploads by content hash, so identical uploads share one file and
+    a file keeps its url for good. Rows referencing a blob are counted by
+    track_blob_references, only the last release removes the file
+    Counts change under a row lock of the blob. save() already takes the
+    reference of the row being saved, so a concurrent release can not remove
+    the file before that row acquires it
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        blob_name = get_blob_name(get_content_hash(content), name)
+        with transaction.atomic():
+            blob, _ = MediaBlob.objects.select_for_update().get_or_create(
+                name=blob_name, defaults={"size": content.size}
+            )
+            MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+            if not self.exists(blob_name):
+                self.write_blob(blob_name, content)
+        get_pending_references()[blob_name] += 1
+        return blob_name
+
+    def write_blob(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        # readers never see a partially written blob
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as blob_file:
+            content.seek(0)
+            for chunk in content.chunks():
+                blob_file.write(chunk)
+        if self.file_permissions_mode is not None:
+            os.chmod(blob_file.name, self.file_permissions_mode)
+        os.replace(blob_file.name, full_path)
+
+    @staticmethod
+    def acquire(name):
+        """
+        Takes one reference of the blob, the one save() took when the name
+        was just saved, files not stored as blobs are skipped
+        """
+        pending = get_pending_references()
+        if pending[name]:
+            pending[name] -= 1
+            return
+        with transaction.atomic():
+            if MediaBlob.objects.select_for_update().filter(name=name).exists():
+                MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1)
+
+    def release_pending(self, name):
+        """Gives back the reference save() took for a row already holding it"""
+        pending = get_pending_references()
+        if pending[name]:
+            pending[name] -= 1
+            self.release(name)
+
+    def release(self, name):
+        """
+        Drops one reference of the blob, removing it with the last one
+        :returns False for files not stored as blobs
+        """
+        with transaction.atomic():
+            try:
+                blob = MediaBlob.objects.select_for_update().get(name=name)
+            except MediaBlob.DoesNotExist:
+                return False
+            if blob.ref_count > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(
+                    ref_count=F("ref_count") - 1
+                )
+                return True
+            blob.delete()
+            super().delete(name)
+        delete_derivatives(name)
+        return True
+
+    def delete(self, name):
+        # files uploaded before blobs are deleted right away, as before
+        if not self.release(name):
+            super().delete(name)
+            delete_derivatives(name)
+
+
+def track_blob_references(model, field_name):
+    """
+    Counts rows of the model referencing each blob: saved rows take a
+    reference, replaced files and deleted rows release theirs, including
+    queryset deletes bypassing Model.delete
+    Delete rows rather than their files, FieldFile.delete() releases through
+    the storage and its save releases the same name again
+    """
+    name_attribute = "_{}_blob_name".format(field_name)
+
+    def get_storage():
+        storage = model._meta.get_field(field_name).storage
+        if isinstance(storage, ContentAddressedStorage):
+            return storage
+        return None
+
+    def remember_name(sender, instance, **kwargs):
+        # raw value, post_init must stay cheap for every loaded row
+        value = instance.__dict__.get(field_name)
+        instance.__dict__[name_attribute] = getattr(value, "name", value)
+
+    def update_references(sender, instance, created, **kwargs):
+        previous_name = instance.__dict__.get(name_attribute)
+        current_name = getattr(instance, field_name).name
+        storage = get_storage()
+        if storage is not None and (created or previous_name != current_name):
+            if current_name:
+                storage.acquire(current_name)
+            if previous_name and not created:
+                storage.release(previous_name)
+        elif storage is not None and current_name:
+            # the same content uploaded again
+            storage.release_pending(current_name)
+        instance.__dict__[name_attribute] = current_name
+
+    def release_deleted(sender, instance, **kwargs):
+        name = getattr(instance, field_name).name
+        storage = get_storage()
+        if storage is not None and name:
+            storage.release(name)
+
+    uid = "blob-references-{}-{}".format(model._meta.label_lower, field_name)
+    post_init.connect(remember_name, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(update_references, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(release_deleted, sender=model, weak=False, dispatch_uid=uid)
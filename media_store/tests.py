@@ -0,0 +1,137 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from item.models import MenuItem
+from item.tests import LOCMEM_CACHES
+from item_group.models import MenuItemGroup
+from media_store.models import MediaBlob
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    @staticmethod
+    def create_image(color):
+        output = io.BytesIO()
+        Image.new("RGB", (20, 20), color).save(output, "PNG")
+        return ContentFile(output.getvalue())
+
+    def create_group(self, name, color):
+        group = MenuItemGroup(name=name)
+        group.image.save("photo.PNG", self.create_image(color), save=False)
+        group.save()
+        return group
+
+    def test_identical_uploads_share_one_blob(self):
+        momo = self.create_group("Momo", "red")
+        pizza = self.create_group("Pizza", "red")
+        self.assertEqual(momo.image.name, pizza.image.name)
+        self.assertTrue(momo.image.name.startswith("blobs/"))
+        self.assertTrue(momo.image.name.endswith(".png"))
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+
+        blob_name = pizza.image.name
+        momo.delete()
+        self.assertTrue(default_storage.exists(blob_name))
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+        pizza.delete()
+        self.assertFalse(default_storage.exists(blob_name))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_api_destroy_releases_a_shared_blob_once(self):
+        momo = self.create_group("Momo", "red")
+        pizza = self.create_group("Pizza", "red")
+        MenuItem.objects.create(
+            name="Momo", price=100, menu_item_group=pizza, image=pizza.image.name
+        )
+        user = get_user_model().objects.create(username="admin", is_staff=True)
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.defaults["HTTP_AUTHORIZATION"] = "Token {}".format(token.key)
+
+        response = self.client.delete("/api/menu-item-group/{}/".format(momo.pk))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+        response = self.client.delete(
+            "/api/menu-item/{}/".format(MenuItem.objects.get().pk)
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+        self.assertTrue(default_storage.exists(pizza.image.name))
+
+    def test_replaced_and_bulk_deleted_files_release_their_blob(self):
+        group = self.create_group("Momo", "red")
+        first_name = group.image.name
+        group = MenuItemGroup.objects.get(pk=group.pk)
+        group.image.save("photo.png", self.create_image("blue"))
+        self.assertFalse(default_storage.exists(first_name))
+
+        # uploading the same content again keeps a single reference
+        group.image.save("photo.png", self.create_image("blue"))
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+
+        MenuItemGroup.objects.all().delete()
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_release_between_save_and_row_save_keeps_the_blob(self):
+        momo = self.create_group("Momo", "red")
+        pizza = MenuItemGroup(name="Pizza")
+        # the upload is stored, then the last other row goes before pizza is saved
+        pizza.image.save("photo.png", self.create_image("red"), save=False)
+        momo.delete()
+        self.assertTrue(default_storage.exists(pizza.image.name))
+        pizza.save()
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+        pizza.delete()
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_legacy_media_is_migrated_to_blobs(self):
+        FileSystemStorage().save("menu_item/Momo/123.png", self.create_image("red"))
+        group = MenuItemGroup.objects.create(
+            name="Momo", image="menu_item/Momo/123.png"
+        )
+        MenuItem.objects.create(
+            name="Momo", price=100, menu_item_group=group, image=group.image.name
+        )
+
+        call_command("migrate_media", stdout=open("/dev/null", "w"))
+
+        group.refresh_from_db()
+        self.assertTrue(group.image.name.startswith("blobs/"))
+        self.assertEqual(MenuItem.objects.get().image.name, group.image.name)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+        self.assertFalse(default_storage.exists("menu_item/Momo/123.png"))
+
+    @mock.patch("item.sync.MENU_SYNC_OVERLAP", 0)
+    def test_migrated_rows_reach_synced_clients(self):
+        FileSystemStorage().save("menu_item/Momo/123.png", self.create_image("red"))
+        group = MenuItemGroup.objects.create(
+            name="Momo", image="menu_item/Momo/123.png"
+        )
+        MenuItem.objects.create(
+            name="Momo", price=100, menu_item_group=group, image=group.image.name
+        )
+        token = self.client.get("/api/menu/changes").json()["token"]
+
+        call_command("migrate_media", stdout=open("/dev/null", "w"))
+
+        data = self.client.get("/api/menu/changes", {"since": token}).json()
+        self.assertEqual(len(data["menu_items"]), 1)
+        self.assertEqual(len(data["menu_item_groups"]), 1)
+        self.assertIn("/blobs/", data["menu_items"][0]["image"])
+        self.assertIn("/blobs/", data["menu_item_groups"][0]["image"])
@@ -0,0 +1,32 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from notification.models import OutgoingEmail
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        "kind",
+        "to",
+        "subject",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+    )
+    list_filter = ("status", "kind", "created_at")
+    search_fields = ("to", "subject")
+    date_hierarchy = "created_at"
+    readonly_fields = ("attempts", "last_error", "sent_at")
+    actions = ["retry_now"]
+    list_per_page = 10
+
+    def retry_now(self, request, queryset):
+        queryset.exclude(status="sent").update(
+            status="pending", next_attempt_at=timezone.datetime.now()
+        )
+
+    retry_now.short_description = "Retry selected emails now"
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
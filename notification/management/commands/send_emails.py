@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.settings import (EMAIL_OUTBOX_BATCH_SIZE,
+                              EMAIL_OUTBOX_MAX_ATTEMPTS,
+                              EMAIL_OUTBOX_POLL_INTERVAL)
+from notification.outbox import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends queued emails in batches over a reused connection. "
+        "Runs once, or keeps polling the outbox with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            "--max-attempts", type=int, default=EMAIL_OUTBOX_MAX_ATTEMPTS
+        )
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=EMAIL_OUTBOX_POLL_INTERVAL,
+            help="Seconds to wait when the outbox is empty.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_emails(
+                options["batch_size"], options["max_attempts"]
+            )
+            if sent or failed:
+                self.stdout.write("Sent {}, failed {} emails.".format(sent, failed))
+            if not options["loop"]:
+                break
+            # keep draining while batches come back full and the backend works
+            if not sent or sent + failed < options["batch_size"]:
+                time.sleep(options["interval"])
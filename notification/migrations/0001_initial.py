@@ -0,0 +1,70 @@
+# Generated by Django 3.1.4 on 2026-10-18 18:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="OutgoingEmail",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=50)),
+                ("subject", models.CharField(max_length=255)),
+                ("body", models.TextField()),
+                ("html_body", models.TextField(blank=True)),
+                ("from_email", models.CharField(blank=True, max_length=255, null=True)),
+                ("to", models.EmailField(max_length=254)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sent", "Sent"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("last_error", models.TextField(blank=True)),
+                (
+                    "sent_at",
+                    models.DateTimeField(blank=True, editable=False, null=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Outgoing Email",
+                "verbose_name_plural": "Outgoing Emails",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="outgoingemail",
+            index=models.Index(
+                condition=models.Q(status="pending"),
+                fields=["next_attempt_at"],
+                name="outgoing_email_due_idx",
+            ),
+        ),
+    ]
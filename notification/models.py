@@ -0,0 +1,45 @@
+from django.db import models
+from django.utils import timezone
+
+EMAIL_STATUS_CHOICES = [
+    ("pending", "Pending"),
+    ("sent", "Sent"),
+    ("failed", "Failed"),
+]
+
+
+class OutgoingEmail(models.Model):
+    """
+    Email queued by a request and delivered later by the send_emails worker
+    Pending mails are due once next_attempt_at passed
+    """
+
+    kind = models.CharField(max_length=50)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, null=True, blank=True)
+    to = models.EmailField()
+    status = models.CharField(
+        max_length=10, choices=EMAIL_STATUS_CHOICES, default="pending"
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Outgoing Email"
+        verbose_name_plural = "Outgoing Emails"
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="outgoing_email_due_idx",
+            )
+        ]
+
+    def __str__(self):
+        return "{} to {}".format(self.kind, self.to)
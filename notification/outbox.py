@@ -0,0 +1,136 @@
+import datetime
+import logging
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from backend.settings import (DEFAULT_FROM_EMAIL, EMAIL_OUTBOX_BATCH_SIZE,
+                              EMAIL_OUTBOX_CLAIM_TIMEOUT,
+                              EMAIL_OUTBOX_MAX_ATTEMPTS,
+                              EMAIL_OUTBOX_RETRY_DELAY)
+from notification.models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(kind, subject, template, context, to):
+    """
+    Renders the mail now, so templates see the state at request time
+    :returns queued outgoing email
+    """
+    html_body = render_to_string(template, context)
+    return OutgoingEmail.objects.create(
+        kind=kind,
+        subject=subject,
+        body=strip_tags(html_body).strip(),
+        html_body=html_body,
+        from_email=DEFAULT_FROM_EMAIL,
+        to=to,
+    )
+
+
+def queue_order_confirmation(order):
+    """:returns queued confirmation mail, None when the order has no email"""
+    if not order.custom_email:
+        return None
+    cart_items = order.cart_items.select_related("item")
+    return queue_email(
+        "order_confirmation",
+        "Order #{} confirmed".format(order.pk),
+        "order_confirmation.html",
+        {"order": order, "cart_items": cart_items},
+        order.custom_email,
+    )
+
+
+def get_retry_delay(attempts):
+    """:returns seconds to wait before the next attempt, doubled every attempt"""
+    return EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def claim_due_emails(batch_size):
+    """
+    Pushes next_attempt_at of due mails past the claim timeout, so
+    concurrent workers skip them and mails of a crashed worker are retried
+    :returns claimed mails
+    """
+    now = timezone.datetime.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + datetime.timedelta(seconds=EMAIL_OUTBOX_CLAIM_TIMEOUT)
+        )
+    return emails
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject,
+        email.body,
+        email.from_email,
+        [email.to],
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+    return message
+
+
+def record_failure(email, error, max_attempts):
+    """Counts the attempt and schedules the retry, or gives up on the mail"""
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = "failed"
+    email.next_attempt_at = timezone.datetime.now() + datetime.timedelta(
+        seconds=get_retry_delay(email.attempts)
+    )
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def send_queued_emails(
+    batch_size=EMAIL_OUTBOX_BATCH_SIZE, max_attempts=EMAIL_OUTBOX_MAX_ATTEMPTS
+):
+    """
+    Sends one batch of due mails over a single backend connection
+    Failed mails are retried with exponential backoff until max_attempts,
+    when the connection can not be opened the whole batch failed
+    :returns number of sent and failed attempts
+    """
+    emails = claim_due_emails(batch_size)
+    if not emails:
+        return 0, 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        logger.warning("Could not connect to the email backend: %s", error)
+        for email in emails:
+            record_failure(email, error, max_attempts)
+        return 0, len(emails)
+
+    sent, failed = 0, 0
+    try:
+        for email in emails:
+            try:
+                build_message(email, connection).send()
+            except Exception as error:
+                logger.warning("Could not send email #%s: %s", email.pk, error)
+                record_failure(email, error, max_attempts)
+                failed += 1
+            else:
+                email.attempts += 1
+                email.status = "sent"
+                email.sent_at = timezone.datetime.now()
+                email.save(update_fields=["attempts", "status", "sent_at"])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,99 @@
+import datetime
+from smtplib import SMTPException
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from cart.models import Order
+from notification.models import OutgoingEmail
+from notification.outbox import queue_email, send_queued_emails
+
+
+class EmailOutboxTest(TestCase):
+    def queue_test_email(self, to="customer@test.com"):
+        return queue_email(
+            "reset_password",
+            "Reset user password",
+            "reset_email.html",
+            {"user": "customer", "domain": "testserver", "code": "1234"},
+            to,
+        )
+
+    def test_reset_password_request_queues_email_instead_of_sending(self):
+        get_user_model().objects.create(username="customer", email="c@test.com")
+        response = self.client.post("/api/user/reset-password", {"email": "c@test.com"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.kind, email.to), ("reset_password", "c@test.com"))
+
+        self.assertEqual(send_queued_emails(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ["c@test.com"])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        email.refresh_from_db()
+        self.assertEqual(email.status, "sent")
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+    def test_batch_is_sent_over_one_connection(self):
+        for index in range(3):
+            self.queue_test_email("customer{}@test.com".format(index))
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.open"
+        ) as open_connection:
+            self.assertEqual(send_queued_emails(batch_size=2), (2, 0))
+        open_connection.assert_called_once()
+        self.assertEqual(send_queued_emails(batch_size=2), (1, 0))
+
+    def test_failed_email_is_retried_with_backoff_until_max_attempts(self):
+        email = self.queue_test_email()
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=SMTPException("Connection unexpectedly closed"),
+        ):
+            with self.assertLogs("notification.outbox", "WARNING"):
+                self.assertEqual(send_queued_emails(max_attempts=2), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ("pending", 1))
+            self.assertGreater(email.next_attempt_at, timezone.datetime.now())
+            # not due before the backoff passed
+            self.assertEqual(send_queued_emails(max_attempts=2), (0, 0))
+
+            OutgoingEmail.objects.update(
+                next_attempt_at=timezone.datetime.now() - datetime.timedelta(1)
+            )
+            with self.assertLogs("notification.outbox", "WARNING"):
+                self.assertEqual(send_queued_emails(max_attempts=2), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("failed", 2))
+        self.assertIn("unexpectedly closed", email.last_error)
+
+    def test_connection_failure_backs_off_the_whole_batch(self):
+        emails = [
+            self.queue_test_email("customer{}@test.com".format(i)) for i in range(2)
+        ]
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.open",
+            side_effect=SMTPException("Authentication failed"),
+        ):
+            with self.assertLogs("notification.outbox", "WARNING"):
+                self.assertEqual(send_queued_emails(), (0, 2))
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ("pending", 1))
+            self.assertIn("Authentication failed", email.last_error)
+            self.assertGreater(email.next_attempt_at, timezone.datetime.now())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_order_done_queues_confirmation_to_custom_email(self):
+        order = Order.objects.create(
+            custom_email="guest@test.com", custom_contact="+9779841000000"
+        )
+        self.client.patch("/api/done-from-customer/{}".format(order.pk))
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(
+            (email.kind, email.to), ("order_confirmation", "guest@test.com")
+        )
+        self.assertIn("#{}".format(order.pk), email.body)
@@ -9,6 +9,8 @@ from phonenumber_field.modelfields import PhoneNumberField
 
 from backend.settings import ALLOWED_IMAGES_EXTENSIONS, MAX_UPLOAD_IMAGE_SIZE
 from item.models import MenuItem
+from media_store.storage import track_blob_references
+from utils.images import register_image_derivatives
 
 
 def upload_review_image_to(instance, filename):
@@ -52,5 +54,9 @@ class Review(models.Model):
             raise ValidationError("Image size exceeds max image upload size.")
 
     def delete(self, using=None, keep_parents=False):
-        self.image.delete()
+        self.image.delete(save=False)
         super().delete(using, keep_parents)
+
+
+register_image_derivatives(Review, "image")
+track_blob_references(Review, "image")
@@ -5,9 +5,11 @@ from rest_framework import serializers
 from backend.settings import ALLOWED_IMAGES_EXTENSIONS, MAX_UPLOAD_IMAGE_SIZE
 from reviews.models import Review
 from utils.file import check_size
+from utils.images import ImageSrcsetField
 
 
 class ReviewSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source="image")
     reviewed_at = serializers.SerializerMethodField()
     updated_at = serializers.SerializerMethodField()
 
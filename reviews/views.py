@@ -16,7 +16,6 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         review = self.get_object()
-        review.image.delete()
         review.delete()
         return Response(
             {"message": "Menu item type deleted successfully."},
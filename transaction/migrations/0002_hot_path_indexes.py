@@ -0,0 +1,19 @@
+# Generated by Django 3.1.4 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transaction", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="transaction_created_idx"
+            ),
+        ),
+    ]
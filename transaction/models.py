@@ -21,6 +21,9 @@ class Transaction(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="transaction_created_idx")
+        ]
 
     def __str__(self):
         return "{} -- Transaction #{}".format(self.order.created_by, self.pk)
@@ -1,11 +1,14 @@
+from django.db.models import Prefetch
 from rest_framework import status, viewsets
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
+from cart.models import Order
 from transaction.models import Transaction
 from transaction.serializers import (TransactionPOSTSerializer,
                                      TransactionSerializer)
+from utils.pagination import CreatedAtCursorPagination
 
 
 class TransactionViewSet(viewsets.ModelViewSet):
@@ -13,6 +16,14 @@ class TransactionViewSet(viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAdminUser]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        if self.action in ["list", "retrieve"]:
+            return self.queryset.select_related("created_by").prefetch_related(
+                Prefetch("order", queryset=Order.objects.with_cart_items())
+            )
+        return super(TransactionViewSet, self).get_queryset()
 
     def get_serializer_class(self):
         if self.action == "create" or self.action == "update":
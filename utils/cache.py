@@ -0,0 +1,156 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from utils.metrics import increment
+
+
+def get_version_key(namespace):
+    return "version:{}".format(namespace)
+
+
+def get_modified_key(namespace):
+    return "modified:{}".format(namespace)
+
+
+def get_cache_version(namespace):
+    """
+    :returns current version counter of the namespace
+    Counter is seeded from the clock so that an evicted counter
+    never falls back to a version that older snapshots were stored with
+    """
+    key = get_version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key, int(time.time() * 1000))
+    return version
+
+
+def bump_cache_version(namespace):
+    """Invalidates every snapshot stored against the namespace"""
+    key = get_version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), timeout=None)
+    # whole seconds as in Last-Modified, past the previous change and rounded
+    # up, so a client that saw the previous change never matches this one
+    modified_key = get_modified_key(namespace)
+    modified = int(time.time()) + 1
+    previous = cache.get(modified_key)
+    if previous is not None:
+        modified = max(modified, previous + 1)
+    cache.set(modified_key, modified, timeout=None)
+
+
+def get_cache_modified(namespace):
+    """:returns unix time of the last change in the namespace, None if unknown"""
+    return cache.get(get_modified_key(namespace))
+
+
+def invalidate_namespace(namespace):
+    """
+    Bumps namespace version now and once more after the running transaction
+    commits, so that a snapshot rebuilt in between can not outlive the change
+    """
+    bump_cache_version(namespace)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: bump_cache_version(namespace))
+
+
+def cached_json_response(request, key, build_data, timeout=None):
+    """
+    Serves pre-rendered json bytes stored under key
+    build_data is only called on cache miss or for non json renderers
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    if renderer is not None and renderer.format != "json":
+        return Response(build_data())
+
+    content = cache.get(key)
+    cache_name = key.split(":", 1)[0]
+    if content is None:
+        increment("cache_requests_total", cache=cache_name, result="miss")
+        content = JSONRenderer().render(build_data())
+        cache.set(key, content, timeout)
+    else:
+        increment("cache_requests_total", cache=cache_name, result="hit")
+    return HttpResponse(content, content_type="application/json")
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET and HEAD with 304 Not Modified while the client still holds
+    the current response, checked before the view runs any query
+    The validator is the version of cache_namespace, limited to
+    conditional_actions on viewsets
+    """
+
+    cache_namespace = None
+    conditional_actions = None
+    etag = None
+    last_modified = None
+
+    def get_validator(self, request):
+        """:returns (version, unix time of the last change or None)"""
+        return (
+            get_cache_version(self.cache_namespace),
+            get_cache_modified(self.cache_namespace),
+        )
+
+    def get_etag(self, request, version):
+        """Responses also differ by renderer, host of absolute urls and query"""
+        validator = "{}:{}:{}:{}".format(
+            version,
+            request.accepted_renderer.format,
+            request.build_absolute_uri("/"),
+            request.get_full_path(),
+        )
+        return '"{}"'.format(hashlib.md5(validator.encode()).hexdigest())
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in ("GET", "HEAD"):
+            return
+        if (
+            self.conditional_actions is not None
+            and getattr(self, "action", None) not in self.conditional_actions
+        ):
+            return
+        version, self.last_modified = self.get_validator(request)
+        self.etag = self.get_etag(request, version)
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.etag is not None and response.status_code in (200, 304):
+            response["ETag"] = self.etag
+            if self.last_modified is not None:
+                response["Last-Modified"] = http_date(self.last_modified)
+            # shared caches may keep it but have to revalidate every time
+            patch_cache_control(response, public=True, no_cache=True)
+            patch_vary_headers(response, ["Accept"])
+        return response
@@ -1,3 +1,4 @@
+import decimal
 import os
 
 from django.utils import timezone
@@ -27,3 +28,11 @@ def get_loyalty_discount(total_price):
         return 15
     else:
         return 0
+
+
+def get_grand_total(total_price, delivery_charge, loyalty_discount):
+    return (
+        total_price
+        + delivery_charge
+        - decimal.Decimal(loyalty_discount / 100) * total_price
+    )
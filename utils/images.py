@@ -0,0 +1,197 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+from backend.settings import (IMAGE_DERIVATIVE_FORMATS,
+                              IMAGE_DERIVATIVE_QUALITY,
+                              IMAGE_DERIVATIVE_WIDTHS)
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = "derivatives"
+PIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+
+# (model, field name, on_ready) of every image field with derivatives
+registered_image_fields = []
+
+# derivatives keep their derived names, whatever storage holds the originals
+derivative_storage = FileSystemStorage()
+
+
+def get_derivative_name(name, width, image_format):
+    """
+    menu_item/Momo/123.png -> menu_item/Momo/derivatives/123-320w.webp
+    Names only depend on the original, so no lookup is needed to build urls
+    """
+    directory, filename = os.path.split(name)
+    stem, _ = os.path.splitext(filename)
+    return os.path.join(
+        directory,
+        DERIVATIVES_DIR,
+        "{}-{}w.{}".format(stem, width, image_format),
+    )
+
+
+def get_derivative_names(name):
+    return [
+        get_derivative_name(name, width, image_format)
+        for width in IMAGE_DERIVATIVE_WIDTHS
+        for image_format in IMAGE_DERIVATIVE_FORMATS
+    ]
+
+
+def derivatives_ready(name):
+    """Derivatives are written in order, the last one marks the set complete"""
+    return derivative_storage.exists(get_derivative_names(name)[-1])
+
+
+def encode_derivative(image, width, image_format):
+    """:returns bytes of the image scaled down to width, never scaled up"""
+    derivative = image.copy()
+    derivative.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+    if image_format == "jpeg" and derivative.mode != "RGB":
+        # jpeg has no alpha channel, flatten transparent images on white
+        background = Image.new("RGB", derivative.size, "white")
+        rgba = derivative.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        derivative = background
+    output = io.BytesIO()
+    derivative.save(
+        output,
+        PIL_FORMATS[image_format],
+        quality=IMAGE_DERIVATIVE_QUALITY,
+        optimize=image_format == "jpeg",
+        method=4 if image_format == "webp" else 0,
+    )
+    return output.getvalue()
+
+
+def generate_derivatives(storage, name):
+    """
+    Writes every configured width and format of the image next to it
+    :returns True when derivatives were written
+    """
+    if not storage.exists(name):
+        logger.info("Skipping derivatives of missing image %s", name)
+        return False
+    try:
+        with storage.open(name) as image_file:
+            image = Image.open(image_file)
+            # first frame of animated images, rotated as the camera took it
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                has_alpha = "A" in image.getbands() or "transparency" in image.info
+                image = image.convert("RGBA" if has_alpha else "RGB")
+            for width in IMAGE_DERIVATIVE_WIDTHS:
+                for image_format in IMAGE_DERIVATIVE_FORMATS:
+                    derivative_name = get_derivative_name(name, width, image_format)
+                    # storages pick another name instead of overwriting
+                    derivative_storage.delete(derivative_name)
+                    derivative_storage.save(
+                        derivative_name,
+                        ContentFile(encode_derivative(image, width, image_format)),
+                    )
+    except (OSError, UnidentifiedImageError):
+        logger.warning("Could not generate derivatives of %s", name, exc_info=True)
+        return False
+    return True
+
+
+def delete_derivatives(name):
+    for derivative_name in get_derivative_names(name):
+        derivative_storage.delete(derivative_name)
+
+
+class DerivativeQueue:
+    """
+    Generates derivatives on a single background thread per process,
+    so uploads return before Pillow is done. Runs inline when disabled,
+    enabled None follows settings.IMAGE_DERIVATIVES_ASYNC
+    """
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+
+    def submit(self, function, *args):
+        enabled = (
+            settings.IMAGE_DERIVATIVES_ASYNC if self.enabled is None else self.enabled
+        )
+        if not enabled:
+            function(*args)
+            return
+        with self.lock:
+            # workers forked from a preloaded app need their own thread
+            if self.pid != os.getpid():
+                self.executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="image-derivatives"
+                )
+                self.pid = os.getpid()
+        self.executor.submit(function, *args)
+
+
+derivative_queue = DerivativeQueue(None)
+
+
+def process_image(storage, name, on_ready):
+    if generate_derivatives(storage, name) and on_ready is not None:
+        on_ready(names=[name])
+
+
+def register_image_derivatives(model, field_name, on_ready=None):
+    """
+    Generates derivatives of the image field whenever an instance is saved
+    with an image lacking them
+    on_ready(names=...) is called with the image names once derivatives
+    exist, e.g. to expire cached urls
+    """
+
+    def schedule_derivatives(sender, instance, **kwargs):
+        image = getattr(instance, field_name)
+        if image and not derivatives_ready(image.name):
+            derivative_queue.submit(process_image, image.storage, image.name, on_ready)
+
+    registered_image_fields.append((model, field_name, on_ready))
+    post_save.connect(
+        schedule_derivatives,
+        sender=model,
+        weak=False,
+        dispatch_uid="image-derivatives-{}-{}".format(
+            model._meta.label_lower, field_name
+        ),
+    )
+
+
+class ImageSrcsetField(serializers.ReadOnlyField):
+    """
+    Derivative urls of an image field by format and width, e.g.
+    {"webp": {"160w": url, ...}, "jpeg": {...}}
+    None until the background worker produced them
+    """
+
+    def to_representation(self, image):
+        if not image or not derivatives_ready(image.name):
+            return None
+        request = self.context.get("request", None)
+        srcset = {}
+        for image_format in IMAGE_DERIVATIVE_FORMATS:
+            srcset[image_format] = {}
+            for width in IMAGE_DERIVATIVE_WIDTHS:
+                url = derivative_storage.url(
+                    get_derivative_name(image.name, width, image_format)
+                )
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                srcset[image_format]["{}w".format(width)] = url
+        return srcset
@@ -0,0 +1,191 @@
+import logging
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = "metrics"
+# upper bounds in milliseconds, requests above the last one fall into +Inf
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+PROMETHEUS_NAMESPACE = "foodswipe"
+COUNTERS = {
+    "orders_created_total": "Orders initialized by customers.",
+    "orders_done_total": "Orders marked done from customer.",
+    "kot_batches_generated_total": "KOT batches sent to the kitchen.",
+    "deliveries_started_total": "Orders whose delivery started.",
+    "deliveries_completed_total": "Orders marked delivered.",
+    "login_attempts_total": "Login attempts by result.",
+    "cache_requests_total": "Snapshot cache lookups by cache and result.",
+}
+
+
+def get_metrics_connection():
+    """
+    Metrics live in redis so that every gunicorn worker adds to the same numbers
+    :returns redis connection, None when the default cache is not redis
+    """
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        return None
+
+
+def get_request_key(view_name):
+    return "{}:request:{}".format(METRICS_PREFIX, view_name)
+
+
+def get_counter_key(name):
+    return "{}:counter:{}".format(METRICS_PREFIX, name)
+
+
+def format_labels(labels):
+    """:returns prometheus label set like `result="success"` sorted by label name"""
+    return ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in sorted(labels.items())
+    )
+
+
+def increment(name, amount=1, **labels):
+    """Adds amount to the counter, one series per distinct label set"""
+    connection = get_metrics_connection()
+    if connection is None:
+        return
+    try:
+        connection.hincrby(get_counter_key(name), format_labels(labels), amount)
+    except RedisError:
+        logger.debug("Could not increment counter %s", name)
+
+
+def get_latency_bucket(duration):
+    for bucket in LATENCY_BUCKETS:
+        if duration <= bucket:
+            return str(bucket)
+    return "+Inf"
+
+
+def observe_request(view_name, duration, queries_count, sql_duration):
+    """Adds one request of the view to its latency histogram"""
+    connection = get_metrics_connection()
+    if connection is None:
+        return
+    key = get_request_key(view_name)
+    try:
+        pipeline = connection.pipeline(transaction=False)
+        pipeline.sadd(get_request_key("views"), view_name)
+        pipeline.hincrby(key, "count", 1)
+        pipeline.hincrby(key, "queries_sum", queries_count)
+        pipeline.hincrbyfloat(key, "duration_sum", duration)
+        pipeline.hincrbyfloat(key, "sql_duration_sum", sql_duration)
+        pipeline.hincrby(key, "bucket:{}".format(get_latency_bucket(duration)), 1)
+        pipeline.execute()
+    except RedisError:
+        logger.debug("Could not record request metrics of %s", view_name)
+
+
+def get_request_metrics():
+    """
+    :returns per view request count, duration, query and sql duration sums
+    with cumulative latency buckets
+    """
+    connection = get_metrics_connection()
+    if connection is None:
+        return []
+    view_names = sorted(
+        view_name.decode()
+        for view_name in connection.smembers(get_request_key("views"))
+    )
+    pipeline = connection.pipeline(transaction=False)
+    for view_name in view_names:
+        pipeline.hgetall(get_request_key(view_name))
+
+    metrics = []
+    for view_name, values in zip(view_names, pipeline.execute()):
+        values = {field.decode(): value for field, value in values.items()}
+        cumulative_count = 0
+        buckets = {}
+        for bucket in [str(bucket) for bucket in LATENCY_BUCKETS] + ["+Inf"]:
+            cumulative_count += int(values.get("bucket:{}".format(bucket), 0))
+            buckets[bucket] = cumulative_count
+        metrics.append(
+            {
+                "view": view_name,
+                "count": int(values.get("count", 0)),
+                "queries_sum": int(values.get("queries_sum", 0)),
+                "duration_sum": float(values.get("duration_sum", 0)),
+                "sql_duration_sum": float(values.get("sql_duration_sum", 0)),
+                "buckets": buckets,
+            }
+        )
+    return metrics
+
+
+def get_counters():
+    """:returns every counter series as {name: {labels: value}}"""
+    connection = get_metrics_connection()
+    if connection is None:
+        return {}
+    pipeline = connection.pipeline(transaction=False)
+    for name in COUNTERS:
+        pipeline.hgetall(get_counter_key(name))
+    return {
+        name: {labels.decode(): int(value) for labels, value in series.items()}
+        for name, series in zip(COUNTERS, pipeline.execute())
+    }
+
+
+def format_sample(metric, labels, value):
+    return "{}{} {}".format(metric, "{{{}}}".format(labels) if labels else "", value)
+
+
+def render_prometheus():
+    """:returns counters and per view request metrics in prometheus text format"""
+    lines = []
+    for name, series in get_counters().items():
+        metric = "{}_{}".format(PROMETHEUS_NAMESPACE, name)
+        lines.append("# HELP {} {}".format(metric, COUNTERS[name]))
+        lines.append("# TYPE {} counter".format(metric))
+        for labels, value in sorted(series.items()):
+            lines.append(format_sample(metric, labels, value))
+
+    request_metrics = get_request_metrics()
+    duration = "{}_request_duration_seconds".format(PROMETHEUS_NAMESPACE)
+    lines.append("# HELP {} Request wall time per view.".format(duration))
+    lines.append("# TYPE {} histogram".format(duration))
+    for view in request_metrics:
+        labels = format_labels({"view": view["view"]})
+        for bucket, count in view["buckets"].items():
+            le = bucket if bucket == "+Inf" else int(bucket) / 1000
+            lines.append(
+                format_sample(
+                    duration + "_bucket", '{},le="{}"'.format(labels, le), count
+                )
+            )
+        lines.append(
+            format_sample(duration + "_sum", labels, view["duration_sum"] / 1000)
+        )
+        lines.append(format_sample(duration + "_count", labels, view["count"]))
+
+    summaries = [
+        (
+            "request_sql_duration_seconds",
+            "Request sql time per view.",
+            "sql_duration_sum",
+            1000,
+        ),
+        ("request_queries", "Sql queries issued per view.", "queries_sum", 1),
+    ]
+    for name, help_text, field, divisor in summaries:
+        metric = "{}_{}".format(PROMETHEUS_NAMESPACE, name)
+        lines.append("# HELP {} {}".format(metric, help_text))
+        lines.append("# TYPE {} summary".format(metric))
+        for view in request_metrics:
+            labels = format_labels({"view": view["view"]})
+            lines.append(format_sample(metric + "_sum", labels, view[field] / divisor))
+            lines.append(format_sample(metric + "_count", labels, view["count"]))
+    return "\n".join(lines) + "\n"
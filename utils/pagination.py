@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination
+
+from backend.settings import (CURSOR_PAGINATION_MAX_PAGE_SIZE,
+                              CURSOR_PAGINATION_PAGE_SIZE)
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over creation time, newest first
+    Pages cost the same regardless of how deep the client scrolls
+    """
+
+    page_size = CURSOR_PAGINATION_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = CURSOR_PAGINATION_MAX_PAGE_SIZE
+    # id keeps the order stable between rows sharing a timestamp
+    ordering = ("-created_at", "-id")
+
+
+class TimestampCursorPagination(CreatedAtCursorPagination):
+    ordering = ("-timestamp", "-id")
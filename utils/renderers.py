@@ -0,0 +1,25 @@
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets views accept `text/event-stream` requests
+    Such views stream their own body, nothing is rendered here
+    """
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class PlainTextRenderer(BaseRenderer):
+    """Passes already rendered text, e.g. prometheus metrics, through"""
+
+    media_type = "text/plain"
+    format = "txt"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data if isinstance(data, str) else str(data)
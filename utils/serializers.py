@@ -0,0 +1,216 @@
+import datetime
+import re
+from functools import lru_cache
+from operator import attrgetter
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import ISO_8601, api_settings
+
+# marks fields the full DRF path skipped, see SkipField
+SKIP = object()
+
+NUMBER_DIRECTIVES = {
+    "%Y": "{0.year}",
+    "%m": "{0.month:02d}",
+    "%d": "{0.day:02d}",
+    "%H": "{0.hour:02d}",
+    "%M": "{0.minute:02d}",
+    "%S": "{0.second:02d}",
+    "%%": "%",
+}
+DIRECTIVE = re.compile(r"(%.)")
+
+
+@lru_cache(maxsize=None)
+def get_datetime_formatter(output_format):
+    """
+    :returns function giving the same string as strftime(output_format)
+    Numbers and month names are formatted without strftime, the slow part
+    of serializing dates, any other directive falls back to strftime
+    """
+    template = []
+    for part in DIRECTIVE.split(output_format):
+        if part in NUMBER_DIRECTIVES:
+            template.append(NUMBER_DIRECTIVES[part])
+        elif part == "%b":
+            template.append("{1}")
+        elif DIRECTIVE.match(part):
+            return lambda value: value.strftime(output_format)
+        else:
+            template.append(part.replace("{", "{{").replace("}", "}}"))
+    template = "".join(template)
+    # month names as strftime gives them in this process
+    months = [""] + [
+        datetime.date(2000, month, 1).strftime("%b") for month in range(1, 13)
+    ]
+    return lambda value: template.format(value, months[value.month])
+
+
+def get_converter(field):
+    """:returns field.to_representation, or a cheaper equivalent"""
+    to_representation = type(field).to_representation
+    if to_representation is serializers.CharField.to_representation:
+        return str
+    if to_representation is serializers.IntegerField.to_representation:
+        return int
+    if to_representation is serializers.BooleanField.to_representation:
+        return (
+            lambda value: value
+            if type(value) is bool
+            else field.to_representation(value)
+        )
+    if to_representation is serializers.DateTimeField.to_representation:
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        field_timezone = getattr(field, "timezone", field.default_timezone())
+        if (
+            isinstance(output_format, str)
+            and output_format.lower() != ISO_8601
+            and field_timezone is None
+        ):
+            formatter = get_datetime_formatter(output_format)
+            return lambda value: (
+                formatter(value)
+                if type(value) is datetime.datetime and value.tzinfo is None
+                else field.to_representation(value)
+            )
+    return field.to_representation
+
+
+def get_model_attributes(serializer):
+    """
+    :returns model attributes read without surprises: fields, forward
+    relations and reverse many relations, never a missing one to one
+    """
+    model = getattr(getattr(serializer, "Meta", None), "model", None)
+    if model is None:
+        return {}
+    attributes = {}
+    for model_field in model._meta.get_fields():
+        if not model_field.auto_created or model_field.concrete:
+            attributes[model_field.name] = model_field
+        elif model_field.one_to_many or model_field.many_to_many:
+            attributes[model_field.get_accessor_name()] = model_field
+    return attributes
+
+
+def compile_fallback(field):
+    """The full DRF path, for fields without a compiled getter"""
+
+    def represent(instance):
+        try:
+            attribute = field.get_attribute(instance)
+        except SkipField:
+            return SKIP
+        check_for_none = (
+            attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+        )
+        return None if check_for_none is None else field.to_representation(attribute)
+
+    return represent
+
+
+def compile_field(field, model_attributes):
+    """:returns function of an instance giving the representation of field"""
+    if isinstance(field, serializers.SerializerMethodField):
+        return getattr(field.parent, field.method_name)
+    if len(field.source_attrs) != 1 or field.source_attrs[0] not in model_attributes:
+        return compile_fallback(field)
+    source = field.source_attrs[0]
+    model_field = model_attributes[source]
+
+    if isinstance(field, serializers.ManyRelatedField):
+        child_relation = field.child_relation
+        if not (
+            type(child_relation) is serializers.PrimaryKeyRelatedField
+            and child_relation.pk_field is None
+        ):
+            return compile_fallback(field)
+        return lambda instance: (
+            [related.pk for related in getattr(instance, source).all()]
+            if instance.pk is not None
+            else []
+        )
+
+    if isinstance(field, serializers.ListSerializer):
+        represent_child = compile_serializer(field.child)
+
+        def represent_many(instance):
+            data = getattr(instance, source)
+            iterable = data.all() if isinstance(data, models.Manager) else data
+            return [represent_child(item) for item in iterable]
+
+        return represent_many
+
+    if isinstance(field, serializers.BaseSerializer):
+        represent_related = compile_serializer(field)
+        get_related = attrgetter(source)
+
+        def represent_one(instance):
+            related = get_related(instance)
+            return None if related is None else represent_related(related)
+
+        return represent_one
+
+    if (
+        type(field) is serializers.PrimaryKeyRelatedField
+        and field.pk_field is None
+        and field.use_pk_only_optimization()
+        and model_field.concrete
+    ):
+        # the id column, without loading the related row
+        return attrgetter(model_field.attname)
+
+    if isinstance(field, serializers.RelatedField):
+        return compile_fallback(field)
+
+    get_value = attrgetter(source)
+    convert = get_converter(field)
+
+    def represent_value(instance):
+        value = get_value(instance)
+        return None if value is None else convert(value)
+
+    return represent_value
+
+
+def compile_serializer(serializer):
+    """
+    :returns function of an instance giving serializer.to_representation,
+    field lookups and conversions are resolved once instead of per row
+    """
+    if (
+        type(serializer).to_representation
+        is not serializers.Serializer.to_representation
+    ):
+        return serializer.to_representation
+    model_attributes = get_model_attributes(serializer)
+    fields = [
+        (field.field_name, compile_field(field, model_attributes))
+        for field in serializer._readable_fields
+    ]
+
+    def represent(instance):
+        data = {}
+        for field_name, get_representation in fields:
+            value = get_representation(instance)
+            if value is not SKIP:
+                data[field_name] = value
+        return data
+
+    return represent
+
+
+class FastListSerializer(serializers.ListSerializer):
+    """
+    Renders rows with getters compiled once from the child serializer
+    Output is the same as ListSerializer, set it as list_serializer_class
+    of serializers rendering long lists
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        represent = compile_serializer(self.child)
+        return [represent(item) for item in iterable]